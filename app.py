@@ -1,148 +1,12 @@
 import streamlit as st
-import google.generativeai as genai
-import json
 import os
-import pypdf
+import threading
 import time
 
-# ==========================================
-# 0. DICCIONARIO DE TRADUCCIONES (i18n) + PROMPTS
-# ==========================================
-
-TRADUCCIONES = {
-    "ES": {
-        "titulo_app": "Análisis Crítico",
-        "intro": """
-        Este sistema emplea Inteligencia Artificial para examinar tus afirmaciones sobre tecnología. 
-        Procesa los argumentos para aportar contexto técnico y contrastar las ideas con una base de conocimiento especializada.
-        """,
-        "aviso_legal": "⚠️ **Aviso importante:** Esta herramienta no es un oráculo de verdad absoluta, sino un **asistente para la reflexión**.",
-        "input_label_escribir": "Introduce el argumento a analizar:",
-        "input_placeholder": "Escribe aquí el argumento...",
-        "input_label_select": "Selecciona un caso típico para analizar:",
-        "boton_ejecutar": "🚀 EJECUTAR ANÁLISIS",
-        "alerta_vacio": "⚠️ Protocolo detenido. El campo de argumento está vacío.",
-        "loading_1": "🔄 Inicializando protocolos forenses...",
-        "loading_2": "📂 Consultando documentos internos...",
-        "loading_3": "🧠 Procesando análisis semántico...",
-        "reporte_titulo": "📊 Reporte de Análisis",
-        "nivel_alarmismo": "Nivel de Alarmismo",
-        "clasificacion": "Clasificación",
-        "perfil": "Perfil",
-        "punto_dolor": "Punto de Dolor Detectado:",
-        "riesgo_real": "Riesgo Técnico Real:",
-        "desarticulacion": "Desarticulación Lógica:",
-        "evidencia_titulo": "📚 VER EVIDENCIA DOCUMENTAL Y FUENTE",
-        "cita_titulo": "Cita textual hallada:",
-        "fuente_no_disponible": "FUENTE NO DISPONIBLE",
-        "fuente_identificada": "DOCUMENTO FUENTE IDENTIFICADO",
-        "fuera_tema_titulo": "🔕 TEMA NO DETECTADO",
-        "fuera_tema_desc": "El Motor Crítico ha detectado que este argumento no está relacionado con tecnología o IA.",
-        "casos_ejemplo": [
-            "La IA es una caja negra que tomará decisiones de vida o muerte sin que sepamos por qué.",
-            "La IA roba el alma de los artistas al copiar sus estilos y anula la creatividad humana.",
-            "Los robots nos quitarán el trabajo y viviremos en la miseria absoluta.",
-            "Siento que las aplicaciones me escuchan y vigilan para manipular lo que compro y pienso.",
-            "Si un coche autónomo atropella a alguien por error, la culpa es del algoritmo, no de las personas."
-        ],
-        "modo_op_1": "✍️ Escribir crítica",
-        "modo_op_2": "📂 Casos Estratégicos",
-        "info_sidebar": "ℹ️ El **Nivel de Alarmismo** mide la distancia semántica entre la narrativa emocional y la realidad técnica.",
-        
-        # PROMPT EN ESPAÑOL
-        "system_prompt": """
-        Eres el "Motor de Desarticulación Lógica".
-        
-        TU PRIMERA MISIÓN ES UN FILTRO DE RELEVANCIA:
-        Analiza si el input del usuario está relacionado con tecnología, inteligencia artificial, sociedad digital, futuro del trabajo o ética tecnológica.
-        1. SI NO TIENE RELACIÓN:
-           - Debes devolver el JSON con "Clasificacion": "FUERA DE TEMA".
-           - En "Desarticulacion" explica brevemente en ESPAÑOL que solo analizas temas tecnológicos.
-           - Pon el resto de campos en "N/A" o 0.
-
-        2. SI TIENE RELACIÓN:
-           - Procede con el análisis forense estándar basándote exclusivamente en la documentación provista.
-           - RESPONDE SIEMPRE EN ESPAÑOL.
-
-        Debes responder SIEMPRE con este esquema JSON exacto (sin markdown extra):
-        {
-          "Clasificacion": "GRUPO A (Técnico) o GRUPO B (Cultural) o FUERA DE TEMA",
-          "Nivel_Alarmismo": (Número entero 0-100),
-          "Punto_de_Dolor": "Texto breve identificando la emoción subyacente...",
-          "Riesgo_Real": "Texto breve explicando el problema técnico real...",
-          "Desarticulacion": "Texto breve con el argumento lógico y filosófico...",
-          "Cita": "Cita textual breve extraída de los documentos...",
-          "Autor_Cita": "Nombre EXACTO del archivo PDF del que extrajiste la cita. Si no hay cita, pon 'N/A'."
-        }
-        """
-    },
-    "EN": {
-        "titulo_app": "Critical Analysis",
-        "intro": """
-        This system uses Artificial Intelligence to examine your claims about technology.
-        It processes arguments to provide technical context and contrast ideas against a specialized knowledge base.
-        """,
-        "aviso_legal": "⚠️ **Important Notice:** This tool is not an oracle of absolute truth, but an **assistant for reflection**.",
-        "input_label_escribir": "Enter the argument to analyze:",
-        "input_placeholder": "Type your argument here...",
-        "input_label_select": "Select a typical case to analyze:",
-        "boton_ejecutar": "🚀 RUN ANALYSIS",
-        "alerta_vacio": "⚠️ Protocol stopped. The argument field is empty.",
-        "loading_1": "🔄 Initializing forensic protocols...",
-        "loading_2": "📂 Consulting internal documents...",
-        "loading_3": "🧠 Processing semantic analysis...",
-        "reporte_titulo": "📊 Analysis Report",
-        "nivel_alarmismo": "Alarmism Level",
-        "clasificacion": "Classification",
-        "perfil": "Profile",
-        "punto_dolor": "Detected Pain Point:",
-        "riesgo_real": "Real Technical Risk:",
-        "desarticulacion": "Logical Deconstruction:",
-        "evidencia_titulo": "📚 VIEW DOCUMENTARY EVIDENCE AND SOURCE",
-        "cita_titulo": "Textual citation found (Translated if source is non-English):",
-        "fuente_no_disponible": "SOURCE NOT AVAILABLE",
-        "fuente_identificada": "SOURCE DOCUMENT IDENTIFIED",
-        "fuera_tema_titulo": "🔕 TOPIC NOT DETECTED",
-        "fuera_tema_desc": "The Critical Engine has detected that this argument is unrelated to technology or AI.",
-        "casos_ejemplo": [
-            "AI is a black box that will make life-or-death decisions without us knowing why.",
-            "AI steals the soul of artists by copying their styles and nullifies human creativity.",
-            "Robots will take our jobs and we will live in absolute poverty.",
-            "I feel like apps listen to me and watch me to manipulate what I buy and think.",
-            "If an autonomous car hits someone by mistake, the algorithm is to blame, not the people."
-        ],
-        "modo_op_1": "✍️ Write Critique",
-        "modo_op_2": "📂 Strategic Cases",
-        "info_sidebar": "ℹ️ The **Alarmism Level** measures the semantic distance between the emotional narrative and technical reality.",
-        
-        # --- PROMPT CORREGIDO PARA FORZAR TRADUCCIÓN DE CITAS ---
-        "system_prompt": """
-        You are the "Logical Deconstruction Engine".
-        
-        YOUR FIRST MISSION IS A RELEVANCE FILTER:
-        Analyze if the user input is related to technology, artificial intelligence, digital society, future of work, or tech ethics.
-        1. IF IT IS NOT RELATED:
-           - You must return the JSON with "Clasificacion": "FUERA DE TEMA".
-           - In "Desarticulacion" briefly explain in ENGLISH that you only analyze technological topics.
-           - Set other fields to "N/A" or 0.
-
-        2. IF IT IS RELATED:
-           - Proceed with the standard forensic analysis based exclusively on the provided documentation.
-           - RESPOND ALWAYS IN ENGLISH.
-
-        You must ALWAYS respond with this exact JSON schema (no extra markdown):
-        {
-          "Clasificacion": "GROUP A (Technical) or GROUP B (Cultural) or FUERA DE TEMA",
-          "Nivel_Alarmismo": (Integer 0-100),
-          "Punto_de_Dolor": "Brief text identifying the underlying emotion...",
-          "Riesgo_Real": "Brief text explaining the real technical problem...",
-          "Desarticulacion": "Brief text with the logical and philosophical argument...",
-          "Cita": "Brief textual citation extracted from the documents. IMPORTANT: IF THE ORIGINAL SOURCE DOCUMENT IS IN SPANISH, YOU MUST TRANSLATE THE QUOTE TO ENGLISH.",
-          "Autor_Cita": "EXACT Name of the PDF file from which you extracted the citation. If no citation, put 'N/A'."
-        }
-        """
-    }
-}
+from motor import analisis, cache_respuestas, cliente, corpus, esquema, limitador, metricas, relevancia, vigilante
+from motor.metricas import METRICAS
+# Textos de la interfaz (i18n) y prompts del sistema por idioma.
+from motor.traducciones import TRADUCCIONES
 
 # ==========================================
 # 1. CONFIGURACIÓN DE PÁGINA
@@ -177,6 +41,9 @@ def verify_token(token_ingresado):
     lista_tokens = [t.strip() for t in raw_tokens.split(",")]
     if token_ingresado.strip() in lista_tokens:
         st.session_state["password_correct"] = True
+        # Los tokens listados además en TOKENS_ADMIN ven el panel de métricas.
+        lista_admin = [t.strip() for t in st.secrets.get("TOKENS_ADMIN", "").split(",") if t.strip()]
+        st.session_state["es_admin"] = token_ingresado.strip() in lista_admin
         st.success("✅ OK")
         time.sleep(0.5) 
         st.rerun()    
@@ -224,44 +91,110 @@ estilo_css = """
     #MainMenu {visibility: hidden;} footer {visibility: hidden;}
 </style>
 """
-st.markdown(estilo_css, unsafe_allow_html=True)
+
+# Se reenvía en cada rerun completo: compactado para que pese menos.
+st.markdown(" ".join(estilo_css.split()), unsafe_allow_html=True)
 
 # ==========================================
 # 3. CONEXIÓN Y SEGURIDAD API
 # ==========================================
 
-try:
-    API_KEY = st.secrets["GOOGLE_API_KEY"]
-    genai.configure(api_key=API_KEY)
-except:
-    st.error("⚠️ ERROR CRÍTICO: No se detectó la API KEY en los Secrets.")
-    st.stop()
+# Con MOTOR_SERVICIO_URL la app es sólo un cliente del servicio de análisis
+# (python -m motor.servicio): la clave de la API y el corpus viven allí.
+SERVICIO_URL = st.secrets.get("MOTOR_SERVICIO_URL")
+
+if not SERVICIO_URL:
+    try:
+        API_KEY = st.secrets["GOOGLE_API_KEY"]
+    except:
+        st.error("⚠️ ERROR CRÍTICO: No se detectó la API KEY en los Secrets.")
+        st.stop()
 
 # ==========================================
 # 4. CEREBRO (LECTURA DE PDFs)
 # ==========================================
 
 @st.cache_resource
-def cargar_biblioteca_desde_pdfs(carpeta="datos"):
-    texto_total = ""
-    archivos_leidos = []
-    if not os.path.exists(carpeta):
-        os.makedirs(carpeta)
-        return "ADVERTENCIA: Carpeta 'datos' vacía.", []
-    archivos = [f for f in os.listdir(carpeta) if f.endswith('.pdf')]
-    for archivo in archivos:
-        try:
-            ruta_pdf = os.path.join(carpeta, archivo)
-            reader = pypdf.PdfReader(ruta_pdf)
-            for page in reader.pages:
-                texto_total += page.extract_text() + "\n"
-            texto_total += f"\n--- FIN DOCUMENTO: {archivo} ---\n"
-            archivos_leidos.append(archivo)
-        except Exception as e:
-            pass 
-    return texto_total, archivos_leidos
-
-BIBLIOTECA_CONOCIMIENTO, LISTA_ARCHIVOS = cargar_biblioteca_desde_pdfs()
+def crear_motor(carpeta="datos"):
+    # La extracción se apoya en una caché en disco (.cache/extraccion): sólo
+    # se vuelven a leer los PDFs nuevos o modificados, y en paralelo.
+    biblioteca = corpus.cargar_biblioteca(carpeta)
+    # Un único limitador por proceso: todas las sesiones comparten la cuota
+    # de la API y esperan en la misma cola cuando se agota.
+    limitador_tasa = limitador.LimitadorTasa(
+        peticiones_por_minuto=int(st.secrets.get("LIMITE_PETICIONES_MINUTO", 15)),
+        tokens_por_minuto=int(st.secrets.get("LIMITE_TOKENS_MINUTO", 1_000_000)),
+    )
+    return analisis.MotorAnalisis(
+        biblioteca,
+        analisis.BackendGemini(api_key=API_KEY),
+        # Los argumentos claramente ajenos a la tecnología se descartan en local,
+        # sin llamada a la API. UMBRAL_FUERA_DE_TEMA cambia el umbral ("off" lo
+        # desactiva; python -m motor.evaluar_relevancia para elegir otro).
+        # MAX_TOKENS_DOCUMENTO limita lo que aporta cada PDF al contexto.
+        # POLITICA_ENRUTADO ("adaptativa" o ruta a un JSON) elige modelo, tope de
+        # salida y contexto según la complejidad del argumento; REGISTRO_ENRUTADO
+        # guarda las decisiones en un JSONL para `python -m motor.reproducir`.
+        config=analisis.ConfigAnalisis(
+            umbral_fuera_de_tema=relevancia.leer_umbral(st.secrets.get("UMBRAL_FUERA_DE_TEMA")),
+            max_tokens_documento=int(st.secrets["MAX_TOKENS_DOCUMENTO"]) if st.secrets.get("MAX_TOKENS_DOCUMENTO") else None,
+            politica_enrutado=st.secrets.get("POLITICA_ENRUTADO"),
+            registro_enrutado=st.secrets.get("REGISTRO_ENRUTADO"),
+        ),
+        cache=cache_respuestas.CacheRespuestas(),
+        limitador=limitador_tasa,
+    )
+
+@st.cache_resource
+def precalentar_casos_ejemplo(_motor, huella):
+    # Se resuelven en segundo plano para no retrasar la primera página.
+    hilo = threading.Thread(target=_motor.precalentar, name="precalentar-cache", daemon=True)
+    hilo.start()
+    return hilo
+
+@st.cache_resource
+def iniciar_exportacion_metricas():
+    # Endpoint Prometheus (/metrics) y/o volcado JSONL, según los Secrets.
+    if st.secrets.get("METRICAS_PUERTO"):
+        metricas.servir_prometheus(int(st.secrets["METRICAS_PUERTO"]))
+    if st.secrets.get("METRICAS_JSONL"):
+        metricas.volcar_jsonl_periodicamente(
+            st.secrets["METRICAS_JSONL"], intervalo=float(st.secrets.get("METRICAS_INTERVALO", 60))
+        )
+    return True
+
+@st.cache_resource
+def iniciar_vigilante(_motor, carpeta="datos"):
+    # Recarga en caliente: al añadir, cambiar o quitar PDFs de `datos/` se
+    # re-extraen sólo esos documentos y el motor cambia de corpus de una vez;
+    # mientras tanto se sigue sirviendo la versión anterior.
+    intervalo = float(st.secrets.get("INTERVALO_RECARGA_CORPUS", 5))
+    return vigilante.VigilanteCorpus(
+        carpeta, lambda cambios: _motor.recargar_desde(carpeta), intervalo=intervalo
+    ).iniciar()
+
+@st.cache_resource
+def crear_cliente(url):
+    # El servicio acepta los mismos TOKENS_VALIDOS que la app.
+    token = st.secrets.get("MOTOR_SERVICIO_TOKEN") or st.secrets["TOKENS_VALIDOS"].split(",")[0].strip()
+    return cliente.ClienteServicio(url, token)
+
+iniciar_exportacion_metricas()
+if SERVICIO_URL:
+    MOTOR = crear_cliente(SERVICIO_URL)
+else:
+    MOTOR = crear_motor()
+    iniciar_vigilante(MOTOR)
+    precalentar_casos_ejemplo(MOTOR, MOTOR.biblioteca.huella)
+try:
+    BIBLIOTECA = MOTOR.biblioteca
+except (cliente.ErrorServicio, OSError):
+    # Servicio inalcanzable: la interfaz arranca igualmente, en estado OFFLINE.
+    BIBLIOTECA = cliente.ResumenBiblioteca()
+# Versión del corpus pintada en la sidebar (ver `panel_analisis`).
+st.session_state["huella_corpus"] = BIBLIOTECA.huella
+LISTA_ARCHIVOS = BIBLIOTECA.archivos
+ARCHIVOS_FALLIDOS = BIBLIOTECA.fallidos
 
 # ==========================================
 # 5. LÓGICA DE IDIOMA E INTERFAZ
@@ -304,7 +237,33 @@ with st.sidebar:
     """
     st.markdown(html_widget, unsafe_allow_html=True)
 
-    modo = st.radio("Modo:", [TXT["modo_op_1"], TXT["modo_op_2"]])
+    # PANEL DE MÉTRICAS (sólo administradores)
+    if st.session_state.get("es_admin"):
+        with st.expander("📈 Métricas / Metrics"):
+            # En modo cliente las métricas están en el servicio, no en este proceso.
+            try:
+                instantanea = MOTOR.metricas() if SERVICIO_URL else METRICAS.instantanea()
+                informe_tokens = MOTOR.informe_tokens
+            except (cliente.ErrorServicio, OSError) as e:
+                st.error(f"⚠️ Métricas no disponibles / unavailable: {e}")
+            else:
+                tasa_cache = instantanea["tasa_aciertos_cache"]
+                st.caption(f"Cache hit rate: {tasa_cache:.0%}" if tasa_cache is not None else "Cache hit rate: —")
+                st.dataframe(
+                    [{"etapa": etapa, **valores} for etapa, valores in instantanea["etapas"].items()],
+                    hide_index=True,
+                )
+                st.dataframe(
+                    [{"serie": serie, "valor": valor} for serie, valor in instantanea["contadores"].items()],
+                    hide_index=True,
+                )
+                # Tokens que cuesta cada PDF en cada llamada, antes y después de normalizar.
+                st.dataframe(informe_tokens, hide_index=True)
+
+    if ARCHIVOS_FALLIDOS:
+        detalle_fallidos = "\n".join(f"- `{archivo}`: {error}" for archivo, error in ARCHIVOS_FALLIDOS)
+        st.warning(f"⚠️ {len(ARCHIVOS_FALLIDOS)} PDF(s) no legibles / unreadable:\n\n{detalle_fallidos}")
+
     st.markdown("---")
     st.info(TXT["info_sidebar"])
     
@@ -318,31 +277,195 @@ with st.sidebar:
 # 6. CONFIGURACIÓN DEL MODELO IA (PROMPT DINÁMICO)
 # ==========================================
 
-MODEL_NAME = "models/gemini-2.0-flash"
+# El prompt por idioma, el contexto documental y la caché de respuestas viven
+# en motor.analisis.MotorAnalisis (compartido con la CLI de lotes).
 
-# AQUÍ ESTÁ EL CAMBIO CLAVE:
-# Cargamos el Prompt ENTERO desde el diccionario, según el idioma.
-SYSTEM_INSTRUCTION = f"""
-{TXT['system_prompt']}
+# Con streaming, cada sección del reporte se pinta en cuanto el modelo la completa.
+MODO_STREAMING = True
 
-LISTA DE FUENTES:
-{LISTA_ARCHIVOS}
+# ==========================================
+# 6.9 RENDERIZADO DEL REPORTE
+# ==========================================
 
-CONTEXTO DOCUMENTAL COMPLETO:
-{BIBLIOTECA_CONOCIMIENTO}
-"""
+class ReporteIncremental:
+    # Reserva los huecos del reporte con el primer campo que llega y rellena
+    # cada uno cuando llega el suyo (streaming o respuesta completa). El modelo
+    # no siempre empieza por la clasificación: si resulta ser FUERA DE TEMA,
+    # los huecos se rehacen con esa disposición.
+
+    def __init__(self, txt, loader_placeholder):
+        self.txt = txt
+        self.loader_placeholder = loader_placeholder
+        self.contenedor = st.empty()
+        self.data = {}
+        self.huecos = None
+        self.segundos_pintado = 0.0
+
+    def mostrar(self, campo, valor):
+        if campo == esquema.CAMPO_REINICIO:
+            # Se repite la petición: lo pintado hasta ahora deja de valer.
+            self.data = {}
+            self.huecos = None
+            self.contenedor.empty()
+            return
+        self.data[campo] = valor
+        if self.huecos is None or self._disposicion_cambiada(campo):
+            self._preparar()
+            for campo_previo in list(self.data):
+                self._pintar(campo_previo)
+        elif campo in self.huecos or campo == "Verificacion_Cita":
+            self._pintar(campo)
+
+    def _fuera_de_tema(self):
+        return self.data.get("Clasificacion") == "FUERA DE TEMA"
+
+    def _disposicion_cambiada(self, campo):
+        # Los huecos de FUERA DE TEMA no tienen métrica de alarmismo.
+        return campo == "Clasificacion" and self._fuera_de_tema() == ("Nivel_Alarmismo" in self.huecos)
+
+    def completar(self, data):
+        for campo, valor in data.items():
+            if self.data.get(campo) != valor:
+                self.mostrar(campo, valor)
+        if self.huecos is None:
+            self.data.setdefault("Clasificacion", "N/A")
+            self._preparar()
+        for campo in self.huecos:
+            if campo not in self.data:
+                self._pintar(campo)
+
+    def _preparar(self):
+        inicio = time.perf_counter()
+        try:
+            self._preparar_huecos()
+        finally:
+            self.segundos_pintado += time.perf_counter() - inicio
 
-generation_config = {
-    "temperature": 0.5,
-    "max_output_tokens": 8192,
-    "response_mime_type": "application/json",
-}
+    def _pintar(self, campo):
+        inicio = time.perf_counter()
+        try:
+            self._pintar_campo(campo)
+        finally:
+            self.segundos_pintado += time.perf_counter() - inicio
+
+    def _preparar_huecos(self):
+        self.loader_placeholder.empty()
+        # Vaciado antes: un contenedor nuevo en el mismo sitio conserva los
+        # elementos del anterior.
+        self.contenedor.empty()
+        with self.contenedor.container():
+            self._reservar_huecos()
+
+    def _reservar_huecos(self):
+        TXT = self.txt
+        st.divider()
+
+        # --- LÓGICA DE REPORTE ---
+        if self._fuera_de_tema():
+            st.warning(f"🔕 **{TXT['fuera_tema_titulo']}**")
+            self.huecos = {"Desarticulacion": st.empty()}
+            return
+
+        st.markdown(f"### {TXT['reporte_titulo']}")
+        col_met1, col_met2, col_met3 = st.columns(3)
+        self.huecos = {
+            "Nivel_Alarmismo": (col_met1.empty(), col_met2.empty()),
+            "Clasificacion": col_met3.empty(),
+        }
 
-model = genai.GenerativeModel(
-    model_name=MODEL_NAME,
-    generation_config=generation_config,
-    system_instruction=SYSTEM_INSTRUCTION
-)
+        st.markdown("<br>", unsafe_allow_html=True)
+
+        c1, c2 = st.columns(2)
+        with c1:
+            self.huecos["Punto_de_Dolor"] = st.empty()
+            self.huecos["Riesgo_Real"] = st.empty()
+        with c2:
+            self.huecos["Desarticulacion"] = st.empty()
+
+        st.markdown("<br>", unsafe_allow_html=True)
+        
+        # --- EVIDENCIA ---
+        with st.expander(TXT["evidencia_titulo"], expanded=True):
+            st.markdown(f"#### {TXT['cita_titulo']}")
+            self.huecos["Cita"] = st.empty()
+            st.markdown("<br>", unsafe_allow_html=True)
+            self.huecos["Autor_Cita"] = st.empty()
+
+    def _pintar_campo(self, campo):
+        TXT = self.txt
+        data = self.data
+        if campo == "Verificacion_Cita":
+            # La verificación local llega al final y completa la tarjeta de la fuente.
+            campo = "Autor_Cita"
+        hueco = self.huecos.get(campo)
+        if hueco is None:
+            return
+
+        if "Nivel_Alarmismo" not in self.huecos:
+            # FUERA DE TEMA: sólo se muestra la explicación de la IA.
+            hueco.info(f"{TXT['fuera_tema_desc']}\n\n**IA:** {data.get('Desarticulacion')}")
+
+        elif campo == "Clasificacion":
+            hueco.metric(TXT["perfil"], data.get('Clasificacion', 'N/A'))
+
+        elif campo == "Nivel_Alarmismo":
+            alarmismo = data.get('Nivel_Alarmismo', 0)
+            if alarmismo < 30:
+                estado_texto = "LOW/BAJO"
+            elif alarmismo < 70:
+                estado_texto = "MED/MEDIO"
+            else:
+                estado_texto = "CRITICAL/CRÍTICO"
+            hueco[0].metric(TXT["nivel_alarmismo"], f"{alarmismo}%")
+            hueco[1].metric(TXT["clasificacion"], estado_texto)
+
+        elif campo == "Punto_de_Dolor":
+            hueco.info(f"**😫 {TXT['punto_dolor']}**\n\n{data.get('Punto_de_Dolor')}")
+
+        elif campo == "Riesgo_Real":
+            hueco.warning(f"**⚠️ {TXT['riesgo_real']}**\n\n{data.get('Riesgo_Real')}")
+
+        elif campo == "Desarticulacion":
+            hueco.success(f"**🧠 {TXT['desarticulacion']}**\n\n{data.get('Desarticulacion')}")
+
+        elif campo == "Cita":
+            hueco.markdown(f"<blockquote>{data.get('Cita')}</blockquote>", unsafe_allow_html=True)
+
+        elif campo == "Autor_Cita":
+            autor_cita = data.get('Autor_Cita', 'Desconocido')
+            if autor_cita == "N/A" or autor_cita == "Desconocido":
+                color_borde = "#94a3b8"
+                icono_fuente = "🚫"
+                titulo_fuente = TXT["fuente_no_disponible"]
+            else:
+                color_borde = "#38bdf8"
+                icono_fuente = "📂"
+                titulo_fuente = TXT["fuente_identificada"]
+
+            # Distintivo de verificación local y página de la cita, si ya se conocen.
+            verificacion = data.get("Verificacion_Cita")
+            detalle_fuente = ""
+            if verificacion:
+                if verificacion["verificada"]:
+                    color_insignia, insignia = "#4ade80", TXT["cita_verificada"]
+                elif not verificacion.get("comprobable", True):
+                    color_insignia, insignia = "#94a3b8", TXT["cita_traducida"]
+                else:
+                    color_insignia, insignia = "#f87171", TXT["cita_no_verificada"]
+                pagina = f" · {TXT['pagina']} {verificacion['pagina']}" if verificacion.get("pagina") else ""
+                detalle_fuente = f"<div style='margin-top: 8px; color: {color_insignia}; font-size: 0.8rem; font-weight: 700; letter-spacing: 1px;'>{insignia}{pagina}</div>"
+
+            hueco.markdown(f"""
+            <div style='background-color: #020617; padding: 20px; border-radius: 10px; border: 2px solid {color_borde}; display: flex; align-items: center; gap: 20px; box-shadow: 0 4px 15px rgba(0,0,0,0.5);'>
+                <div style='font-size: 3rem; background: rgba(255,255,255,0.05); padding: 10px; border-radius: 50%; width: 80px; height: 80px; display: flex; align-items: center; justify-content: center;'>
+                    {icono_fuente}
+                </div>
+                <div>
+                    <div style='color: {color_borde}; font-size: 0.8rem; font-weight: 800; letter-spacing: 2px; text-transform: uppercase; margin-bottom: 5px;'>{titulo_fuente}</div>
+                    <div style='color: #ffffff; font-size: 1.3rem; font-weight: 700; font-family: monospace; word-break: break-all;'>{autor_cita}</div>{detalle_fuente}
+                </div>
+            </div>
+            """, unsafe_allow_html=True)
 
 # ==========================================
 # 7. CUERPO PRINCIPAL (INTERFACE)
@@ -365,109 +488,85 @@ st.markdown(html_aviso, unsafe_allow_html=True)
 
 st.markdown("---")
 
-# INPUT USUARIO
-if modo == TXT["modo_op_1"]:
-    input_usuario = st.text_area(TXT["input_label_escribir"], height=150, placeholder=TXT["input_placeholder"])
-else:
-    input_usuario = st.selectbox(TXT["input_label_select"], TXT["casos_ejemplo"])
-
-st.markdown("<br>", unsafe_allow_html=True)
+# El selector de modo, la entrada y el reporte forman un fragmento: cambiar
+# de modo o pulsar el botón sólo re-ejecuta esta parte, no la página entera
+# (sidebar, CSS, carga del motor).
+@st.fragment
+def panel_analisis():
+    # Tras una recarga en caliente del corpus, el STATUS de la sidebar queda
+    # desfasado: se vuelve a ejecutar la página entera.
+    try:
+        huella = MOTOR.biblioteca.huella
+    except (cliente.ErrorServicio, OSError):
+        huella = ""
+    if huella != st.session_state.get("huella_corpus"):
+        st.rerun()
 
-col_btn, col_rest = st.columns([1, 2])
-with col_btn:
-    ejecutar = st.button(TXT["boton_ejecutar"])
+    modo = st.radio("Modo:", [TXT["modo_op_1"], TXT["modo_op_2"]], horizontal=True)
 
-if ejecutar:
-    if not input_usuario:
-        st.warning(TXT["alerta_vacio"])
+    # INPUT USUARIO
+    if modo == TXT["modo_op_1"]:
+        input_usuario = st.text_area(TXT["input_label_escribir"], height=150, placeholder=TXT["input_placeholder"])
     else:
-        # VISUALIZACIÓN AUTOMÁTICA
-        loader_placeholder = st.empty()
+        input_usuario = st.selectbox(TXT["input_label_select"], TXT["casos_ejemplo"])
+
+    st.markdown("<br>", unsafe_allow_html=True)
+
+    col_btn, col_rest = st.columns([1, 2])
+    with col_btn:
+        ejecutar = st.button(TXT["boton_ejecutar"])
+
+    if ejecutar:
+        if not input_usuario:
+            st.warning(TXT["alerta_vacio"])
+        else:
+            # 0. CACHÉ: si el argumento ya se analizó, se sirve sin llamar a la IA
+            try:
+                data = MOTOR.consultar_cache(input_usuario, LANG_CODE)
+            except (cliente.ErrorServicio, OSError):
+                # El error se muestra abajo, al intentar el análisis.
+                data = None
+
+            # VISUALIZACIÓN AUTOMÁTICA
+            loader_placeholder = st.empty()
         
-        with loader_placeholder.container():
-            st.info(TXT["loading_1"])
-            time.sleep(0.3)
-            st.write(TXT["loading_2"])
-            time.sleep(0.3)
-            st.write(TXT["loading_3"])
-            
-        try:
-            # 1. LLAMADA A LA IA
-            response = model.generate_content(input_usuario)
-            
-            # 2. LIMPIEZA
-            texto_limpio = response.text.replace("```json", "").replace("```", "").strip()
-            data = json.loads(texto_limpio)
-            
-            clasificacion = data.get('Clasificacion', 'N/A')
-            alarmismo = data.get('Nivel_Alarmismo', 0)
+            if data is None:
+                with loader_placeholder.container():
+                    st.info(TXT["loading_1"])
+                    st.write(TXT["loading_2"])
+                    st.write(TXT["loading_3"])
+
+            reporte = ReporteIncremental(TXT, loader_placeholder)
+
+            def mostrar_cola(posicion, segundos):
+                loader_placeholder.warning(TXT["en_cola"].format(posicion=posicion, segundos=segundos))
+
+            def mostrar_reintento(intento, segundos, error):
+                loader_placeholder.warning(TXT["reintentando"].format(intento=intento))
             
-            loader_placeholder.empty()
-            st.divider()
-
-            # --- LÓGICA DE REPORTE ---
-            if clasificacion == "FUERA DE TEMA":
-                st.warning(f"🔕 **{TXT['fuera_tema_titulo']}**")
-                st.info(f"{TXT['fuera_tema_desc']}\n\n**IA:** {data.get('Desarticulacion')}")
-                
-            else:
-                st.markdown(f"### {TXT['reporte_titulo']}")
-                
-                if alarmismo < 30:
-                    estado_texto = "LOW/BAJO"
-                elif alarmismo < 70:
-                    estado_texto = "MED/MEDIO"
+            try:
+                if data is None and MODO_STREAMING:
+                    # 1. LLAMADA A LA IA EN STREAMING: cada campo se pinta al completarse
+                    data = MOTOR.analizar(
+                        input_usuario, LANG_CODE, al_recibir_campo=reporte.mostrar, usar_cache=False,
+                        al_esperar=mostrar_cola, al_reintentar=mostrar_reintento,
+                    )
+                elif data is None:
+                    # 1. LLAMADA A LA IA + 2. LIMPIEZA
+                    data = MOTOR.analizar(
+                        input_usuario, LANG_CODE, usar_cache=False,
+                        al_esperar=mostrar_cola, al_reintentar=mostrar_reintento,
+                    )
+
+                reporte.completar(data)
+                METRICAS.observar("renderizado", reporte.segundos_pintado)
+
+            except Exception as e:
+                loader_placeholder.empty()
+                st.error("Error técnico / Technical Error.")
+                if "429" in str(e):
+                     st.error("⏳ Server busy / Servidor ocupado (429).")
                 else:
-                    estado_texto = "CRITICAL/CRÍTICO"
-
-                col_met1, col_met2, col_met3 = st.columns(3)
-                col_met1.metric(TXT["nivel_alarmismo"], f"{alarmismo}%")
-                col_met2.metric(TXT["clasificacion"], estado_texto)
-                col_met3.metric(TXT["perfil"], clasificacion)
-
-                st.markdown("<br>", unsafe_allow_html=True)
-
-                c1, c2 = st.columns(2)
-                with c1:
-                    st.info(f"**😫 {TXT['punto_dolor']}**\n\n{data.get('Punto_de_Dolor')}")
-                    st.warning(f"**⚠️ {TXT['riesgo_real']}**\n\n{data.get('Riesgo_Real')}")
-                with c2:
-                    st.success(f"**🧠 {TXT['desarticulacion']}**\n\n{data.get('Desarticulacion')}")
-
-                st.markdown("<br>", unsafe_allow_html=True)
-                
-                # --- EVIDENCIA ---
-                with st.expander(TXT["evidencia_titulo"], expanded=True):
-                    st.markdown(f"#### {TXT['cita_titulo']}")
-                    st.markdown(f"<blockquote>{data.get('Cita')}</blockquote>", unsafe_allow_html=True)
-                    st.markdown("<br>", unsafe_allow_html=True)
-                    
-                    autor_cita = data.get('Autor_Cita', 'Desconocido')
-                    if autor_cita == "N/A" or autor_cita == "Desconocido":
-                        color_borde = "#94a3b8"
-                        icono_fuente = "🚫"
-                        titulo_fuente = TXT["fuente_no_disponible"]
-                    else:
-                        color_borde = "#38bdf8"
-                        icono_fuente = "📂"
-                        titulo_fuente = TXT["fuente_identificada"]
-
-                    st.markdown(f"""
-                    <div style='background-color: #020617; padding: 20px; border-radius: 10px; border: 2px solid {color_borde}; display: flex; align-items: center; gap: 20px; box-shadow: 0 4px 15px rgba(0,0,0,0.5);'>
-                        <div style='font-size: 3rem; background: rgba(255,255,255,0.05); padding: 10px; border-radius: 50%; width: 80px; height: 80px; display: flex; align-items: center; justify-content: center;'>
-                            {icono_fuente}
-                        </div>
-                        <div>
-                            <div style='color: {color_borde}; font-size: 0.8rem; font-weight: 800; letter-spacing: 2px; text-transform: uppercase; margin-bottom: 5px;'>{titulo_fuente}</div>
-                            <div style='color: #ffffff; font-size: 1.3rem; font-weight: 700; font-family: monospace; word-break: break-all;'>{autor_cita}</div>
-                        </div>
-                    </div>
-                    """, unsafe_allow_html=True)
-
-        except Exception as e:
-            loader_placeholder.empty()
-            st.error("Error técnico / Technical Error.")
-            if "429" in str(e):
-                 st.error("⏳ Server busy / Servidor ocupado (429).")
-            else:
-                 st.code(e)
\ No newline at end of file
+                     st.code(e)
+
+panel_analisis()
\ No newline at end of file
@@ -0,0 +1 @@
+"""Núcleo del Motor Crítico: carga del corpus documental y análisis."""
@@ -0,0 +1,162 @@
+"""Almacén del corpus en disco, mapeado en memoria y compartido entre procesos.
+
+Cada versión del corpus (su huella) se escribe una sola vez en
+`.cache/almacen/corpus-<huella>.txt`: el texto en UTF-8, con el mismo formato
+que `Biblioteca.texto`, más una tabla de desplazamientos en bytes por
+documento y página (`.json`). Los procesos lo abren con `mmap`, de modo que
+las páginas las comparte el sistema operativo en vez de repetirse en la
+memoria de cada worker. Las páginas se decodifican al acceder a ellas (una
+cada vez) y el texto completo sólo se materializa si se pide.
+
+Los índices derivados se apoyan en el mismo mecanismo: los fragmentos BM25
+son desplazamientos dentro de estas páginas (`leer_tramo`) y los trigramas
+del verificador de citas se mapean desde su propio archivo (motor.citas).
+Lo que sigue siendo propio de cada proceso son las frecuencias de términos
+del índice BM25 y, si está activo, el filtro de relevancia: crecen con el
+corpus (unos 2 MB por proceso con los PDFs actuales), así que la memoria por
+worker no es del todo plana. Con contexto completo (corpus
+pequeño por definición) las instrucciones de cada idioma incluyen además una
+copia del texto.
+"""
+
+import mmap
+import os
+from collections.abc import Sequence
+
+from motor.corpus import Biblioteca, Documento, escribir_json_atomico, leer_json
+
+CARPETA_ALMACEN = os.path.join(".cache", "almacen")
+VERSION_ALMACEN = 2
+# Versiones del corpus que se conservan en disco; las más antiguas se borran
+# al escribir una nueva (un proceso que aún las tenga mapeadas las sigue
+# leyendo: en POSIX el mapa sobrevive al borrado del archivo).
+MAX_VERSIONES = 4
+
+
+class PaginasMapeadas(Sequence):
+    def __init__(self, mapa, tramos):
+        self._mapa = mapa
+        self._tramos = tramos
+
+    def __len__(self):
+        return len(self._tramos)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        inicio, fin = self._tramos[i]
+        return self._mapa[inicio:fin].decode("utf-8")
+
+    def tramo(self, i, desde, hasta):
+        # Bytes [desde, hasta) de la página i, sin decodificar el resto.
+        inicio, _ = self._tramos[i]
+        return self._mapa[inicio + desde:inicio + hasta].decode("utf-8")
+
+
+def leer_tramo(paginas, i, desde, hasta):
+    # Igual que `PaginasMapeadas.tramo` para páginas en memoria.
+    if isinstance(paginas, PaginasMapeadas):
+        return paginas.tramo(i, desde, hasta)
+    return paginas[i].encode("utf-8")[desde:hasta].decode("utf-8")
+
+
+class BibliotecaMapeada(Biblioteca):
+    def __init__(self, documentos, fallidos, mapa):
+        super().__init__(documentos, fallidos)
+        self._mapa = mapa
+
+    @property
+    def texto(self):
+        # El archivo ya tiene el formato de `Biblioteca.texto`: sin caché, para
+        # no retener una copia completa por proceso.
+        return self._mapa[:].decode("utf-8")
+
+
+# ==========================================
+# ESCRITURA Y APERTURA
+# ==========================================
+
+def escribir(biblioteca, base):
+    # Mismo recorrido que `Biblioteca.texto`, anotando dónde empieza y acaba
+    # cada página en bytes.
+    documentos, posicion = [], 0
+    temporal = f"{base}.txt.{os.getpid()}.tmp"
+    with open(temporal, "wb") as f:
+        for doc in biblioteca.documentos:
+            tramos = []
+            for pagina in doc.paginas:
+                datos = pagina.encode("utf-8")
+                tramos.append((posicion, posicion + len(datos)))
+                f.write(datos + b"\n")
+                posicion += len(datos) + 1
+            cierre = f"\n--- FIN DOCUMENTO: {doc.archivo} ---\n".encode("utf-8")
+            f.write(cierre)
+            posicion += len(cierre)
+            documentos.append({"archivo": doc.archivo, "hash": doc.hash, "paginas": tramos})
+    os.replace(temporal, f"{base}.txt")
+    escribir_json_atomico(f"{base}.json", {
+        "version": VERSION_ALMACEN,
+        "huella": biblioteca.huella,
+        "tamano": posicion,
+        "documentos": documentos,
+    })
+
+
+def abrir(base, fallidos=()):
+    # Los fallidos no se guardan en el almacén (la huella sólo cubre los
+    # documentos leídos): son siempre los de la extracción actual.
+    tabla = leer_json(f"{base}.json")
+    if not tabla or tabla.get("version") != VERSION_ALMACEN:
+        return None
+    try:
+        with open(f"{base}.txt", "rb") as f:
+            if os.fstat(f.fileno()).st_size != tabla["tamano"]:
+                return None
+            # El mapa sigue siendo válido después de cerrar el archivo.
+            mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    documentos = [
+        Documento(d["archivo"], d["hash"], PaginasMapeadas(mapa, [tuple(t) for t in d["paginas"]]))
+        for d in tabla["documentos"]
+    ]
+    return BibliotecaMapeada(documentos, list(fallidos), mapa)
+
+
+def mapear(biblioteca, carpeta=CARPETA_ALMACEN):
+    # Devuelve la misma biblioteca respaldada por el almacén, escribiéndolo si
+    # es la primera vez que se ve esta versión del corpus.
+    if isinstance(biblioteca, BibliotecaMapeada) or not biblioteca.documentos:
+        return biblioteca
+    os.makedirs(carpeta, exist_ok=True)
+    base = os.path.join(carpeta, f"corpus-{biblioteca.huella[:16]}")
+    mapeada = abrir(base, biblioteca.fallidos)
+    if mapeada is None or mapeada.huella != biblioteca.huella:
+        escribir(biblioteca, base)
+        mapeada = abrir(base, biblioteca.fallidos)
+        limpiar(carpeta, conservar=base)
+    return mapeada
+
+
+def limpiar(carpeta=CARPETA_ALMACEN, conservar=None, max_versiones=MAX_VERSIONES,
+            prefijo="corpus-", extensiones=(".txt", ".json")):
+    # Borra las versiones más antiguas de `<prefijo><huella>.*`; también lo
+    # usan los índices derivados del corpus (BM25, trigramas de citas).
+    bases = {}
+    for nombre in os.listdir(carpeta):
+        if nombre.startswith(prefijo) and nombre.endswith(extensiones):
+            ruta = os.path.join(carpeta, nombre)
+            try:
+                mtime = os.path.getmtime(ruta)
+            except OSError:
+                continue
+            base = os.path.splitext(ruta)[0]
+            bases[base] = max(bases.get(base, 0), mtime)
+    antiguas = sorted((b for b in bases if b != conservar), key=bases.get, reverse=True)
+    for base in antiguas[max_versiones - 1:]:
+        for extension in extensiones:
+            try:
+                os.remove(base + extension)
+            except OSError:
+                # En Windows no se puede borrar un archivo mapeado por otro proceso.
+                pass
@@ -0,0 +1,522 @@
+"""Núcleo de análisis independiente de la interfaz.
+
+`MotorAnalisis` reúne todo lo necesario para analizar un argumento: corpus,
+índice de recuperación, prompts por idioma, caché de respuestas y un
+backend de generación intercambiable (Gemini o el sustituto local de
+`motor.falso`). Lo usan por igual la app de Streamlit y la CLI de lotes.
+"""
+
+import asyncio
+import functools
+import hashlib
+import logging
+import threading
+import time
+from dataclasses import dataclass
+
+from motor import almacen, cache_respuestas, citas, coalescencia, corpus, enrutado, esquema, json_incremental, limitador, normalizacion, recuperacion, relevancia
+from motor.metricas import METRICAS
+from motor.traducciones import TRADUCCIONES
+
+log = logging.getLogger(__name__)
+
+MODEL_NAME = "models/gemini-2.0-flash"
+
+# Reserva de tokens de salida que se descuenta del límite por minuto.
+TOKENS_SALIDA_ESTIMADOS = 1024
+
+GENERATION_CONFIG = {
+    "temperature": 0.5,
+    "max_output_tokens": 8192,
+    "response_mime_type": "application/json",
+    # El modelo queda obligado a devolver los siete campos con su tipo.
+    "response_schema": esquema.RESPONSE_SCHEMA,
+}
+
+
+@dataclass
+class ConfigAnalisis:
+    modelo: str = MODEL_NAME
+    # CONTEXTO DOCUMENTAL:
+    # - "completo": se envía la biblioteca entera en el SYSTEM_INSTRUCTION.
+    # - "recuperacion": sólo los fragmentos más relevantes para cada argumento.
+    # - "auto": completo si el corpus cabe en `umbral_tokens_contexto_completo`.
+    modo_contexto: str = "auto"
+    umbral_tokens_contexto_completo: int = 12000
+    top_k_fragmentos: int = 8
+    presupuesto_tokens_contexto: int = 4000
+    # Reintentos ante errores transitorios (429, 5xx) con backoff exponencial.
+    reintentos: int = 4
+    backoff_base: float = 1.0
+    backoff_maximo: float = 30.0
+    # Filtro local de relevancia: confianza mínima de "fuera de tema" para
+    # responder sin llamar al modelo (ver motor.relevancia). None lo desactiva.
+    umbral_fuera_de_tema: float | None = relevancia.UMBRAL_POR_DEFECTO
+    # Limpieza del texto extraído antes de montar el prompt (cabeceras, guiones,
+    # espacios, bloques casi duplicados) y tope opcional de tokens por PDF.
+    normalizar_corpus: bool = True
+    umbral_duplicados: float = 0.8
+    max_tokens_documento: int | None = None
+    # Texto del corpus servido desde un archivo mapeado en memoria
+    # (.cache/almacen) que comparten todos los procesos, en vez de una copia
+    # en cada uno. Los índices derivados siguen siendo de cada proceso.
+    mapear_corpus: bool = True
+    # Enrutado por complejidad del argumento (motor.enrutado): nombre de una
+    # política predefinida o ruta a su JSON. None = mismo modelo, tope de
+    # salida y contexto para todas las peticiones. `registro_enrutado` es el
+    # JSONL donde se anotan las decisiones (entrada de motor.reproducir).
+    politica_enrutado: str | None = None
+    registro_enrutado: str | None = None
+
+
+# ==========================================
+# BACKENDS DE GENERACIÓN
+# ==========================================
+
+class BackendGemini:
+    # `fabrica_modelo` construye objetos con la interfaz de genai.GenerativeModel;
+    # por defecto el del SDK, o `ModeloGenerativoFalso` para ejecuciones locales.
+
+    def __init__(self, api_key=None, generation_config=None, fabrica_modelo=None, metricas=METRICAS):
+        if fabrica_modelo is None:
+            import google.generativeai as genai
+
+            if api_key:
+                genai.configure(api_key=api_key)
+            fabrica_modelo = genai.GenerativeModel
+        self.fabrica_modelo = fabrica_modelo
+        self.generation_config = generation_config or GENERATION_CONFIG
+        self.metricas = metricas
+        self._modelos = {}
+
+    def modelo(self, nombre_modelo, instruccion, max_tokens_salida=None):
+        clave = (nombre_modelo, instruccion, max_tokens_salida)
+        modelo = self._modelos.get(clave)
+        if modelo is None:
+            if len(self._modelos) >= 16:
+                # Instrucciones de versiones anteriores del corpus.
+                self._modelos.clear()
+            generation_config = self.generation_config
+            if max_tokens_salida is not None:
+                generation_config = dict(generation_config, max_output_tokens=max_tokens_salida)
+            modelo = self.fabrica_modelo(
+                model_name=nombre_modelo,
+                generation_config=generation_config,
+                system_instruction=instruccion,
+            )
+            self._modelos[clave] = modelo
+        return modelo
+
+    def generar(self, nombre_modelo, instruccion, contenido, max_tokens_salida=None):
+        respuesta = self.modelo(nombre_modelo, instruccion, max_tokens_salida).generate_content(contenido)
+        self._registrar_uso(getattr(respuesta, "usage_metadata", None))
+        return respuesta.text
+
+    def generar_stream(self, nombre_modelo, instruccion, contenido, max_tokens_salida=None):
+        uso = None
+        for chunk in self.modelo(nombre_modelo, instruccion, max_tokens_salida).generate_content(contenido, stream=True):
+            # El recuento de tokens llega acumulado; vale el del último trozo.
+            uso = getattr(chunk, "usage_metadata", None) or uso
+            if chunk.parts:
+                yield chunk.text
+        self._registrar_uso(uso)
+
+    def _registrar_uso(self, uso):
+        if uso is None:
+            return
+        self.metricas.incrementar("tokens", getattr(uso, "prompt_token_count", 0) or 0, tipo="prompt")
+        self.metricas.incrementar("tokens", getattr(uso, "candidates_token_count", 0) or 0, tipo="respuesta")
+
+
+def backend_falso(latencia=0.0, tasa_error=0.0, codigo_error=429, semilla=0, metricas=METRICAS):
+    from motor.falso import ModeloGenerativoFalso
+
+    fabrica = functools.partial(
+        ModeloGenerativoFalso, latencia=latencia, tasa_error=tasa_error, codigo_error=codigo_error, semilla=semilla
+    )
+    return BackendGemini(fabrica_modelo=fabrica, metricas=metricas)
+
+
+# ==========================================
+# MOTOR
+# ==========================================
+
+class EstadoCorpus:
+    # Todo lo que se deriva del corpus (texto, índice, instrucciones). Al
+    # recargar se construye uno nuevo y se sustituye de una vez.
+
+    def __init__(self, biblioteca, config, anterior=None, con_indice=False):
+        # `original` identifica la biblioteca tal como se extrajo (la que se
+        # compara al recargar); `biblioteca` es la que se sirve al modelo. Con
+        # `mapear_corpus`, el texto servido sale del almacén en disco compartido
+        # entre procesos (motor.almacen). Sólo se escribe la versión servida:
+        # si se normaliza, de la original se guardan archivos y hashes.
+        # `con_indice` construye el índice aunque el corpus quepa entero (el
+        # enrutado puede pedir recuperación para algunas peticiones).
+        self.informe_tokens = []
+        if config.normalizar_corpus:
+            self.original = corpus.Biblioteca(
+                [corpus.Documento(d.archivo, d.hash, []) for d in biblioteca.documentos], biblioteca.fallidos
+            )
+            biblioteca, self.informe_tokens = normalizacion.normalizar(
+                biblioteca, config.umbral_duplicados, config.max_tokens_documento
+            )
+        if config.mapear_corpus:
+            biblioteca = almacen.mapear(biblioteca)
+        if not config.normalizar_corpus:
+            self.original = biblioteca
+        self.biblioteca = biblioteca
+        if config.modo_contexto == "auto":
+            # Estimación página a página, sin montar el texto completo.
+            tokens = sum(corpus.estimar_tokens(p) for doc in biblioteca.documentos for p in doc.paginas)
+            self.usar_contexto_completo = tokens <= config.umbral_tokens_contexto_completo
+        else:
+            self.usar_contexto_completo = config.modo_contexto == "completo"
+        self.indice = None
+        if con_indice or not self.usar_contexto_completo:
+            self.indice = recuperacion.cargar_o_construir(biblioteca, anterior=anterior and anterior.indice)
+        self.verificador = citas.VerificadorCitas(
+            biblioteca, carpeta=recuperacion.CARPETA_INDICE if config.mapear_corpus else None
+        )
+        self.filtro = None
+        if config.umbral_fuera_de_tema is not None:
+            self.filtro = relevancia.FiltroRelevancia.construir(biblioteca, umbral=config.umbral_fuera_de_tema)
+        self._instrucciones = {}
+
+    def completo(self, decision=None):
+        # El contexto completo sólo se usa si el corpus cabe y la decisión de
+        # enrutado (si la hay) lo permite.
+        return self.usar_contexto_completo and (decision is None or decision.contexto == "completo")
+
+    def instruccion(self, idioma, completo=None):
+        # Cargamos el Prompt ENTERO desde el diccionario, según el idioma.
+        completo = self.usar_contexto_completo if completo is None else completo
+        if (idioma, completo) not in self._instrucciones:
+            if completo:
+                self._instrucciones[idioma, completo] = f"""
+{TRADUCCIONES[idioma]['system_prompt']}
+
+LISTA DE FUENTES:
+{self.biblioteca.archivos}
+
+CONTEXTO DOCUMENTAL COMPLETO:
+{self.biblioteca.texto or "ADVERTENCIA: Carpeta 'datos' vacía."}
+"""
+            else:
+                self._instrucciones[idioma, completo] = f"""
+{TRADUCCIONES[idioma]['system_prompt']}
+
+LISTA DE FUENTES:
+{self.biblioteca.archivos}
+
+El contexto documental relevante para cada argumento se adjunta en el mensaje del usuario,
+con el nombre del archivo fuente y la página de cada fragmento.
+"""
+        return self._instrucciones[idioma, completo]
+
+    def contenido(self, texto, config, decision=None):
+        if self.completo(decision):
+            return texto
+        top_k, presupuesto = config.top_k_fragmentos, config.presupuesto_tokens_contexto
+        if decision is not None:
+            top_k, presupuesto = decision.top_k_fragmentos, decision.presupuesto_tokens_contexto
+        fragmentos = recuperacion.seleccionar_fragmentos(self.indice, texto, top_k, presupuesto)
+        return f"""CONTEXTO DOCUMENTAL RELEVANTE:
+{recuperacion.formatear_contexto(fragmentos)}
+
+ARGUMENTO A ANALIZAR:
+{texto}
+"""
+
+    def huella(self, idioma, decision=None):
+        # La huella cubre corpus, modo de contexto y prompt: si cambia cualquiera,
+        # las respuestas antiguas dejan de coincidir.
+        contexto = self.completo(decision)
+        if decision is not None and not contexto:
+            contexto = f"{contexto}|{decision.top_k_fragmentos}|{decision.presupuesto_tokens_contexto}"
+        return hashlib.sha256(
+            f"{self.biblioteca.huella}|{contexto}|{TRADUCCIONES[idioma]['system_prompt']}".encode("utf-8")
+        ).hexdigest()
+
+
+class MotorAnalisis:
+    def __init__(self, biblioteca, backend, config=None, cache=None, limitador=None, metricas=METRICAS):
+        self.backend = backend
+        self.config = config or ConfigAnalisis()
+        self.cache = cache
+        self.limitador = limitador
+        self.metricas = metricas
+        self.enrutador = None
+        if self.config.politica_enrutado is not None:
+            self.enrutador = enrutado.Enrutador(
+                enrutado.cargar_politica(self.config.politica_enrutado),
+                registro=self.config.registro_enrutado,
+                metricas=metricas,
+            )
+        self.estado = EstadoCorpus(biblioteca, self.config, con_indice=self._con_indice)
+        self.vuelos = coalescencia.VueloUnico()
+        self._lock_recarga = threading.Lock()
+
+    @property
+    def biblioteca(self):
+        return self.estado.biblioteca
+
+    @property
+    def _con_indice(self):
+        return self.enrutador is not None and self.enrutador.politica.usa_recuperacion
+
+    def decidir(self, texto):
+        # Decisión de enrutado para el argumento; None sin política.
+        return None if self.enrutador is None else self.enrutador.decidir(texto)
+
+    @property
+    def informe_tokens(self):
+        return self.estado.informe_tokens
+
+    # --- PROMPT ---
+
+    def instruccion(self, idioma):
+        return self.estado.instruccion(idioma)
+
+    def contenido(self, texto):
+        return self.estado.contenido(texto, self.config)
+
+    # --- CACHÉ ---
+
+    def clave(self, texto, idioma, estado=None):
+        estado = estado or self.estado
+        decision = self.decidir(texto)
+        modelo = self.config.modelo if decision is None else f"{decision.modelo}|{decision.max_tokens_salida}"
+        return cache_respuestas.clave_respuesta(texto, idioma, modelo, estado.huella(idioma, decision))
+
+    def consultar_cache(self, texto, idioma):
+        if self.cache is None:
+            return None
+        data = self.cache.obtener(self.clave(texto, idioma))
+        self.metricas.incrementar("cache", resultado="fallo" if data is None else "acierto")
+        return data
+
+    # --- RECARGA DEL CORPUS ---
+
+    def recargar(self, biblioteca):
+        # El estado nuevo se prepara por completo (índice e instrucciones) antes
+        # de sustituir al anterior; las peticiones en curso terminan con el suyo.
+        with self.metricas.medir("recarga_corpus"):
+            nuevo = EstadoCorpus(biblioteca, self.config, anterior=self.estado, con_indice=self._con_indice)
+            for idioma in TRADUCCIONES:
+                nuevo.instruccion(idioma)
+        self.estado = nuevo
+        self.metricas.incrementar("recargas_corpus")
+
+    def recargar_desde(self, carpeta="datos"):
+        # Sólo se extraen los PDFs añadidos o modificados; devuelve True si el
+        # corpus ha cambiado.
+        with self._lock_recarga:
+            original = self.estado.original
+            biblioteca = corpus.cargar_biblioteca(carpeta, anterior=original)
+            if biblioteca.huella == original.huella and biblioteca.fallidos == original.fallidos:
+                return False
+            self.recargar(biblioteca)
+            return True
+
+    # --- ANÁLISIS ---
+
+    def analizar(self, texto, idioma, al_recibir_campo=None, usar_cache=True,
+                 al_esperar=None, al_reintentar=None):
+        # Con `al_recibir_campo` la llamada va en streaming y cada campo del
+        # JSON se entrega en cuanto está completo. `al_esperar(posicion, segundos)`
+        # informa de la cola del limitador y `al_reintentar(intento, segundos, error)`
+        # de cada reintento tras un error transitorio.
+        if usar_cache:
+            data = self.consultar_cache(texto, idioma)
+            if data is not None:
+                return data
+
+        # Se fija la versión del corpus para toda la petición, aunque entretanto
+        # se recargue.
+        estado = self.estado
+        if estado.filtro is not None:
+            if estado.filtro.es_fuera_de_tema(texto):
+                self.metricas.incrementar("filtro_relevancia", resultado="fuera_de_tema")
+                data = relevancia.respuesta_fuera_de_tema(idioma)
+                if al_recibir_campo is not None:
+                    for campo, valor in data.items():
+                        al_recibir_campo(campo, valor)
+                return data
+            self.metricas.incrementar("filtro_relevancia", resultado="en_tema")
+
+        # Peticiones idénticas simultáneas (misma clave de caché) comparten una
+        # sola llamada al modelo.
+        clave = self.clave(texto, idioma, estado)
+        data, compartido = self.vuelos.ejecutar(
+            clave,
+            lambda emitir: self._consultar_modelo(estado, texto, idioma, clave, emitir, al_esperar, al_reintentar),
+            al_recibir_campo,
+        )
+        if compartido:
+            self.metricas.incrementar("coalescidas")
+        return data
+
+    def _consultar_modelo(self, estado, texto, idioma, clave, al_recibir_campo, al_esperar, al_reintentar):
+        decision = self.decidir(texto)
+        with self.metricas.medir("ensamblado_prompt"):
+            instruccion = estado.instruccion(idioma, estado.completo(decision))
+            contenido = estado.contenido(texto, self.config, decision)
+        tokens_entrada = corpus.estimar_tokens(instruccion) + corpus.estimar_tokens(contenido)
+        tokens = tokens_entrada + TOKENS_SALIDA_ESTIMADOS
+        if decision is not None:
+            tokens = tokens_entrada + min(TOKENS_SALIDA_ESTIMADOS, decision.max_tokens_salida)
+
+        def esperar(posicion, segundos):
+            self.metricas.incrementar("esperas_cola")
+            if al_esperar is not None:
+                al_esperar(posicion, segundos)
+
+        def reintento(intento, segundos, error):
+            self.metricas.incrementar("reintentos", clase=type(error).__name__)
+            if al_reintentar is not None:
+                al_reintentar(intento, segundos, error)
+
+        def llamar():
+            if self.limitador is not None:
+                self.limitador.adquirir(tokens, al_esperar=esperar)
+            return self._generar(instruccion, contenido, al_recibir_campo, decision)
+
+        def llamar_con_reintentos():
+            return limitador.reintentar(
+                llamar,
+                intentos=self.config.reintentos,
+                base=self.config.backoff_base,
+                maximo=self.config.backoff_maximo,
+                limitador=self.limitador,
+                al_reintentar=reintento,
+            )
+
+        inicio = time.perf_counter()
+        try:
+            try:
+                data, reparaciones = llamar_con_reintentos()
+            except esquema.RespuestaInvalida as e:
+                # Irreparable en local: una sola repetición, sin streaming y
+                # recordando el formato. Los campos ya entregados se anulan
+                # antes (la repetición puede clasificar distinto) y la
+                # respuesta se pinta entera al final.
+                self.metricas.incrementar("respuestas", resultado="reintentada")
+                contenido = f"{contenido}\n\n{TRADUCCIONES[idioma]['recordatorio_json']}"
+                if al_recibir_campo is not None:
+                    al_recibir_campo(esquema.CAMPO_REINICIO, None)
+                al_recibir_campo = None
+                try:
+                    data, reparaciones = llamar_con_reintentos()
+                except esquema.RespuestaInvalida:
+                    self.metricas.incrementar("respuestas", resultado="fallida")
+                    raise e
+        except Exception as e:
+            self.metricas.incrementar("errores", clase=type(e).__name__)
+            if decision is not None:
+                self.enrutador.registrar(decision, texto, idioma, time.perf_counter() - inicio, tokens_entrada,
+                                         estado.completo(decision), error=type(e).__name__)
+            raise
+        if decision is not None:
+            self.enrutador.registrar(decision, texto, idioma, time.perf_counter() - inicio, tokens_entrada,
+                                     estado.completo(decision))
+
+        self._verificar_cita(estado, data, idioma, al_recibir_campo)
+        # Una respuesta reparada en local (texto cortado, campos por defecto)
+        # no se guarda: repetir la petición debe poder dar la respuesta completa.
+        if self.cache is not None and not reparaciones:
+            self.cache.guardar(clave, data)
+        return data
+
+    def _verificar_cita(self, estado, data, idioma, al_recibir_campo):
+        # Comprueba la cita contra el corpus, corrige el archivo si hace falta y
+        # añade `Verificacion_Cita` (verificada, archivo, página, similitud,
+        # comprobable).
+        if not isinstance(data, dict) or data.get("Cita") in (None, "", "N/A"):
+            return
+        with self.metricas.medir("verificacion_cita"):
+            resultado = estado.verificador.verificar(str(data["Cita"]), data.get("Autor_Cita"))
+        if not resultado.verificada and TRADUCCIONES[idioma]["traduce_citas"]:
+            # En un idioma que traduce las citas, no encontrarla no indica que
+            # sea falsa: se marca como no comprobable.
+            resultado = citas.ResultadoCita(False, data.get("Autor_Cita"), None, resultado.similitud, comprobable=False)
+            self.metricas.incrementar("citas", resultado="no_comprobable")
+        elif not resultado.verificada:
+            self.metricas.incrementar("citas", resultado="no_verificada")
+        elif resultado.archivo != data.get("Autor_Cita"):
+            self.metricas.incrementar("citas", resultado="corregida")
+            data["Autor_Cita"] = resultado.archivo
+            if al_recibir_campo is not None:
+                al_recibir_campo("Autor_Cita", resultado.archivo)
+        else:
+            self.metricas.incrementar("citas", resultado="verificada")
+        data["Verificacion_Cita"] = resultado.como_dict()
+        if al_recibir_campo is not None:
+            al_recibir_campo("Verificacion_Cita", data["Verificacion_Cita"])
+
+    def _generar(self, instruccion, contenido, al_recibir_campo, decision=None):
+        # Con enrutado, el modelo y el tope de salida los fija la decisión.
+        modelo, extra = self.config.modelo, {}
+        if decision is not None:
+            modelo, extra = decision.modelo, {"max_tokens_salida": decision.max_tokens_salida}
+        if al_recibir_campo is None:
+            with self.metricas.medir("llamada_modelo"):
+                texto = self.backend.generar(modelo, instruccion, contenido, **extra)
+            with self.metricas.medir("parseo_json"):
+                return self._validar(texto)
+
+        # En streaming el parseo va intercalado con la llamada; se mide además
+        # el tiempo hasta el primer campo completo. El tiempo que pasa en
+        # `al_recibir_campo` (el pintado de la interfaz) no cuenta como llamada
+        # al modelo: quien pinta ya lo mide como `renderizado`.
+        parser = json_incremental.ParserJSONIncremental()
+        inicio = time.perf_counter()
+        primer_campo = True
+        en_callbacks = 0.0
+        try:
+            for trozo in self.backend.generar_stream(modelo, instruccion, contenido, **extra):
+                for campo, valor in parser.alimentar(trozo):
+                    if campo not in esquema.TIPOS:
+                        continue
+                    if primer_campo:
+                        self.metricas.observar("primer_campo", time.perf_counter() - inicio)
+                        primer_campo = False
+                    antes = time.perf_counter()
+                    al_recibir_campo(campo, esquema.coaccionar(campo, valor)[0])
+                    en_callbacks += time.perf_counter() - antes
+        finally:
+            self.metricas.observar("llamada_modelo", time.perf_counter() - inicio - en_callbacks)
+        with self.metricas.medir("parseo_json"):
+            return self._validar(parser.texto)
+
+    def _validar(self, texto):
+        # Valida contra el esquema y repara en local lo que se pueda (JSON
+        # truncado o mal formado, tipos, campos no esenciales ausentes).
+        # Devuelve (data, reparaciones).
+        try:
+            data, reparaciones = esquema.reparar(texto)
+        except esquema.RespuestaInvalida as e:
+            for tipo in dict.fromkeys(e.reparaciones):
+                self.metricas.incrementar("reparaciones", tipo=tipo)
+            raise
+        for tipo in dict.fromkeys(reparaciones):
+            self.metricas.incrementar("reparaciones", tipo=tipo)
+        self.metricas.incrementar("respuestas", resultado="reparada" if reparaciones else "valida")
+        return data, reparaciones
+
+    async def analizar_async(self, texto, idioma, usar_cache=True):
+        return await asyncio.to_thread(self.analizar, texto, idioma, usar_cache=usar_cache)
+
+    def precalentar(self, idiomas=None):
+        # Los casos estratégicos son los más consultados: se resuelven una vez
+        # para que siempre salgan de la caché.
+        if self.cache is None:
+            return
+        for idioma in idiomas or TRADUCCIONES:
+            for caso in TRADUCCIONES[idioma]["casos_ejemplo"]:
+                if self.cache.contiene(self.clave(caso, idioma)):
+                    continue
+                try:
+                    self.analizar(caso, idioma, usar_cache=False)
+                except Exception:
+                    log.exception("Precalentamiento fallido (%s): %s...", idioma, caso[:40])
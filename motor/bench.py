@@ -0,0 +1,320 @@
+"""Benchmarks del Motor Crítico con el sustituto local de Gemini.
+
+Uso:
+    python -m motor.bench -o bench.json
+    python -m motor.bench -o bench.json --comparar bench_anterior.json
+
+Mide, sin clave de API ni red:
+  - arranque_app: primera ejecución de app.py (AppTest de Streamlit) en un
+    proceso nuevo, con caché de extracción fría y caliente.
+  - carga_corpus_xN: carga del corpus con los PDFs de `datos/` replicados N
+    veces, en frío (extracción) y en caliente (caché en disco).
+  - sobrecoste_peticion: tiempo por análisis fuera de la llamada al modelo
+    (modelo falso con latencia 0, sin caché de respuestas).
+  - concurrencia_N: rendimiento con N sesiones simultáneas contra un modelo
+    con latencia y errores 429 inyectados.
+
+Los resultados se guardan en JSON con la misma estructura entre versiones;
+`--comparar` marca como regresión cualquier métrica de tiempo que empeore más
+del umbral indicado (y termina con código 1).
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+from motor import analisis, corpus, limitador
+from motor.metricas import Metricas
+from motor.traducciones import TRADUCCIONES
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Métricas en las que un valor mayor es mejor; el resto son tiempos o errores.
+MAYOR_ES_MEJOR = {"peticiones_por_segundo", "exito"}
+# Describen la carga de la prueba, no su resultado.
+DESCRIPTIVAS = {"n", "pdfs", "megabytes"}
+
+# Arranca app.py con AppTest sustituyendo genai.GenerativeModel por el modelo
+# falso. Se ejecuta en un proceso nuevo para medir un arranque real en frío.
+_SCRIPT_ARRANQUE = """
+import sys, time
+inicio = time.perf_counter()
+import google.generativeai as genai
+from motor.falso import ModeloGenerativoFalso
+genai.GenerativeModel = ModeloGenerativoFalso
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=600)
+at.secrets["GOOGLE_API_KEY"] = "bench"
+at.secrets["TOKENS_VALIDOS"] = "bench"
+at.session_state["password_correct"] = True
+at.run()
+primera = time.perf_counter() - inicio
+t = time.perf_counter()
+at.run()
+print(primera, time.perf_counter() - t, len(at.exception))
+"""
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    if not ordenados:
+        return 0.0
+    return ordenados[min(len(ordenados) - 1, round(p / 100 * (len(ordenados) - 1)))]
+
+
+def _resumen(tiempos):
+    return {
+        "n": len(tiempos),
+        "media_ms": round(1000 * statistics.fmean(tiempos), 3),
+        "p50_ms": round(1000 * percentil(tiempos, 50), 3),
+        "p95_ms": round(1000 * percentil(tiempos, 95), 3),
+    }
+
+
+def _preparar_datos(destino, origen, replicas):
+    os.makedirs(destino)
+    tamano = 0
+    for archivo in sorted(os.listdir(origen)):
+        if not archivo.endswith(".pdf"):
+            continue
+        for i in range(replicas):
+            copia = os.path.join(destino, f"r{i}_{archivo}")
+            shutil.copyfile(os.path.join(origen, archivo), copia)
+            tamano += os.path.getsize(copia)
+    return tamano
+
+
+# ==========================================
+# BENCHMARKS
+# ==========================================
+
+@contextlib.contextmanager
+def _en_carpeta_temporal():
+    # El motor escribe el almacén y los índices en `.cache/` del directorio de
+    # trabajo: los benchmarks usan uno propio para no tocar el de la app. Con
+    # el corpus mapeado, en Windows los archivos siguen abiertos al salir.
+    anterior = os.getcwd()
+    with tempfile.TemporaryDirectory(ignore_cleanup_errors=True) as tmp:
+        os.chdir(tmp)
+        try:
+            yield tmp
+        finally:
+            os.chdir(anterior)
+
+
+def bench_arranque_app(datos):
+    try:
+        import streamlit  # noqa: F401
+    except ImportError:
+        return {"omitido": "streamlit no instalado"}
+    with tempfile.TemporaryDirectory() as tmp:
+        # Directorio de trabajo propio: la caché de la app real no se toca.
+        os.symlink(os.path.abspath(datos), os.path.join(tmp, "datos"))
+        entorno = dict(os.environ, PYTHONPATH=RAIZ + os.pathsep + os.environ.get("PYTHONPATH", ""))
+        resultado = {}
+        for estado in ("frio", "caliente"):
+            salida = subprocess.run(
+                [sys.executable, "-c", _SCRIPT_ARRANQUE, os.path.join(RAIZ, "app.py")],
+                cwd=tmp, env=entorno, capture_output=True, text=True, check=True,
+            )
+            primera, rerun, excepciones = salida.stdout.split()[-3:]
+            resultado[f"primera_ejecucion_{estado}_s"] = round(float(primera), 3)
+            resultado[f"rerun_{estado}_ms"] = round(1000 * float(rerun), 3)
+            resultado["exito"] = int(excepciones == "0")
+    return resultado
+
+
+def bench_carga_corpus(datos, replicas):
+    with tempfile.TemporaryDirectory() as tmp:
+        carpeta = os.path.join(tmp, "datos")
+        tamano = _preparar_datos(carpeta, datos, replicas)
+        cache = os.path.join(tmp, "cache")
+        inicio = time.perf_counter()
+        biblioteca = corpus.cargar_biblioteca(carpeta, carpeta_cache=cache)
+        frio = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        corpus.cargar_biblioteca(carpeta, carpeta_cache=cache)
+        caliente = time.perf_counter() - inicio
+    return {
+        "pdfs": len(biblioteca.documentos),
+        "megabytes": round(tamano / 2 ** 20, 2),
+        "frio_s": round(frio, 3),
+        "caliente_ms": round(1000 * caliente, 3),
+    }
+
+
+def bench_sobrecoste_peticion(biblioteca, repeticiones):
+    with _en_carpeta_temporal():
+        return _sobrecoste_peticion(biblioteca, repeticiones)
+
+
+def _sobrecoste_peticion(biblioteca, repeticiones):
+    motor = analisis.MotorAnalisis(biblioteca, analisis.backend_falso(metricas=Metricas()), metricas=Metricas())
+    casos = [(c, idioma) for idioma, t in TRADUCCIONES.items() for c in t["casos_ejemplo"]]
+    resultado = {}
+    for modo, al_recibir_campo in (("bloque", None), ("streaming", lambda campo, valor: None)):
+        tiempos = []
+        for i in range(repeticiones):
+            texto, idioma = casos[i % len(casos)]
+            inicio = time.perf_counter()
+            motor.analizar(texto, idioma, al_recibir_campo=al_recibir_campo, usar_cache=False)
+            tiempos.append(time.perf_counter() - inicio)
+        resultado[modo] = _resumen(tiempos)
+    return resultado
+
+
+def bench_concurrencia(biblioteca, sesiones, peticiones_por_sesion, latencia, tasa_error):
+    with _en_carpeta_temporal():
+        return _concurrencia(biblioteca, sesiones, peticiones_por_sesion, latencia, tasa_error)
+
+
+def _concurrencia(biblioteca, sesiones, peticiones_por_sesion, latencia, tasa_error):
+    metricas = Metricas()
+    motor = analisis.MotorAnalisis(
+        biblioteca,
+        analisis.backend_falso(latencia=latencia, tasa_error=tasa_error, semilla=sesiones, metricas=metricas),
+        config=analisis.ConfigAnalisis(backoff_base=0.05, backoff_maximo=0.5),
+        limitador=limitador.LimitadorTasa(peticiones_por_minuto=100_000, tokens_por_minuto=10 ** 9),
+        metricas=metricas,
+    )
+    tiempos, errores = [], []
+    lock = threading.Lock()
+
+    def sesion(numero):
+        for i in range(peticiones_por_sesion):
+            inicio = time.perf_counter()
+            try:
+                motor.analizar(f"Sesión {numero}, argumento {i}: la IA nos quitará el trabajo.", "ES", usar_cache=False)
+            except Exception as e:
+                with lock:
+                    errores.append(type(e).__name__)
+                continue
+            with lock:
+                tiempos.append(time.perf_counter() - inicio)
+
+    hilos = [threading.Thread(target=sesion, args=(n,)) for n in range(sesiones)]
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    total = time.perf_counter() - inicio
+    return {
+        **_resumen(tiempos),
+        "peticiones_por_segundo": round(len(tiempos) / total, 2),
+        "errores": len(errores),
+        "reintentos": sum(v for k, v in metricas.instantanea()["contadores"].items() if k.startswith("reintentos")),
+    }
+
+
+# ==========================================
+# COMPARACIÓN ENTRE VERSIONES
+# ==========================================
+
+def _aplanar(datos, prefijo=""):
+    plano = {}
+    for clave, valor in datos.items():
+        nombre = f"{prefijo}{clave}"
+        if isinstance(valor, dict):
+            plano.update(_aplanar(valor, nombre + "."))
+        elif isinstance(valor, (int, float)):
+            plano[nombre] = valor
+    return plano
+
+
+def comparar(actual, anterior, umbral):
+    nuevos = _aplanar(actual["resultados"])
+    viejos = _aplanar(anterior["resultados"])
+    regresiones = []
+    print(f"{'métrica':60} {'antes':>12} {'ahora':>12} {'cambio':>9}")
+    for nombre in sorted(nuevos.keys() & viejos.keys()):
+        antes, ahora = viejos[nombre], nuevos[nombre]
+        metrica = nombre.rsplit(".", 1)[-1]
+        if metrica in DESCRIPTIVAS or antes == 0:
+            continue
+        cambio = (ahora - antes) / abs(antes)
+        peor = -cambio if metrica in MAYOR_ES_MEJOR else cambio
+        marca = "  REGRESIÓN" if peor > umbral else ""
+        if marca:
+            regresiones.append(nombre)
+        print(f"{nombre:60} {antes:>12} {ahora:>12} {cambio:>+8.1%}{marca}")
+    return regresiones
+
+
+def version_actual():
+    try:
+        return subprocess.run(
+            ["git", "describe", "--always", "--dirty"], cwd=RAIZ, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "desconocida"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks del Motor Crítico con modelo falso.")
+    parser.add_argument("-o", "--salida", help="Archivo JSON donde guardar los resultados.")
+    parser.add_argument("--comparar", help="Resultados anteriores contra los que comparar.")
+    parser.add_argument("--umbral", type=float, default=0.10, help="Empeoramiento relativo tolerado (0.10 = 10%%).")
+    parser.add_argument("--datos", default=os.path.join(RAIZ, "datos"), help="Carpeta con los PDFs de referencia.")
+    parser.add_argument("--replicas", default="1,2,4", help="Factores de replicación del corpus.")
+    parser.add_argument("--sesiones", default="1,4,16", help="Sesiones simultáneas a probar.")
+    parser.add_argument("--peticiones", type=int, default=10, help="Peticiones por sesión.")
+    parser.add_argument("--latencia", type=float, default=0.2, help="Latencia simulada del modelo (s).")
+    parser.add_argument("--tasa-error", type=float, default=0.05, help="Fracción de 429 inyectados.")
+    parser.add_argument("--sin-app", action="store_true", help="No medir el arranque de app.py.")
+    args = parser.parse_args(argv)
+
+    resultados = {}
+    if not args.sin_app:
+        print("arranque_app...", file=sys.stderr)
+        resultados["arranque_app"] = bench_arranque_app(args.datos)
+    for replicas in map(int, args.replicas.split(",")):
+        print(f"carga_corpus_x{replicas}...", file=sys.stderr)
+        resultados[f"carga_corpus_x{replicas}"] = bench_carga_corpus(args.datos, replicas)
+
+    with tempfile.TemporaryDirectory() as cache:
+        biblioteca = corpus.cargar_biblioteca(args.datos, carpeta_cache=cache)
+    print("sobrecoste_peticion...", file=sys.stderr)
+    resultados["sobrecoste_peticion"] = bench_sobrecoste_peticion(biblioteca, max(20, args.peticiones))
+    for sesiones in map(int, args.sesiones.split(",")):
+        print(f"concurrencia_{sesiones}...", file=sys.stderr)
+        resultados[f"concurrencia_{sesiones}"] = bench_concurrencia(
+            biblioteca, sesiones, args.peticiones, args.latencia, args.tasa_error
+        )
+
+    informe = {
+        "version": version_actual(),
+        "fecha": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+        "resultados": resultados,
+    }
+    texto = json.dumps(informe, ensure_ascii=False, indent=2)
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            f.write(texto + "\n")
+    else:
+        print(texto)
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            regresiones = comparar(informe, json.load(f), args.umbral)
+        if regresiones:
+            print(f"\n{len(regresiones)} regresión(es) por encima del {args.umbral:.0%}.", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""Caché persistente de respuestas del modelo con expulsión LRU + TTL.
+
+Las respuestas ya parseadas se guardan en SQLite (`.cache/respuestas.sqlite3`),
+indexadas por una clave que combina el argumento normalizado, el idioma, el
+modelo y la huella del corpus/prompt. Así un argumento repetido se sirve en
+milisegundos sin gastar cuota de la API, y cualquier cambio en los PDFs o en
+el prompt invalida automáticamente las entradas antiguas.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+
+RUTA_CACHE = os.path.join(".cache", "respuestas.sqlite3")
+
+
+def normalizar_entrada(texto):
+    texto = unicodedata.normalize("NFC", texto)
+    return " ".join(texto.split()).casefold()
+
+
+def clave_respuesta(texto, idioma, modelo, huella):
+    partes = [normalizar_entrada(texto), idioma, modelo, huella]
+    return hashlib.sha256(json.dumps(partes, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+class CacheRespuestas:
+    def __init__(self, ruta=RUTA_CACHE, max_entradas=2000, ttl_segundos=30 * 24 * 3600):
+        carpeta = os.path.dirname(ruta)
+        if carpeta:
+            os.makedirs(carpeta, exist_ok=True)
+        self.max_entradas = max_entradas
+        self.ttl_segundos = ttl_segundos
+        self.aciertos = 0
+        self.fallos = 0
+        self._lock = threading.Lock()
+        # Una sola conexión compartida por todas las sesiones, protegida por el lock.
+        self._conexion = sqlite3.connect(ruta, check_same_thread=False, isolation_level=None)
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.execute(
+            "CREATE TABLE IF NOT EXISTS respuestas ("
+            " clave TEXT PRIMARY KEY, valor TEXT NOT NULL,"
+            " creado REAL NOT NULL, accedido REAL NOT NULL)"
+        )
+        self._conexion.execute("CREATE INDEX IF NOT EXISTS idx_accedido ON respuestas (accedido)")
+
+    def obtener(self, clave):
+        ahora = time.time()
+        with self._lock:
+            fila = self._conexion.execute(
+                "SELECT valor, creado FROM respuestas WHERE clave = ?", (clave,)
+            ).fetchone()
+            if fila is None or ahora - fila[1] > self.ttl_segundos:
+                if fila is not None:
+                    self._conexion.execute("DELETE FROM respuestas WHERE clave = ?", (clave,))
+                self.fallos += 1
+                return None
+            self._conexion.execute("UPDATE respuestas SET accedido = ? WHERE clave = ?", (ahora, clave))
+            self.aciertos += 1
+        return json.loads(fila[0])
+
+    def contiene(self, clave):
+        with self._lock:
+            fila = self._conexion.execute(
+                "SELECT creado FROM respuestas WHERE clave = ?", (clave,)
+            ).fetchone()
+        return fila is not None and time.time() - fila[0] <= self.ttl_segundos
+
+    def guardar(self, clave, valor):
+        ahora = time.time()
+        with self._lock:
+            self._conexion.execute(
+                "INSERT OR REPLACE INTO respuestas (clave, valor, creado, accedido) VALUES (?, ?, ?, ?)",
+                (clave, json.dumps(valor, ensure_ascii=False), ahora, ahora),
+            )
+            self._expulsar(ahora)
+
+    def _expulsar(self, ahora):
+        self._conexion.execute("DELETE FROM respuestas WHERE creado < ?", (ahora - self.ttl_segundos,))
+        (total,) = self._conexion.execute("SELECT COUNT(*) FROM respuestas").fetchone()
+        if total > self.max_entradas:
+            self._conexion.execute(
+                "DELETE FROM respuestas WHERE clave IN ("
+                " SELECT clave FROM respuestas ORDER BY accedido LIMIT ?)",
+                (total - self.max_entradas,),
+            )
+
+    def __len__(self):
+        with self._lock:
+            return self._conexion.execute("SELECT COUNT(*) FROM respuestas").fetchone()[0]
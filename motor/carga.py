@@ -0,0 +1,94 @@
+"""Prueba de carga contra el servicio de análisis (`motor.servicio`).
+
+Uso:
+    python -m motor.servicio --backend falso --latencia-falsa 1.5 &
+    python -m motor.carga --url http://localhost:8600 --token abc --concurrencia 16 --peticiones 200
+
+Lanza `--peticiones` análisis repartidos entre `--concurrencia` clientes
+simultáneos y resume rendimiento, latencias (p50/p95/p99) y errores. Con
+`--distintos N` sólo hay N argumentos diferentes, lo que permite medir el
+efecto de la coalescencia y la caché.
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import threading
+import time
+
+from motor.bench import percentil
+from motor.cliente import ClienteServicio
+from motor.secretos import leer_secreto
+
+
+def ejecutar_carga(cliente, peticiones=100, concurrencia=8, distintos=None, idioma="ES"):
+    siguiente = iter(range(peticiones))
+    lock = threading.Lock()
+    latencias, primeros_campos, errores = [], [], []
+
+    def trabajador():
+        while True:
+            with lock:
+                i = next(siguiente, None)
+            if i is None:
+                return
+            n = i % distintos if distintos else i
+            texto = f"Argumento de carga {n}: la inteligencia artificial nos quitará el trabajo."
+            inicio = time.perf_counter()
+            primero = []
+            try:
+                cliente.analizar(texto, idioma, al_recibir_campo=lambda c, v: primero or primero.append(time.perf_counter()))
+                with lock:
+                    latencias.append(time.perf_counter() - inicio)
+                    if primero:
+                        primeros_campos.append(primero[0] - inicio)
+            except Exception as e:
+                with lock:
+                    errores.append(f"{type(e).__name__}: {e}")
+
+    inicio = time.perf_counter()
+    hilos = [threading.Thread(target=trabajador) for _ in range(max(1, concurrencia))]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    duracion = time.perf_counter() - inicio
+
+    def ms(valores, p):
+        return round(1000 * percentil(valores, p), 1) if valores else None
+
+    return {
+        "peticiones": peticiones,
+        "concurrencia": concurrencia,
+        "segundos": round(duracion, 3),
+        "peticiones_por_segundo": round(len(latencias) / duracion, 2) if duracion else None,
+        "latencia_media_ms": round(1000 * statistics.fmean(latencias), 1) if latencias else None,
+        "latencia_p50_ms": ms(latencias, 50),
+        "latencia_p95_ms": ms(latencias, 95),
+        "latencia_p99_ms": ms(latencias, 99),
+        "primer_campo_p50_ms": ms(primeros_campos, 50),
+        "errores": len(errores),
+        "ejemplos_error": sorted(set(errores))[:5],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prueba de carga del servicio de análisis.")
+    parser.add_argument("--url", default="http://localhost:8600")
+    parser.add_argument("--token", default=None, help="Token de acceso (por defecto, el primero de TOKENS_VALIDOS).")
+    parser.add_argument("--peticiones", type=int, default=100)
+    parser.add_argument("--concurrencia", type=int, default=8)
+    parser.add_argument("--distintos", type=int, default=None, help="Número de argumentos distintos (por defecto, todos).")
+    parser.add_argument("--idioma", default="ES")
+    args = parser.parse_args(argv)
+
+    token = args.token or (leer_secreto("TOKENS_VALIDOS") or "").split(",")[0].strip()
+    resultado = ejecutar_carga(ClienteServicio(args.url, token), args.peticiones, args.concurrencia,
+                               args.distintos, args.idioma.upper())
+    print(json.dumps(resultado, ensure_ascii=False, indent=2))
+    return 1 if resultado["errores"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
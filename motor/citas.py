@@ -0,0 +1,160 @@
+"""Verificación local de las citas que devuelve el modelo.
+
+El modelo devuelve `Cita` y `Autor_Cita` (el PDF de origen) sin garantía de
+que la cita exista ni de que venga de ese archivo. `VerificadorCitas`
+indexa los trigramas de palabras de cada página del corpus y, para una cita,
+vota la página que más trigramas comparte con ella: si la proporción supera
+el umbral la cita se da por verificada y se corrige el archivo si hacía
+falta; en cualquier caso se informa de la página. Tolera comillas, puntos
+suspensivos, tildes y pequeñas diferencias de redacción, y responde en
+milisegundos. Las citas traducidas (modo EN sobre un corpus en español) no
+se pueden confirmar: si no aparecen tal cual, se marcan como no comprobables
+(`comprobable=False`) en lugar de no verificadas.
+
+El índice son dos arrays paralelos, ordenados por la clave de 64 bits de cada
+trigrama y con el número de página. Con `carpeta` se escribe una vez por
+versión del corpus (`citas-<huella>.bin`) y cada proceso lo abre con `mmap`,
+como el almacén del corpus: no se reconstruye ni se copia por worker.
+"""
+
+import hashlib
+import mmap
+import os
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from dataclasses import dataclass
+
+from motor import almacen
+from motor.corpus import escribir_json_atomico, leer_json
+from motor.recuperacion import CARPETA_INDICE, _sin_tildes
+
+TAM_NGRAMA = 3
+VERSION_CITAS = 1
+_RE_PALABRA = re.compile(r"\w+")
+
+
+def _palabras(texto):
+    return _RE_PALABRA.findall(_sin_tildes(texto).lower())
+
+
+def _ngramas(palabras):
+    return [tuple(palabras[i:i + TAM_NGRAMA]) for i in range(len(palabras) - TAM_NGRAMA + 1)]
+
+
+def _clave(ngrama):
+    # Estable entre procesos, a diferencia de `hash()`.
+    return int.from_bytes(hashlib.blake2b(" ".join(ngrama).encode("utf-8"), digest_size=8).digest(), "little")
+
+
+@dataclass
+class ResultadoCita:
+    verificada: bool
+    archivo: str | None
+    pagina: int | None
+    similitud: float
+    comprobable: bool = True
+
+    def como_dict(self):
+        return {"verificada": self.verificada, "archivo": self.archivo, "pagina": self.pagina,
+                "similitud": round(self.similitud, 3), "comprobable": self.comprobable}
+
+
+class IndiceTrigramas:
+    def __init__(self, claves, paginas, ubicaciones, huella=""):
+        # claves[k] (ordenadas) aparece en la página ubicaciones[paginas[k]].
+        self.claves = claves
+        self.paginas = paginas
+        self.ubicaciones = ubicaciones
+        self.huella = huella
+
+    @classmethod
+    def construir(cls, biblioteca):
+        pares, ubicaciones = set(), []
+        for doc in biblioteca.documentos:
+            for num_pagina, texto in enumerate(doc.paginas, start=1):
+                id_pagina = len(ubicaciones)
+                ubicaciones.append((doc.archivo, num_pagina))
+                pares.update((_clave(ngrama), id_pagina) for ngrama in _ngramas(_palabras(texto)))
+        pares = sorted(pares)
+        return cls(array("Q", (c for c, _ in pares)), array("I", (p for _, p in pares)), ubicaciones,
+                   huella=biblioteca.huella)
+
+    def buscar(self, ngrama):
+        clave = _clave(ngrama)
+        inicio = bisect_left(self.claves, clave)
+        fin = bisect_right(self.claves, clave, inicio)
+        return [self.ubicaciones[self.paginas[k]] for k in range(inicio, fin)]
+
+    def guardar(self, base):
+        temporal = f"{base}.bin.{os.getpid()}.tmp"
+        with open(temporal, "wb") as f:
+            self.claves.tofile(f)
+            self.paginas.tofile(f)
+        os.replace(temporal, f"{base}.bin")
+        escribir_json_atomico(f"{base}.json", {
+            "version": VERSION_CITAS,
+            "huella": self.huella,
+            "entradas": len(self.claves),
+            "ubicaciones": self.ubicaciones,
+        })
+
+    @classmethod
+    def abrir(cls, base):
+        tabla = leer_json(f"{base}.json")
+        if not tabla or tabla.get("version") != VERSION_CITAS:
+            return None
+        n = tabla["entradas"]
+        tam_claves, tam_paginas = n * array("Q").itemsize, n * array("I").itemsize
+        try:
+            with open(f"{base}.bin", "rb") as f:
+                if os.fstat(f.fileno()).st_size != tam_claves + tam_paginas or n == 0:
+                    return None
+                mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        vista = memoryview(mapa)
+        return cls(vista[:tam_claves].cast("Q"), vista[tam_claves:].cast("I"),
+                   [tuple(u) for u in tabla["ubicaciones"]], huella=tabla["huella"])
+
+
+def cargar_o_construir(biblioteca, carpeta=CARPETA_INDICE):
+    os.makedirs(carpeta, exist_ok=True)
+    base = os.path.join(carpeta, f"citas-{biblioteca.huella[:16]}")
+    indice = IndiceTrigramas.abrir(base)
+    if indice is None or indice.huella != biblioteca.huella:
+        construido = IndiceTrigramas.construir(biblioteca)
+        if not construido.claves:
+            return construido
+        construido.guardar(base)
+        almacen.limpiar(carpeta, conservar=base, prefijo="citas-", extensiones=(".bin", ".json"))
+        indice = IndiceTrigramas.abrir(base) or construido
+    return indice
+
+
+class VerificadorCitas:
+    def __init__(self, biblioteca, umbral=0.6, carpeta=None):
+        # Con `carpeta`, el índice se guarda en disco y se mapea en memoria.
+        self.umbral = umbral
+        if carpeta is None:
+            self.indice = IndiceTrigramas.construir(biblioteca)
+        else:
+            self.indice = cargar_o_construir(biblioteca, carpeta)
+
+    def verificar(self, cita, archivo_declarado=None):
+        ngramas = set(_ngramas(_palabras(cita or "")))
+        if not ngramas:
+            return ResultadoCita(False, archivo_declarado, None, 0.0)
+        votos = Counter()
+        for ngrama in ngramas:
+            for pagina in self.indice.buscar(ngrama):
+                votos[pagina] += 1
+        if not votos:
+            return ResultadoCita(False, archivo_declarado, None, 0.0)
+        # En caso de empate gana el archivo declarado por el modelo.
+        (archivo, pagina), n = max(votos.items(), key=lambda par: (par[1], par[0][0] == archivo_declarado))
+        similitud = n / len(ngramas)
+        if similitud < self.umbral:
+            return ResultadoCita(False, archivo_declarado, None, similitud)
+        return ResultadoCita(True, archivo, pagina, similitud)
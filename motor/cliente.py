@@ -0,0 +1,124 @@
+"""Cliente del servicio de análisis (`motor.servicio`).
+
+`ClienteServicio` expone la misma interfaz que usa la app de
+`MotorAnalisis` (`biblioteca`, `informe_tokens`, `consultar_cache`,
+`analizar` con sus callbacks) más `metricas`, de modo que la interfaz de Streamlit puede
+trabajar contra un servicio remoto sin cambiar el código de renderizado.
+Sólo usa la biblioteca estándar.
+"""
+
+import http.client
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+
+
+class ErrorServicio(Exception):
+    def __init__(self, mensaje, code=None):
+        super().__init__(mensaje)
+        # Mismo atributo que las excepciones del SDK: lo entiende `limitador.codigo_error`.
+        self.code = code
+
+
+@dataclass
+class ResumenBiblioteca:
+    archivos: list = field(default_factory=list)
+    fallidos: list = field(default_factory=list)
+    huella: str = ""
+
+
+class ClienteServicio:
+    def __init__(self, url, token, timeout=300.0, vigencia_salud=10.0):
+        partes = urlsplit(url)
+        self._https = partes.scheme == "https"
+        self._host = partes.hostname
+        self._puerto = partes.port
+        self._prefijo = partes.path.rstrip("/")
+        self.token = token
+        self.timeout = timeout
+        # El estado del corpus se consulta como mucho cada `vigencia_salud` s.
+        self.vigencia_salud = vigencia_salud
+        self._salud = None
+        self._salud_ts = 0.0
+        self._lock = threading.Lock()
+
+    # --- HTTP ---
+
+    def _conexion(self):
+        clase = http.client.HTTPSConnection if self._https else http.client.HTTPConnection
+        return clase(self._host, self._puerto, timeout=self.timeout)
+
+    def _peticion(self, metodo, ruta, cuerpo=None):
+        conexion = self._conexion()
+        cabeceras = {"Authorization": f"Bearer {self.token}"}
+        datos = None
+        if cuerpo is not None:
+            datos = json.dumps(cuerpo, ensure_ascii=False).encode("utf-8")
+            cabeceras["Content-Type"] = "application/json"
+        conexion.request(metodo, self._prefijo + ruta, body=datos, headers=cabeceras)
+        respuesta = conexion.getresponse()
+        if respuesta.status != 200:
+            try:
+                mensaje = json.loads(respuesta.read()).get("error")
+            except ValueError:
+                mensaje = respuesta.reason
+            conexion.close()
+            raise ErrorServicio(f"{respuesta.status} {mensaje}", code=respuesta.status)
+        return conexion, respuesta
+
+    def _json(self, metodo, ruta, cuerpo=None):
+        conexion, respuesta = self._peticion(metodo, ruta, cuerpo)
+        try:
+            return json.loads(respuesta.read())
+        finally:
+            conexion.close()
+
+    # --- INTERFAZ DE MotorAnalisis ---
+
+    def salud(self):
+        with self._lock:
+            if self._salud is None or time.monotonic() - self._salud_ts > self.vigencia_salud:
+                self._salud = self._json("GET", "/salud")
+                self._salud_ts = time.monotonic()
+            return self._salud
+
+    @property
+    def biblioteca(self):
+        salud = self.salud()
+        return ResumenBiblioteca(salud["fuentes"], [tuple(f) for f in salud["fallidos"]], salud["huella"])
+
+    @property
+    def informe_tokens(self):
+        return self.salud()["informe_tokens"]
+
+    def metricas(self):
+        return self._json("GET", "/metricas?formato=json")
+
+    def consultar_cache(self, texto, idioma):
+        return self._json("POST", "/analizar", {"texto": texto, "idioma": idioma, "solo_cache": True})["resultado"]
+
+    def analizar(self, texto, idioma, al_recibir_campo=None, usar_cache=True,
+                 al_esperar=None, al_reintentar=None):
+        cuerpo = {"texto": texto, "idioma": idioma, "usar_cache": usar_cache, "stream": True}
+        conexion, respuesta = self._peticion("POST", "/analizar", cuerpo)
+        try:
+            for linea in respuesta:
+                if not linea.strip():
+                    continue
+                evento = json.loads(linea)
+                tipo = evento["evento"]
+                if tipo == "campo" and al_recibir_campo is not None:
+                    al_recibir_campo(evento["campo"], evento["valor"])
+                elif tipo == "cola" and al_esperar is not None:
+                    al_esperar(evento["posicion"], evento["segundos"])
+                elif tipo == "reintento" and al_reintentar is not None:
+                    al_reintentar(evento["intento"], None, None)
+                elif tipo == "resultado":
+                    return evento["resultado"]
+                elif tipo == "error":
+                    raise ErrorServicio(evento["error"], code=evento.get("codigo"))
+        finally:
+            conexion.close()
+        raise ErrorServicio("El servicio cerró la conexión sin resultado")
@@ -0,0 +1,93 @@
+"""Coalescencia de peticiones idénticas concurrentes ("singleflight").
+
+Cuando varias sesiones piden a la vez el mismo análisis (mismo texto
+normalizado, idioma, modelo y versión del corpus: la clave de la caché de
+respuestas), sólo la primera llama al modelo. Las demás esperan a esa misma
+llamada y reciben su resultado, incluidos los campos que se vayan entregando
+en streaming, que cada una consume desde su propio hilo.
+"""
+
+import copy
+import threading
+
+
+class _Vuelo:
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.campos = []
+        self.terminado = False
+        self.resultado = None
+        self.error = None
+
+
+class VueloUnico:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._vuelos = {}
+
+    @property
+    def en_curso(self):
+        return len(self._vuelos)
+
+    def ejecutar(self, clave, funcion, al_recibir_campo=None):
+        # `funcion(emitir)` hace el trabajo; `emitir(campo, valor)` (None si
+        # quien la lanza no usa streaming) reparte cada campo entre todos los
+        # que esperan. Devuelve (resultado, compartido).
+        with self._lock:
+            vuelo = self._vuelos.get(clave)
+            lider = vuelo is None
+            if lider:
+                vuelo = self._vuelos[clave] = _Vuelo()
+        if not lider:
+            return self._esperar(vuelo, al_recibir_campo), True
+
+        # El callback del líder es de su sesión, no de la llamada compartida:
+        # si falla (p. ej. Streamlit interrumpe el script por un rerun), deja de
+        # recibir campos, pero el vuelo sigue para los demás y el error se le
+        # devuelve sólo a él al terminar.
+        error_callback = None
+
+        def emitir(campo, valor):
+            nonlocal error_callback
+            with vuelo.cond:
+                vuelo.campos.append((campo, valor))
+                vuelo.cond.notify_all()
+            if error_callback is None:
+                try:
+                    al_recibir_campo(campo, valor)
+                except BaseException as e:
+                    error_callback = e
+
+        try:
+            vuelo.resultado = funcion(emitir if al_recibir_campo is not None else None)
+        except BaseException as e:
+            vuelo.error = e
+            raise
+        finally:
+            # Se retira antes de despertar a los seguidores: una petición que
+            # llegue después ya no se une a un vuelo terminado.
+            with self._lock:
+                del self._vuelos[clave]
+            with vuelo.cond:
+                vuelo.terminado = True
+                vuelo.cond.notify_all()
+        if error_callback is not None:
+            raise error_callback
+        return vuelo.resultado, False
+
+    def _esperar(self, vuelo, al_recibir_campo):
+        entregados = 0
+        while True:
+            with vuelo.cond:
+                vuelo.cond.wait_for(lambda: vuelo.terminado or len(vuelo.campos) > entregados)
+                nuevos = vuelo.campos[entregados:]
+                terminado = vuelo.terminado
+            entregados += len(nuevos)
+            if al_recibir_campo is not None:
+                for campo, valor in nuevos:
+                    al_recibir_campo(campo, copy.deepcopy(valor))
+            if terminado:
+                break
+        if vuelo.error is not None:
+            raise vuelo.error
+        return copy.deepcopy(vuelo.resultado)
@@ -0,0 +1,206 @@
+"""Extracción del texto de los PDFs de `datos/` con caché persistente en disco.
+
+Cada PDF se identifica por el hash SHA-256 de su contenido. El resultado de
+la extracción se guarda en `.cache/extraccion/<hash>.json`, de modo que en un
+arranque en frío sólo se vuelven a procesar los documentos nuevos o
+modificados. Un índice auxiliar (`indice.json`) recuerda el `mtime` y el
+tamaño de cada archivo para no tener que recalcular el hash de los PDFs que
+no han cambiado.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import cached_property
+
+from motor.metricas import METRICAS
+
+log = logging.getLogger(__name__)
+
+CARPETA_CACHE = os.path.join(".cache", "extraccion")
+VERSION_CACHE = 1
+
+
+@dataclass
+class Documento:
+    archivo: str
+    hash: str
+    paginas: list
+
+
+@dataclass
+class Biblioteca:
+    documentos: list = field(default_factory=list)
+    # Lista de (archivo, mensaje de error) de los PDFs que no se pudieron leer.
+    fallidos: list = field(default_factory=list)
+
+    @property
+    def archivos(self):
+        return [d.archivo for d in self.documentos]
+
+    @cached_property
+    def huella(self):
+        # Identifica el contenido del corpus: cambia si cambia cualquier PDF.
+        h = hashlib.sha256()
+        for doc in self.documentos:
+            h.update(f"{doc.archivo}\0{doc.hash}\n".encode("utf-8"))
+        return h.hexdigest()
+
+    @cached_property
+    def texto(self):
+        partes = []
+        for doc in self.documentos:
+            for pagina in doc.paginas:
+                partes.append(pagina)
+                partes.append("\n")
+            partes.append(f"\n--- FIN DOCUMENTO: {doc.archivo} ---\n")
+        return "".join(partes)
+
+
+def estimar_tokens(texto):
+    # Aproximación barata (~4 caracteres por token) suficiente para presupuestos.
+    return (len(texto) + 3) // 4
+
+
+# ==========================================
+# CACHÉ EN DISCO
+# ==========================================
+
+def hash_archivo(ruta, tam_bloque=1 << 20):
+    h = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(tam_bloque), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def escribir_json_atomico(ruta, datos):
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump(datos, f, ensure_ascii=False)
+    os.replace(temporal, ruta)
+
+
+def leer_json(ruta):
+    try:
+        with open(ruta, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _leer_extraccion(carpeta_cache, hash_pdf):
+    datos = leer_json(os.path.join(carpeta_cache, f"{hash_pdf}.json"))
+    if not datos or datos.get("version") != VERSION_CACHE:
+        return None
+    return datos.get("paginas")
+
+
+def _guardar_extraccion(carpeta_cache, hash_pdf, archivo, paginas):
+    escribir_json_atomico(
+        os.path.join(carpeta_cache, f"{hash_pdf}.json"),
+        {"version": VERSION_CACHE, "archivo": archivo, "paginas": paginas},
+    )
+
+
+# ==========================================
+# EXTRACCIÓN
+# ==========================================
+
+def extraer_paginas(ruta_pdf):
+    import pypdf
+
+    reader = pypdf.PdfReader(ruta_pdf)
+    return [page.extract_text() or "" for page in reader.pages]
+
+
+def _extraer_seguro(ruta_pdf):
+    # Se ejecuta en un proceso hijo: nunca debe propagar la excepción, para
+    # que un PDF corrupto no tumbe el resto del lote.
+    try:
+        return extraer_paginas(ruta_pdf), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+
+def _extraer_en_paralelo(rutas, max_procesos):
+    if len(rutas) <= 1 or max_procesos == 1:
+        return [_extraer_seguro(r) for r in rutas]
+    procesos = min(len(rutas), max_procesos or os.cpu_count() or 1)
+    try:
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            return list(pool.map(_extraer_seguro, rutas))
+    except (OSError, RuntimeError) as e:
+        # Entornos sin soporte de multiprocessing (p. ej. sandboxes): en serie.
+        log.warning("Extracción en paralelo no disponible (%s); se usa modo serie.", e)
+        return [_extraer_seguro(r) for r in rutas]
+
+
+def cargar_biblioteca(carpeta="datos", carpeta_cache=CARPETA_CACHE, max_procesos=None, anterior=None):
+    # Con `anterior` (una Biblioteca ya cargada) los documentos cuyo hash no ha
+    # cambiado se reutilizan en memoria sin releer la caché (si conserva sus
+    # páginas: la del motor con el corpus normalizado sólo guarda los hashes).
+    if not os.path.exists(carpeta):
+        os.makedirs(carpeta)
+        return Biblioteca()
+    inicio = time.perf_counter()
+    os.makedirs(carpeta_cache, exist_ok=True)
+    ruta_indice = os.path.join(carpeta_cache, "indice.json")
+    indice_previo = leer_json(ruta_indice) or {}
+    indice = {}
+
+    archivos = sorted(f for f in os.listdir(carpeta) if f.endswith(".pdf"))
+    documentos = {}
+    fallidos = []
+    pendientes = []
+    previos = {d.archivo: d for d in anterior.documentos} if anterior else {}
+
+    for archivo in archivos:
+        ruta_pdf = os.path.join(carpeta, archivo)
+        try:
+            info = os.stat(ruta_pdf)
+            previo = indice_previo.get(archivo)
+            if previo and previo["mtime_ns"] == info.st_mtime_ns and previo["tamano"] == info.st_size:
+                hash_pdf = previo["hash"]
+            else:
+                hash_pdf = hash_archivo(ruta_pdf)
+        except OSError as e:
+            fallidos.append((archivo, f"{type(e).__name__}: {e}"))
+            continue
+        indice[archivo] = {"mtime_ns": info.st_mtime_ns, "tamano": info.st_size, "hash": hash_pdf}
+
+        previo_en_memoria = previos.get(archivo)
+        if previo_en_memoria is not None and previo_en_memoria.hash == hash_pdf and previo_en_memoria.paginas:
+            documentos[archivo] = previo_en_memoria
+            continue
+        paginas = _leer_extraccion(carpeta_cache, hash_pdf)
+        if paginas is not None:
+            documentos[archivo] = Documento(archivo, hash_pdf, paginas)
+        else:
+            pendientes.append((archivo, ruta_pdf, hash_pdf))
+
+    desde_cache = len(documentos)
+    resultados = _extraer_en_paralelo([ruta for _, ruta, _ in pendientes], max_procesos)
+    for (archivo, _, hash_pdf), (paginas, error) in zip(pendientes, resultados):
+        if error is not None:
+            log.warning("No se pudo leer %s: %s", archivo, error)
+            fallidos.append((archivo, error))
+            indice.pop(archivo, None)
+            continue
+        _guardar_extraccion(carpeta_cache, hash_pdf, archivo, paginas)
+        documentos[archivo] = Documento(archivo, hash_pdf, paginas)
+
+    if indice != indice_previo:
+        escribir_json_atomico(ruta_indice, indice)
+
+    log.info("Corpus: %d PDFs desde caché, %d extraídos, %d fallidos.",
+             desde_cache, len(documentos) - desde_cache, len(fallidos))
+    METRICAS.observar("carga_pdfs", time.perf_counter() - inicio)
+    METRICAS.incrementar("pdfs", desde_cache, origen="cache")
+    METRICAS.incrementar("pdfs", len(documentos) - desde_cache, origen="extraido")
+    METRICAS.incrementar("pdfs", len(fallidos), origen="fallido")
+    return Biblioteca([documentos[a] for a in archivos if a in documentos], fallidos)
@@ -0,0 +1,204 @@
+"""Enrutado por complejidad: contexto, tope de salida y modelo según el argumento.
+
+`estimar_complejidad` puntúa el argumento con rasgos baratos (tokens, frases
+y conectores argumentativos). Una política es una tabla de niveles ordenados
+por puntuación máxima; cada nivel fija el modelo, `max_output_tokens` y el
+contexto documental:
+
+- "completo": la biblioteca entera, si cabe en el umbral del motor (si no,
+  recuperación con el presupuesto del nivel).
+- "recuperacion": sólo los `top_k_fragmentos` más relevantes, hasta
+  `presupuesto_tokens_contexto` tokens.
+
+Las políticas predefinidas están en `POLITICAS` ("fija" reproduce el
+comportamiento sin enrutado); también se pueden cargar desde un JSON con la
+misma estructura (`{"nombre": ..., "niveles": [...], "modelos": {...}}`).
+
+Cada decisión se cuenta en las métricas (`enrutado{nivel}`), se anota en el
+log y, si se indica un registro, se añade a un JSONL con la latencia y los
+tokens de la llamada. Ese registro es la entrada de `python -m motor.reproducir`,
+que compara políticas sobre él con el sustituto local del modelo.
+"""
+
+import json
+import logging
+import re
+import threading
+from dataclasses import asdict, dataclass, field
+
+from motor import corpus
+from motor.metricas import METRICAS
+
+log = logging.getLogger(__name__)
+
+CONTEXTOS = ("completo", "recuperacion")
+
+_RE_FRASE = re.compile(r"[.!?;]+")
+_RE_CONECTOR = re.compile(
+    r"\b(porque|aunque|sin embargo|por (?:tanto|lo tanto|eso)|además|entonces|pero|mientras|si|ya que|"
+    r"because|although|however|therefore|moreover|then|but|whereas|while|if|since)\b",
+    re.IGNORECASE,
+)
+# Cada conector o frase adicional pesa como varios tokens: un argumento con
+# premisas encadenadas pide más contexto que uno igual de largo sin ellas.
+PESO_CONECTOR = 8
+PESO_FRASE = 4
+
+
+@dataclass(frozen=True)
+class Modelo:
+    # Tarifas en USD por millón de tokens y latencia aproximada: valores de
+    # referencia para comparar políticas, ajustables en el JSON de la política.
+    coste_entrada: float
+    coste_salida: float
+    latencia_base: float
+    tokens_por_segundo_entrada: float
+    tokens_por_segundo_salida: float
+
+    def coste(self, tokens_entrada, tokens_salida):
+        return (tokens_entrada * self.coste_entrada + tokens_salida * self.coste_salida) / 1_000_000
+
+    def latencia(self, tokens_entrada, tokens_salida):
+        return (self.latencia_base + tokens_entrada / self.tokens_por_segundo_entrada
+                + tokens_salida / self.tokens_por_segundo_salida)
+
+
+MODELOS = {
+    "models/gemini-2.0-flash-lite": Modelo(0.075, 0.30, 0.30, 40000, 250),
+    "models/gemini-2.0-flash": Modelo(0.10, 0.40, 0.40, 30000, 200),
+    "models/gemini-2.5-pro": Modelo(1.25, 10.0, 1.50, 10000, 90),
+}
+
+
+@dataclass(frozen=True)
+class Nivel:
+    nombre: str
+    # Puntuación máxima del nivel; None en el último (sin límite).
+    hasta: float | None
+    modelo: str
+    max_tokens_salida: int
+    contexto: str = "completo"
+    top_k_fragmentos: int = 8
+    presupuesto_tokens_contexto: int = 4000
+
+
+@dataclass(frozen=True)
+class Politica:
+    nombre: str
+    niveles: tuple
+    modelos: dict = field(default_factory=lambda: dict(MODELOS))
+
+    @property
+    def usa_recuperacion(self):
+        return any(n.contexto == "recuperacion" for n in self.niveles)
+
+    def nivel(self, puntuacion):
+        for nivel in self.niveles:
+            if nivel.hasta is None or puntuacion <= nivel.hasta:
+                return nivel
+        return self.niveles[-1]
+
+
+POLITICAS = {
+    # Un único nivel: lo mismo que el motor sin enrutado.
+    "fija": Politica("fija", (
+        Nivel("unico", None, "models/gemini-2.0-flash", 8192, "completo", 8, 4000),
+    )),
+    "adaptativa": Politica("adaptativa", (
+        Nivel("breve", 30, "models/gemini-2.0-flash-lite", 1024, "recuperacion", 4, 1500),
+        Nivel("medio", 150, "models/gemini-2.0-flash", 2048, "recuperacion", 8, 4000),
+        Nivel("extenso", None, "models/gemini-2.0-flash", 4096, "completo", 12, 8000),
+    )),
+}
+
+
+def cargar_politica(nombre_o_ruta):
+    # Nombre de `POLITICAS` o ruta a un JSON con la misma estructura.
+    if nombre_o_ruta in POLITICAS:
+        return POLITICAS[nombre_o_ruta]
+    with open(nombre_o_ruta, encoding="utf-8") as f:
+        datos = json.load(f)
+    niveles = tuple(Nivel(**n) for n in datos["niveles"])
+    if not niveles:
+        raise ValueError(f"La política {nombre_o_ruta!r} no tiene niveles")
+    for nivel in niveles:
+        if nivel.contexto not in CONTEXTOS:
+            raise ValueError(f"Contexto no soportado en el nivel {nivel.nombre!r}: {nivel.contexto!r}")
+    modelos = dict(MODELOS)
+    modelos.update({nombre: Modelo(**m) for nombre, m in datos.get("modelos", {}).items()})
+    return Politica(datos.get("nombre", nombre_o_ruta), niveles, modelos)
+
+
+# ==========================================
+# COMPLEJIDAD Y DECISIÓN
+# ==========================================
+
+@dataclass(frozen=True)
+class Complejidad:
+    tokens: int
+    frases: int
+    conectores: int
+
+    @property
+    def puntuacion(self):
+        return self.tokens + PESO_CONECTOR * self.conectores + PESO_FRASE * (self.frases - 1)
+
+
+def estimar_complejidad(texto):
+    frases = max(1, sum(1 for f in _RE_FRASE.split(texto) if f.strip()))
+    return Complejidad(corpus.estimar_tokens(texto), frases, len(_RE_CONECTOR.findall(texto)))
+
+
+@dataclass(frozen=True)
+class Decision:
+    politica: str
+    nivel: str
+    modelo: str
+    max_tokens_salida: int
+    contexto: str
+    top_k_fragmentos: int
+    presupuesto_tokens_contexto: int
+    complejidad: Complejidad
+
+    def como_dict(self):
+        datos = asdict(self)
+        datos["complejidad"]["puntuacion"] = self.complejidad.puntuacion
+        return datos
+
+
+class Enrutador:
+    def __init__(self, politica, registro=None, metricas=METRICAS):
+        self.politica = politica
+        # Ruta del JSONL de decisiones; None = sólo métricas y log.
+        self.registro = registro
+        self.metricas = metricas
+        self._lock = threading.Lock()
+
+    def decidir(self, texto):
+        # Sin efectos: la misma entrada da siempre la misma decisión (forma
+        # parte de la clave de la caché de respuestas).
+        complejidad = estimar_complejidad(texto)
+        nivel = self.politica.nivel(complejidad.puntuacion)
+        return Decision(
+            self.politica.nombre, nivel.nombre, nivel.modelo, nivel.max_tokens_salida, nivel.contexto,
+            nivel.top_k_fragmentos, nivel.presupuesto_tokens_contexto, complejidad,
+        )
+
+    def registrar(self, decision, texto, idioma, segundos, tokens_entrada, contexto_completo, error=None):
+        self.metricas.incrementar("enrutado", nivel=decision.nivel)
+        log.info("Enrutado %s/%s (puntuación %d): %s, %d tokens de salida, contexto %s, %.2f s",
+                 decision.politica, decision.nivel, decision.complejidad.puntuacion, decision.modelo,
+                 decision.max_tokens_salida, "completo" if contexto_completo else "recuperacion", segundos)
+        if self.registro is None:
+            return
+        linea = json.dumps({
+            "texto": texto,
+            "idioma": idioma,
+            "decision": decision.como_dict(),
+            "contexto_completo": contexto_completo,
+            "tokens_entrada_estimados": tokens_entrada,
+            "segundos": round(segundos, 3),
+            "error": error,
+        }, ensure_ascii=False)
+        with self._lock, open(self.registro, "a", encoding="utf-8") as f:
+            f.write(linea + "\n")
@@ -0,0 +1,116 @@
+"""Esquema de la respuesta del modelo: declaración única, validación y reparación.
+
+Los siete campos del reporte se declaran aquí una sola vez. De esta
+declaración salen el `response_schema` que se pasa al SDK (el modelo queda
+obligado a devolver JSON con esos campos y tipos) y la validación local.
+
+`reparar` acepta la salida cruda del modelo y corrige sin otra llamada los
+defectos habituales: vallas de markdown, comas sobrantes, respuestas
+cortadas por `max_output_tokens` (se recuperan los campos completos y el
+texto del que quedó a medias), `Nivel_Alarmismo` como "75%" o 75.4, campos
+no esenciales ausentes o vacíos. Sólo si falta un campo esencial lanza
+`RespuestaInvalida`, y entonces el motor repite la llamada una única vez con
+un recordatorio del formato.
+"""
+
+import json
+import re
+
+from motor.json_incremental import ParserJSONIncremental
+
+# (nombre, tipo en el esquema del SDK, valor por defecto)
+CAMPOS = (
+    ("Clasificacion", "STRING", "N/A"),
+    ("Nivel_Alarmismo", "INTEGER", 0),
+    ("Punto_de_Dolor", "STRING", "N/A"),
+    ("Riesgo_Real", "STRING", "N/A"),
+    ("Desarticulacion", "STRING", "N/A"),
+    ("Cita", "STRING", "N/A"),
+    ("Autor_Cita", "STRING", "N/A"),
+)
+NOMBRES_CAMPOS = tuple(nombre for nombre, _, _ in CAMPOS)
+TIPOS = {nombre: tipo for nombre, tipo, _ in CAMPOS}
+DEFECTOS = {nombre: defecto for nombre, _, defecto in CAMPOS}
+# Sin estos el reporte no tiene sentido: no se rellenan con valores por defecto.
+CAMPOS_ESENCIALES = ("Clasificacion", "Desarticulacion")
+# Pseudocampo que se entrega en streaming cuando los campos ya entregados dejan
+# de valer (se repite la petición): quien los pinta vacía el reporte.
+CAMPO_REINICIO = "_reinicio"
+
+RESPONSE_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {nombre: {"type": tipo} for nombre, tipo, _ in CAMPOS},
+    "required": list(NOMBRES_CAMPOS),
+}
+
+_RE_NUMERO = re.compile(r"-?\d+(?:[.,]\d+)?")
+
+
+class RespuestaInvalida(ValueError):
+    def __init__(self, mensaje, reparaciones=()):
+        super().__init__(mensaje)
+        self.reparaciones = list(reparaciones)
+
+
+def coaccionar(campo, valor):
+    # Devuelve (valor, reparado) con el valor llevado al tipo del esquema.
+    if TIPOS.get(campo) == "INTEGER":
+        if isinstance(valor, bool):
+            return DEFECTOS[campo], True
+        if isinstance(valor, int):
+            return max(0, min(100, valor)), not 0 <= valor <= 100
+        if isinstance(valor, float):
+            return max(0, min(100, round(valor))), True
+        numero = _RE_NUMERO.search(str(valor))
+        if numero is None:
+            return DEFECTOS[campo], True
+        return max(0, min(100, round(float(numero.group().replace(",", "."))))), True
+    if isinstance(valor, str):
+        if valor.strip():
+            return valor, False
+        return DEFECTOS[campo], True
+    if valor is None:
+        return DEFECTOS[campo], True
+    if isinstance(valor, list):
+        return " ".join(map(str, valor)), True
+    return str(valor), True
+
+
+def validar(data, reparaciones=None):
+    # Devuelve un dict con exactamente los siete campos, bien tipados.
+    reparaciones = list(reparaciones or [])
+    if not isinstance(data, dict):
+        raise RespuestaInvalida("La respuesta no es un objeto JSON", reparaciones)
+    faltan = [c for c in CAMPOS_ESENCIALES if data.get(c) in (None, "")]
+    if faltan:
+        raise RespuestaInvalida(f"Faltan campos esenciales: {', '.join(faltan)}", reparaciones)
+    resultado = {}
+    for campo in NOMBRES_CAMPOS:
+        if campo not in data:
+            reparaciones.append("campo_ausente")
+            resultado[campo] = DEFECTOS[campo]
+            continue
+        resultado[campo], reparado = coaccionar(campo, data[campo])
+        if reparado:
+            reparaciones.append("tipo")
+    return resultado, reparaciones
+
+
+def reparar(texto):
+    # Devuelve (data, reparaciones); `reparaciones` vacío = respuesta válida.
+    limpio = texto.replace("```json", "").replace("```", "").strip()
+    try:
+        data = json.loads(limpio)
+    except ValueError:
+        pass
+    else:
+        return validar(data)
+    parser = ParserJSONIncremental()
+    parser.alimentar(limpio)
+    data = dict(parser.resultado)
+    reparaciones = ["json_invalido" if parser.completo else "json_truncado"]
+    pendiente = parser.pendiente()
+    if pendiente is not None and pendiente[1].strip():
+        campo, parcial = pendiente
+        data[campo] = parcial.rstrip() + "…"
+    return validar(data, reparaciones)
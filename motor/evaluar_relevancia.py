@@ -0,0 +1,129 @@
+"""Evalúa el filtro local de relevancia sobre un archivo etiquetado.
+
+Uso:
+    python -m motor.evaluar_relevancia evaluacion/relevancia_ajuste.jsonl --barrido
+    python -m motor.evaluar_relevancia evaluacion/relevancia_prueba.jsonl --ajuste evaluacion/relevancia_ajuste.jsonl
+    python -m motor.evaluar_relevancia casos.csv --umbral 0.95
+
+Cada registro necesita `texto` y `en_tema` (true/false, 1/0, si/no). La
+clase positiva es "fuera de tema": la precisión mide cuántos descartes
+locales eran correctos (un falso positivo es un argumento válido que no
+llega al modelo) y la exhaustividad, cuántas llamadas inútiles se ahorran.
+
+`relevancia_ajuste.jsonl` reúne los casos que ya se han mirado al ajustar
+las semillas y el texto de fondo; `relevancia_prueba.jsonl` no se usa para
+ajustar nada. Con `--ajuste` el umbral se elige en el primero (el más bajo
+con la precisión pedida) y sólo se mide en el segundo. El filtro se
+construye como en producción: corpus normalizado y mapeado (`EstadoCorpus`).
+"""
+
+import argparse
+import csv
+import json
+import time
+
+from motor import analisis, corpus, relevancia
+
+VALORES_VERDADEROS = {"true", "1", "si", "sí", "yes", "y"}
+UMBRALES = (0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 0.99, 0.999)
+
+
+def leer_etiquetados(ruta):
+    with open(ruta, encoding="utf-8", newline="") as f:
+        if ruta.lower().endswith(".csv"):
+            registros = list(csv.DictReader(f))
+        else:
+            registros = [json.loads(linea) for linea in f if linea.strip()]
+    casos = []
+    for registro in registros:
+        texto = (registro.get("texto") or registro.get("argumento") or "").strip()
+        if not texto:
+            continue
+        en_tema = registro.get("en_tema")
+        if not isinstance(en_tema, bool):
+            en_tema = str(en_tema).strip().lower() in VALORES_VERDADEROS
+        casos.append((texto, en_tema))
+    return casos
+
+
+def evaluar(filtro, casos, umbral):
+    vp = fp = fn = vn = 0
+    errores = []
+    for texto, en_tema in casos:
+        confianza = filtro.confianza_fuera_de_tema(texto)
+        descartado = confianza >= umbral
+        if descartado and not en_tema:
+            vp += 1
+        elif descartado:
+            fp += 1
+            errores.append(("falso descarte", confianza, texto))
+        elif not en_tema:
+            fn += 1
+            errores.append(("no detectado", confianza, texto))
+        else:
+            vn += 1
+    return {
+        "umbral": umbral,
+        "precision": vp / (vp + fp) if vp + fp else None,
+        "exhaustividad": vp / (vp + fn) if vp + fn else None,
+        "vp": vp, "fp": fp, "fn": fn, "vn": vn,
+        "errores": errores,
+    }
+
+
+def elegir_umbral(filtro, casos, precision_minima=1.0, umbrales=UMBRALES):
+    # El umbral más bajo (el que más llamadas ahorra) con la precisión pedida.
+    for umbral in sorted(umbrales):
+        precision = evaluar(filtro, casos, umbral)["precision"]
+        if precision is not None and precision >= precision_minima:
+            return umbral
+    return None
+
+
+def construir_filtro(datos="datos", umbral=relevancia.UMBRAL_POR_DEFECTO):
+    config = analisis.ConfigAnalisis(umbral_fuera_de_tema=umbral)
+    return analisis.EstadoCorpus(corpus.cargar_biblioteca(datos), config).filtro
+
+
+def _porcentaje(valor):
+    return "—" if valor is None else f"{valor:.1%}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("etiquetado", help="JSONL o CSV con campos `texto` y `en_tema`.")
+    parser.add_argument("--umbral", type=float, default=relevancia.UMBRAL_POR_DEFECTO, help="Confianza mínima de 'fuera de tema'.")
+    parser.add_argument("--barrido", action="store_true", help="Muestra precisión/exhaustividad para varios umbrales.")
+    parser.add_argument("--ajuste", default=None, help="Archivo etiquetado en el que elegir el umbral (ignora --umbral).")
+    parser.add_argument("--precision-minima", type=float, default=1.0, help="Precisión exigida en --ajuste.")
+    parser.add_argument("--datos", default="datos", help="Carpeta del corpus.")
+    args = parser.parse_args(argv)
+
+    filtro = construir_filtro(args.datos, args.umbral)
+    casos = leer_etiquetados(args.etiquetado)
+    if args.ajuste:
+        args.umbral = elegir_umbral(filtro, leer_etiquetados(args.ajuste), args.precision_minima)
+        if args.umbral is None:
+            raise SystemExit(f"Ningún umbral alcanza una precisión de {args.precision_minima:.0%} en {args.ajuste}.")
+        print(f"umbral elegido en {args.ajuste}: {args.umbral}")
+
+    inicio = time.perf_counter()
+    resultado = evaluar(filtro, casos, args.umbral)
+    ms_por_caso = 1000 * (time.perf_counter() - inicio) / max(1, len(casos))
+
+    print(f"{len(casos)} casos ({sum(not t for _, t in casos)} fuera de tema), {ms_por_caso:.2f} ms/caso")
+    print(f"umbral={args.umbral}  precisión={_porcentaje(resultado['precision'])}  "
+          f"exhaustividad={_porcentaje(resultado['exhaustividad'])}  "
+          f"(vp={resultado['vp']} fp={resultado['fp']} fn={resultado['fn']} vn={resultado['vn']})")
+    for tipo, confianza, texto in resultado["errores"]:
+        print(f"  {tipo:15} {confianza:.3f}  {texto}")
+
+    if args.barrido:
+        print("\numbral  precisión  exhaustividad")
+        for umbral in UMBRALES:
+            r = evaluar(filtro, casos, umbral)
+            print(f"{umbral:<7} {_porcentaje(r['precision']):>9}  {_porcentaje(r['exhaustividad']):>13}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Sustituto local y determinista de `genai.GenerativeModel`.
+
+Imita la parte de la interfaz del SDK que usa el motor (`generate_content`
+con y sin streaming, `response.text`, `chunk.parts`) para poder ejecutar
+lotes, benchmarks y el servicio sin clave de API ni red. La respuesta se
+deriva del propio contenido: mismo argumento, mismo resultado.
+"""
+
+import hashlib
+import json
+import random
+import re
+import time
+from types import SimpleNamespace
+
+_RE_FUENTE = re.compile(r"\[Fuente: (?P<archivo>[^|\]]+?) \| Página \d+\]\n(?P<texto>[^\n]+)")
+
+
+class ErrorSimulado(Exception):
+    def __init__(self, mensaje, code=None):
+        super().__init__(mensaje)
+        self.code = code
+
+
+class RespuestaFalsa:
+    def __init__(self, texto, uso=None):
+        self.text = texto
+        self.parts = [texto] if texto else []
+        self.usage_metadata = uso
+
+
+class ModeloGenerativoFalso:
+    def __init__(self, model_name, generation_config=None, system_instruction=None,
+                 latencia=0.0, tasa_error=0.0, codigo_error=429, semilla=0, tam_trozo=24):
+        self.model_name = model_name
+        self.generation_config = generation_config or {}
+        self.system_instruction = system_instruction or ""
+        self.latencia = latencia
+        self.tasa_error = tasa_error
+        self.codigo_error = codigo_error
+        self.tam_trozo = tam_trozo
+        self._azar = random.Random(semilla)
+
+    def _respuesta(self, contents):
+        texto = contents if isinstance(contents, str) else "\n".join(map(str, contents))
+        huella = hashlib.sha256(texto.encode("utf-8")).digest()
+        fuente = _RE_FUENTE.search(texto)
+        cita, autor = "N/A", "N/A"
+        if fuente:
+            cita = " ".join(fuente.group("texto").split()[:25])
+            autor = fuente.group("archivo")
+        return json.dumps({
+            "Clasificacion": "GRUPO A (Técnico)" if huella[0] % 2 == 0 else "GRUPO B (Cultural)",
+            "Nivel_Alarmismo": huella[1] % 101,
+            "Punto_de_Dolor": "Respuesta simulada: emoción subyacente.",
+            "Riesgo_Real": "Respuesta simulada: riesgo técnico.",
+            "Desarticulacion": "Respuesta simulada: desarticulación lógica.",
+            "Cita": cita,
+            "Autor_Cita": autor,
+        }, ensure_ascii=False)
+
+    def generate_content(self, contents, stream=False, **kwargs):
+        if self.tasa_error and self._azar.random() < self.tasa_error:
+            time.sleep(self.latencia / 2)
+            raise ErrorSimulado(f"{self.codigo_error} Error inyectado (simulado)", code=self.codigo_error)
+        texto = self._respuesta(contents)
+        # Como el modelo real, corta la respuesta al llegar a `max_output_tokens`.
+        tope = self.generation_config.get("max_output_tokens")
+        if tope:
+            texto = texto[:4 * tope]
+        # Recuento aproximado (~4 caracteres por token).
+        uso = SimpleNamespace(
+            prompt_token_count=(len(self.system_instruction) + len(str(contents))) // 4,
+            candidates_token_count=len(texto) // 4,
+        )
+        if not stream:
+            time.sleep(self.latencia)
+            return RespuestaFalsa(texto, uso)
+        return self._trozos(texto, uso)
+
+    def _trozos(self, texto, uso):
+        n = max(1, -(-len(texto) // self.tam_trozo))
+        for i in range(0, len(texto), self.tam_trozo):
+            time.sleep(self.latencia / n)
+            ultimo = i + self.tam_trozo >= len(texto)
+            yield RespuestaFalsa(texto[i:i + self.tam_trozo], uso if ultimo else None)
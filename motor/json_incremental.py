@@ -0,0 +1,141 @@
+"""Parser JSON incremental para las respuestas en streaming del modelo.
+
+El modelo devuelve un único objeto JSON plano con los campos del reporte.
+`ParserJSONIncremental` recibe los trozos de texto según llegan y devuelve
+cada par (campo, valor) en cuanto su valor está completo, sin esperar al
+cierre del objeto. Tolera las vallas de markdown (```json) que a veces
+preceden o siguen al objeto.
+"""
+
+import json
+import re
+
+# Escape sin terminar al final de una cadena cortada (`\` o `\u00`), sin
+# confundirlo con una barra ya escapada (`\\`).
+_RE_ESCAPE_INCOMPLETO = re.compile(r"(?<!\\)((?:\\\\)*)\\(?:u[0-9a-fA-F]{0,3})?$")
+
+_BUSCAR_OBJETO, _ESPERAR_CLAVE, _ESPERAR_DOS_PUNTOS, _VALOR, _FIN = range(5)
+
+
+class ParserJSONIncremental:
+    def __init__(self):
+        self.resultado = {}
+        self._buffer = ""
+        self._i = 0
+        self._estado = _BUSCAR_OBJETO
+        self._clave = None
+        # Estado del escaneo del valor en curso.
+        self._inicio_valor = 0
+        self._profundidad = 0
+        self._en_cadena = False
+        self._escape = False
+
+    @property
+    def completo(self):
+        return self._estado == _FIN
+
+    @property
+    def texto(self):
+        return self._buffer
+
+    def alimentar(self, fragmento):
+        self._buffer += fragmento
+        nuevos = []
+        buf = self._buffer
+        n = len(buf)
+        while self._i < n and self._estado != _FIN:
+            c = buf[self._i]
+
+            if self._estado == _BUSCAR_OBJETO:
+                if c == "{":
+                    self._estado = _ESPERAR_CLAVE
+                self._i += 1
+
+            elif self._estado == _ESPERAR_CLAVE:
+                if c == "}":
+                    self._estado = _FIN
+                    self._i += 1
+                elif c == '"':
+                    fin = self._fin_de_cadena(buf, self._i + 1)
+                    if fin is None:
+                        break
+                    self._clave = json.loads(buf[self._i:fin + 1])
+                    self._estado = _ESPERAR_DOS_PUNTOS
+                    self._i = fin + 1
+                else:
+                    # Espacios y comas entre pares.
+                    self._i += 1
+
+            elif self._estado == _ESPERAR_DOS_PUNTOS:
+                if c == ":":
+                    self._estado = _VALOR
+                    self._inicio_valor = self._i + 1
+                    self._profundidad = 0
+                    self._en_cadena = False
+                    self._escape = False
+                self._i += 1
+
+            else:  # _VALOR
+                if self._en_cadena:
+                    if self._escape:
+                        self._escape = False
+                    elif c == "\\":
+                        self._escape = True
+                    elif c == '"':
+                        self._en_cadena = False
+                        if self._profundidad == 0:
+                            # Un valor de tipo cadena termina en su comilla de cierre.
+                            nuevos.append(self._emitir(buf[self._inicio_valor:self._i + 1]))
+                            self._estado = _ESPERAR_CLAVE
+                    self._i += 1
+                elif c == '"':
+                    self._en_cadena = True
+                    self._i += 1
+                elif c in "[{":
+                    self._profundidad += 1
+                    self._i += 1
+                elif c in "]}" and self._profundidad > 0:
+                    self._profundidad -= 1
+                    self._i += 1
+                elif c in ",}" and self._profundidad == 0:
+                    # Números, booleanos, null, listas u objetos anidados.
+                    nuevos.append(self._emitir(buf[self._inicio_valor:self._i]))
+                    self._estado = _ESPERAR_CLAVE
+                else:
+                    self._i += 1
+        return nuevos
+
+    def _emitir(self, crudo):
+        try:
+            valor = json.loads(crudo)
+        except ValueError:
+            # Valor mal formado (p. ej. 75% sin comillas): se entrega tal cual
+            # y lo corrige la validación del esquema.
+            valor = crudo.strip()
+        self.resultado[self._clave] = valor
+        return self._clave, valor
+
+    def pendiente(self):
+        # (campo, texto) de la cadena que quedó a medias si la respuesta se
+        # cortó en mitad de un valor; None en otro caso.
+        if self._estado != _VALOR or not self._en_cadena or self._profundidad != 0:
+            return None
+        crudo = self._buffer[self._inicio_valor:].lstrip()
+        texto = _RE_ESCAPE_INCOMPLETO.sub(r"\1", crudo[1:])
+        try:
+            return self._clave, json.loads(f'"{texto}"')
+        except ValueError:
+            return self._clave, texto
+
+    @staticmethod
+    def _fin_de_cadena(buf, desde):
+        escape = False
+        for j in range(desde, len(buf)):
+            c = buf[j]
+            if escape:
+                escape = False
+            elif c == "\\":
+                escape = True
+            elif c == '"':
+                return j
+        return None
@@ -0,0 +1,133 @@
+"""Limitador de tasa compartido y reintentos con backoff para la API de Gemini.
+
+`LimitadorTasa` es un token bucket doble (peticiones y tokens por minuto)
+pensado para vivir una sola vez por proceso y ser compartido por todas las
+sesiones. Cuando no hay capacidad, las peticiones no fallan: esperan en una
+cola FIFO y pueden informar de su posición mientras tanto. `reintentar`
+repite las llamadas que fallan por errores transitorios (429, 5xx, plazos)
+con backoff exponencial y jitter completo.
+"""
+
+import itertools
+import random
+import threading
+import time
+from collections import deque
+
+CODIGOS_TRANSITORIOS = {429, 500, 502, 503, 504}
+ERRORES_TRANSITORIOS = {
+    "ResourceExhausted", "TooManyRequests", "ServiceUnavailable",
+    "InternalServerError", "DeadlineExceeded", "GatewayTimeout",
+}
+
+
+class LimitadorTasa:
+    def __init__(self, peticiones_por_minuto=15, tokens_por_minuto=1_000_000):
+        self.peticiones_por_minuto = peticiones_por_minuto
+        self.tokens_por_minuto = tokens_por_minuto
+        self._peticiones = float(peticiones_por_minuto)
+        self._tokens = float(tokens_por_minuto)
+        self._ultima_recarga = time.monotonic()
+        self._bloqueado_hasta = 0.0
+        self._cond = threading.Condition()
+        self._cola = deque()
+        self._tickets = itertools.count()
+
+    @property
+    def en_cola(self):
+        return len(self._cola)
+
+    def _recargar(self, ahora):
+        transcurrido = ahora - self._ultima_recarga
+        self._ultima_recarga = ahora
+        self._peticiones = min(self.peticiones_por_minuto,
+                               self._peticiones + transcurrido * self.peticiones_por_minuto / 60)
+        self._tokens = min(self.tokens_por_minuto,
+                           self._tokens + transcurrido * self.tokens_por_minuto / 60)
+
+    def _espera_necesaria(self, tokens, ahora):
+        falta_peticiones = max(0.0, 1 - self._peticiones) * 60 / self.peticiones_por_minuto
+        falta_tokens = max(0.0, tokens - self._tokens) * 60 / self.tokens_por_minuto
+        return max(falta_peticiones, falta_tokens, self._bloqueado_hasta - ahora)
+
+    def adquirir(self, tokens=1, al_esperar=None):
+        # Bloquea hasta que haya capacidad para una petición de `tokens` tokens.
+        # `al_esperar(posicion, segundos)` recibe la posición (1 = la siguiente)
+        # y una estimación de la espera cada vez que ésta cambia.
+        tokens = min(tokens, self.tokens_por_minuto)
+        ticket = next(self._tickets)
+        with self._cond:
+            self._cola.append(ticket)
+        ultimo_aviso = None
+        try:
+            while True:
+                with self._cond:
+                    ahora = time.monotonic()
+                    self._recargar(ahora)
+                    posicion = self._cola.index(ticket)
+                    espera = self._espera_necesaria(tokens, ahora)
+                    if posicion == 0 and espera <= 0:
+                        self._peticiones -= 1
+                        self._tokens -= tokens
+                        return
+                    # Estimación para los de detrás: un hueco de petición por puesto.
+                    espera += posicion * 60 / self.peticiones_por_minuto
+                aviso = (posicion + 1, round(espera))
+                if al_esperar is not None and aviso != ultimo_aviso:
+                    al_esperar(*aviso)
+                    ultimo_aviso = aviso
+                with self._cond:
+                    self._cond.wait(timeout=min(max(espera, 0.05), 1.0))
+        finally:
+            with self._cond:
+                self._cola.remove(ticket)
+                self._cond.notify_all()
+
+    def penalizar(self, segundos):
+        # Tras un 429 la cuota está agotada para todo el proceso, no sólo para
+        # la sesión que lo recibió: nadie sale de la cola hasta que pase.
+        with self._cond:
+            self._bloqueado_hasta = max(self._bloqueado_hasta, time.monotonic() + segundos)
+
+
+# ==========================================
+# REINTENTOS
+# ==========================================
+
+def codigo_error(error):
+    codigo = getattr(error, "code", None)
+    if callable(codigo):
+        codigo = codigo()
+    return codigo if isinstance(codigo, int) else None
+
+
+def es_limite_cuota(error):
+    return (
+        codigo_error(error) == 429
+        or type(error).__name__ in ("ResourceExhausted", "TooManyRequests")
+        or "429" in str(error)
+    )
+
+
+def es_transitorio(error):
+    return (
+        es_limite_cuota(error)
+        or codigo_error(error) in CODIGOS_TRANSITORIOS
+        or type(error).__name__ in ERRORES_TRANSITORIOS
+    )
+
+
+def reintentar(funcion, intentos=4, base=1.0, maximo=30.0, limitador=None, al_reintentar=None):
+    for intento in range(1, intentos + 1):
+        try:
+            return funcion()
+        except Exception as e:
+            if intento == intentos or not es_transitorio(e):
+                raise
+            # Tope de la espera: base, 2·base, 4·base... hasta `maximo`.
+            espera = random.uniform(0, min(maximo, base * 2 ** (intento - 1)))
+            if limitador is not None and es_limite_cuota(e):
+                limitador.penalizar(espera)
+            if al_reintentar is not None:
+                al_reintentar(intento, espera, e)
+            time.sleep(espera)
@@ -0,0 +1,171 @@
+"""Análisis por lotes sin interfaz: JSONL/CSV de entrada, JSONL de salida.
+
+Uso:
+    python -m motor.lote argumentos.jsonl -o resultados.jsonl --concurrencia 8
+    python -m motor.lote casos.csv -o resultados.jsonl --backend falso
+
+Cada registro de entrada necesita un campo `texto` (o `argumento`) y puede
+traer `id` e `idioma` (ES/EN). Los resultados se escriben según terminan, uno
+por línea. Si la salida ya existe, los registros completados sin error se
+omiten, de modo que un lote interrumpido se reanuda donde se quedó.
+"""
+
+import argparse
+import asyncio
+import csv
+import hashlib
+import importlib
+import json
+import os
+import sys
+import time
+
+from motor import analisis, cache_respuestas, corpus, limitador
+from motor.secretos import leer_secreto
+from motor.traducciones import TRADUCCIONES
+
+
+def leer_entradas(ruta, idioma_defecto):
+    with open(ruta, encoding="utf-8", newline="") as f:
+        if ruta.lower().endswith(".csv"):
+            registros = list(csv.DictReader(f))
+        else:
+            registros = []
+            for n, linea in enumerate(f, 1):
+                if not linea.strip():
+                    continue
+                try:
+                    registro = json.loads(linea)
+                except ValueError as e:
+                    raise ValueError(f"{ruta}:{n}: JSON inválido ({e})") from None
+                if not isinstance(registro, dict):
+                    raise ValueError(f"{ruta}:{n}: se esperaba un objeto JSON")
+                registros.append(registro)
+    entradas = []
+    for registro in registros:
+        texto = (registro.get("texto") or registro.get("argumento") or "").strip()
+        if not texto:
+            continue
+        idioma = (registro.get("idioma") or idioma_defecto).upper()
+        if idioma not in TRADUCCIONES:
+            raise ValueError(f"Idioma no soportado: {idioma!r}")
+        # Sin `id` explícito se usa uno estable derivado del contenido, para
+        # que la reanudación no dependa del orden de las líneas.
+        id_registro = registro.get("id") or hashlib.sha256(f"{idioma}\0{texto}".encode("utf-8")).hexdigest()[:16]
+        entradas.append({"id": str(id_registro), "idioma": idioma, "texto": texto})
+    return entradas
+
+
+def ids_completados(ruta_salida):
+    completados = set()
+    if not os.path.exists(ruta_salida):
+        return completados
+    with open(ruta_salida, encoding="utf-8") as f:
+        for linea in f:
+            try:
+                registro = json.loads(linea)
+            except ValueError:
+                # Última línea a medio escribir si el proceso murió.
+                continue
+            if registro.get("error") is None:
+                completados.add(registro["id"])
+    return completados
+
+
+def crear_backend(nombre, latencia_falsa=0.0):
+    if nombre == "gemini":
+        api_key = leer_secreto("GOOGLE_API_KEY")
+        if not api_key:
+            raise SystemExit("Falta GOOGLE_API_KEY (variable de entorno o .streamlit/secrets.toml).")
+        return analisis.BackendGemini(api_key=api_key)
+    if nombre == "falso":
+        return analisis.backend_falso(latencia=latencia_falsa)
+    # "paquete.modulo:fabrica" -> cualquier objeto con generar()/generar_stream().
+    modulo, _, atributo = nombre.partition(":")
+    return getattr(importlib.import_module(modulo), atributo or "crear_backend")()
+
+
+def _cerrar_linea_a_medias(ruta):
+    # Si el proceso murió a mitad de una línea, lo siguiente empieza en otra.
+    if not os.path.exists(ruta) or not os.path.getsize(ruta):
+        return
+    with open(ruta, "rb+") as f:
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) != b"\n":
+            f.write(b"\n")
+
+
+async def procesar_lote(motor, entradas, ruta_salida, concurrencia=4, usar_cache=True):
+    _cerrar_linea_a_medias(ruta_salida)
+    cola = asyncio.Queue()
+    for entrada in entradas:
+        cola.put_nowait(entrada)
+    totales = {"ok": 0, "error": 0}
+
+    with open(ruta_salida, "a", encoding="utf-8") as salida:
+
+        async def trabajador():
+            while True:
+                try:
+                    entrada = cola.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                inicio = time.perf_counter()
+                registro = dict(entrada, resultado=None, error=None)
+                try:
+                    registro["resultado"] = await motor.analizar_async(
+                        entrada["texto"], entrada["idioma"], usar_cache=usar_cache
+                    )
+                    totales["ok"] += 1
+                except Exception as e:
+                    registro["error"] = f"{type(e).__name__}: {e}"
+                    totales["error"] += 1
+                registro["segundos"] = round(time.perf_counter() - inicio, 3)
+                salida.write(json.dumps(registro, ensure_ascii=False) + "\n")
+                salida.flush()
+                hechos = totales["ok"] + totales["error"]
+                print(f"[{hechos}/{len(entradas)}] {entrada['id']}: "
+                      f"{'ERROR ' + registro['error'] if registro['error'] else 'ok'}", file=sys.stderr)
+
+        await asyncio.gather(*(trabajador() for _ in range(max(1, concurrencia))))
+    return totales
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Análisis por lotes del Motor Crítico.")
+    parser.add_argument("entrada", help="Archivo .jsonl o .csv con los argumentos.")
+    parser.add_argument("-o", "--salida", required=True, help="Archivo .jsonl de resultados (se reanuda si existe).")
+    parser.add_argument("--idioma", default="ES", help="Idioma por defecto de los registros (ES/EN).")
+    parser.add_argument("--concurrencia", type=int, default=4, help="Análisis simultáneos.")
+    parser.add_argument("--backend", default="gemini", help="gemini, falso o paquete.modulo:fabrica.")
+    parser.add_argument("--latencia-falsa", type=float, default=0.0, help="Segundos por llamada del backend falso.")
+    parser.add_argument("--rpm", type=int, default=15, help="Límite de peticiones por minuto a la API.")
+    parser.add_argument("--tpm", type=int, default=1_000_000, help="Límite de tokens por minuto a la API.")
+    parser.add_argument("--datos", default="datos", help="Carpeta con los PDFs del corpus.")
+    parser.add_argument("--sin-cache", action="store_true", help="No usar la caché de respuestas (backend gemini).")
+    args = parser.parse_args(argv)
+
+    entradas = leer_entradas(args.entrada, args.idioma.upper())
+    completados = ids_completados(args.salida)
+    pendientes = [e for e in entradas if e["id"] not in completados]
+    print(f"{len(entradas)} registros, {len(entradas) - len(pendientes)} ya completados.", file=sys.stderr)
+    if not pendientes:
+        return 0
+
+    # La caché de respuestas es la misma que usa la app: sólo se comparte con
+    # el backend real, para no mezclar respuestas simuladas con las de Gemini.
+    usar_cache = args.backend == "gemini" and not args.sin_cache
+    biblioteca = corpus.cargar_biblioteca(args.datos)
+    motor = analisis.MotorAnalisis(
+        biblioteca,
+        crear_backend(args.backend, args.latencia_falsa),
+        cache=cache_respuestas.CacheRespuestas() if usar_cache else None,
+        limitador=limitador.LimitadorTasa(args.rpm, args.tpm),
+    )
+    totales = asyncio.run(procesar_lote(motor, pendientes, args.salida, args.concurrencia, usar_cache))
+    print(f"Terminado: {totales['ok']} ok, {totales['error']} con error.", file=sys.stderr)
+    return 1 if totales["error"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+"""Instrumentación del motor: tiempos por etapa, tokens, caché y errores.
+
+`METRICAS` es el registro único del proceso (como el registro por defecto de
+un cliente Prometheus): el corpus, el motor de análisis y la interfaz anotan
+en él y desde aquí se exporta en formato de texto Prometheus (`/metrics`) o
+se vuelca periódicamente a un archivo JSONL.
+"""
+
+import bisect
+import json
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LIMITES_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Metricas:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # etapa -> [n, suma, máximo, cubetas por límite (+Inf al final)]
+        self._etapas = {}
+        # (nombre, (("etiqueta", "valor"), ...)) -> valor
+        self._contadores = {}
+
+    @contextmanager
+    def medir(self, etapa):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(etapa, time.perf_counter() - inicio)
+
+    def observar(self, etapa, segundos):
+        with self._lock:
+            datos = self._etapas.get(etapa)
+            if datos is None:
+                datos = self._etapas[etapa] = [0, 0.0, 0.0, [0] * (len(LIMITES_SEGUNDOS) + 1)]
+            datos[0] += 1
+            datos[1] += segundos
+            datos[2] = max(datos[2], segundos)
+            datos[3][bisect.bisect_left(LIMITES_SEGUNDOS, segundos)] += 1
+
+    def incrementar(self, nombre, valor=1, **etiquetas):
+        clave = (nombre, tuple(sorted(etiquetas.items())))
+        with self._lock:
+            self._contadores[clave] = self._contadores.get(clave, 0) + valor
+
+    def contador(self, nombre, **etiquetas):
+        with self._lock:
+            return self._contadores.get((nombre, tuple(sorted(etiquetas.items()))), 0)
+
+    def tasa_aciertos_cache(self):
+        aciertos = self.contador("cache", resultado="acierto")
+        total = aciertos + self.contador("cache", resultado="fallo")
+        return aciertos / total if total else None
+
+    # --- EXPORTACIÓN ---
+
+    def instantanea(self):
+        with self._lock:
+            etapas = {
+                etapa: {
+                    "n": n,
+                    "total_s": round(suma, 6),
+                    "media_ms": round(1000 * suma / n, 3) if n else 0.0,
+                    "max_ms": round(1000 * maximo, 3),
+                }
+                for etapa, (n, suma, maximo, _) in sorted(self._etapas.items())
+            }
+            contadores = {_nombre_serie(nombre, etiquetas): valor
+                          for (nombre, etiquetas), valor in sorted(self._contadores.items())}
+        return {"etapas": etapas, "contadores": contadores, "tasa_aciertos_cache": self.tasa_aciertos_cache()}
+
+    def exportar_prometheus(self, prefijo="motor"):
+        lineas = []
+        with self._lock:
+            if self._etapas:
+                lineas.append(f"# TYPE {prefijo}_etapa_segundos histogram")
+            for etapa, (n, suma, _, cubetas) in sorted(self._etapas.items()):
+                acumulado = 0
+                for limite, cuenta in zip(LIMITES_SEGUNDOS + ("+Inf",), cubetas):
+                    acumulado += cuenta
+                    lineas.append(f'{prefijo}_etapa_segundos_bucket{{etapa="{etapa}",le="{limite}"}} {acumulado}')
+                lineas.append(f'{prefijo}_etapa_segundos_sum{{etapa="{etapa}"}} {suma}')
+                lineas.append(f'{prefijo}_etapa_segundos_count{{etapa="{etapa}"}} {n}')
+            vistos = set()
+            for (nombre, etiquetas), valor in sorted(self._contadores.items()):
+                if nombre not in vistos:
+                    lineas.append(f"# TYPE {prefijo}_{nombre}_total counter")
+                    vistos.add(nombre)
+                lineas.append(f"{prefijo}_{_nombre_serie(nombre + '_total', etiquetas)} {valor}")
+        return "\n".join(lineas) + "\n"
+
+
+def _nombre_serie(nombre, etiquetas):
+    if not etiquetas:
+        return nombre
+    return nombre + "{" + ",".join(f'{k}="{v}"' for k, v in etiquetas) + "}"
+
+
+METRICAS = Metricas()
+
+
+# ==========================================
+# SALIDAS: ENDPOINT PROMETHEUS Y VOLCADO JSONL
+# ==========================================
+
+def servir_prometheus(puerto, metricas=METRICAS, host="0.0.0.0"):
+    class Manejador(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") not in ("/metrics", "/metricas"):
+                self.send_error(404)
+                return
+            cuerpo = metricas.exportar_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(cuerpo)))
+            self.end_headers()
+            self.wfile.write(cuerpo)
+
+        def log_message(self, *args):
+            pass
+
+    servidor = ThreadingHTTPServer((host, puerto), Manejador)
+    threading.Thread(target=servidor.serve_forever, name="metricas-http", daemon=True).start()
+    return servidor
+
+
+def volcar_jsonl_periodicamente(ruta, intervalo=60.0, metricas=METRICAS):
+    def volcar():
+        while True:
+            time.sleep(intervalo)
+            registro = {"ts": datetime.now(timezone.utc).isoformat(timespec="seconds"), **metricas.instantanea()}
+            with open(ruta, "a", encoding="utf-8") as f:
+                f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+
+    hilo = threading.Thread(target=volcar, name="metricas-jsonl", daemon=True)
+    hilo.start()
+    return hilo
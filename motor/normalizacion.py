@@ -0,0 +1,225 @@
+"""Normalización y deduplicación del texto extraído antes de montar el prompt.
+
+`page.extract_text()` devuelve el texto tal cual: cabeceras y pies repetidos
+en cada página, números de página, palabras partidas con guion al final de
+línea, saltos de línea de maquetación y espacios sobrantes. Además, los
+varios PDFs de "Evaluación ..." repiten pasajes casi idénticos entre sí.
+
+`normalizar` limpia cada página conservando la paginación (las citas siguen
+apuntando a la página correcta), elimina los bloques casi duplicados de todo
+el corpus con MinHash sobre trigramas de palabras y, opcionalmente, recorta
+cada documento a un máximo de tokens. Devuelve una Biblioteca nueva y un
+informe de tokens por documento antes y después.
+
+Uso:
+    python -m motor.normalizacion --datos datos --max-tokens-documento 4000
+"""
+
+import argparse
+import hashlib
+import logging
+import re
+from collections import Counter
+
+from motor import corpus
+
+log = logging.getLogger(__name__)
+
+NUM_PERMUTACIONES = 64
+FILAS_POR_BANDA = 4
+PRIMO = (1 << 61) - 1
+MIN_PALABRAS_DEDUP = 8
+TAM_SHINGLE = 3
+
+_RE_NUMERO_PAGINA = re.compile(r"^\W*(?:p[aá]g(?:ina)?\.?|page)?\s*\d+(?:\s*(?:de|of|/)\s*\d+)?\W*$", re.IGNORECASE)
+_RE_GUION_FINAL = re.compile(r"(\w)-$")
+_RE_LINEA_BLANCA = re.compile(r"\n[ \t]+(?=\n)")
+_RE_ESPACIOS = re.compile(r"[ \t\u00a0]+")
+_RE_DIGITOS = re.compile(r"\d+")
+_RE_PALABRA = re.compile(r"\w+")
+
+# Coeficientes (a, b) de las permutaciones h(x) = (a·x + b) mod p, fijos para
+# que la firma de un bloque no cambie entre procesos.
+_PERMUTACIONES = [
+    (int.from_bytes(hashlib.sha256(f"a{i}".encode()).digest()[:8], "big") % (PRIMO - 1) + 1,
+     int.from_bytes(hashlib.sha256(f"b{i}".encode()).digest()[:8], "big") % PRIMO)
+    for i in range(NUM_PERMUTACIONES)
+]
+
+
+# ==========================================
+# LIMPIEZA POR PÁGINA
+# ==========================================
+
+def _clave_linea(linea):
+    # Las cabeceras suelen llevar el número de página: se ignoran los dígitos.
+    return _RE_DIGITOS.sub("#", linea.strip().lower())
+
+
+def lineas_repetidas(paginas, proporcion=0.5):
+    # Primera y última línea no vacía de cada página que se repiten en al
+    # menos la mitad de las páginas (y en 3 como mínimo).
+    if len(paginas) < 3:
+        return set()
+    conteo = Counter()
+    for pagina in paginas:
+        lineas = [l for l in pagina.splitlines() if l.strip()]
+        for linea in {*lineas[:1], *lineas[-1:]}:
+            conteo[_clave_linea(linea)] += 1
+    minimo = max(3, proporcion * len(paginas))
+    return {clave for clave, n in conteo.items() if n >= minimo}
+
+
+def limpiar_pagina(pagina, repetidas=frozenset()):
+    # Devuelve la página como bloques separados por "\n": las líneas partidas
+    # por la maquetación se unen y las palabras cortadas con guion se reparan.
+    # Algunos PDFs salen con una palabra por línea separadas por líneas en
+    # blanco (" "): se tratan también como saltos blandos.
+    lineas = _RE_LINEA_BLANCA.sub(" \n", pagina).splitlines()
+    # Cabeceras, pies y números de página sólo se buscan en las dos primeras y
+    # últimas líneas no vacías: en el cuerpo, un "2019" suelto no es un pie.
+    no_vacias = [i for i, linea in enumerate(lineas) if linea.strip()]
+    extremos = set(no_vacias[:2]) | set(no_vacias[-2:])
+    bloques, actual = [], ""
+    for i, linea in enumerate(lineas):
+        if not linea.strip():
+            continue
+        if i in extremos and (_clave_linea(linea) in repetidas or _RE_NUMERO_PAGINA.match(linea)):
+            continue
+        # pypdf deja un espacio final en los saltos de línea blandos.
+        blando = actual.endswith("-") or actual.endswith(" ")
+        linea_limpia = _RE_ESPACIOS.sub(" ", linea).strip()
+        if actual and _RE_GUION_FINAL.search(actual.rstrip()) and linea_limpia[:1].islower():
+            actual = actual.rstrip()[:-1] + linea_limpia
+        elif actual and (blando or linea_limpia[:1].islower()):
+            actual = f"{actual.rstrip()} {linea_limpia}"
+        else:
+            if actual:
+                bloques.append(actual.rstrip())
+            actual = linea_limpia
+        if linea.endswith(" "):
+            actual += " "
+    if actual:
+        bloques.append(actual.rstrip())
+    return bloques
+
+
+# ==========================================
+# DEDUPLICACIÓN (MINHASH + LSH)
+# ==========================================
+
+def firma_minhash(texto):
+    palabras = _RE_PALABRA.findall(texto.lower())
+    shingles = {" ".join(palabras[i:i + TAM_SHINGLE]) for i in range(max(1, len(palabras) - TAM_SHINGLE + 1))}
+    valores = [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big") for s in shingles]
+    return tuple(min((a * x + b) % PRIMO for x in valores) for a, b in _PERMUTACIONES)
+
+
+def similitud(firma_a, firma_b):
+    return sum(x == y for x, y in zip(firma_a, firma_b)) / len(firma_a)
+
+
+class Deduplicador:
+    # Recuerda los bloques ya vistos y dice si uno nuevo es casi duplicado de
+    # alguno (Jaccard estimada >= umbral). El LSH por bandas evita comparar
+    # con todos: sólo se comparan los que coinciden en alguna banda.
+
+    def __init__(self, umbral=0.8):
+        self.umbral = umbral
+        self._bandas = {}
+        self._firmas = []
+
+    def es_duplicado(self, texto):
+        if len(texto.split()) < MIN_PALABRAS_DEDUP:
+            return False
+        firma = firma_minhash(texto)
+        claves = [(i, firma[i:i + FILAS_POR_BANDA]) for i in range(0, NUM_PERMUTACIONES, FILAS_POR_BANDA)]
+        candidatos = {j for clave in claves for j in self._bandas.get(clave, ())}
+        if any(similitud(firma, self._firmas[j]) >= self.umbral for j in candidatos):
+            return True
+        indice = len(self._firmas)
+        self._firmas.append(firma)
+        for clave in claves:
+            self._bandas.setdefault(clave, []).append(indice)
+        return False
+
+
+# ==========================================
+# NORMALIZACIÓN DE LA BIBLIOTECA
+# ==========================================
+
+def _recortar(paginas, max_tokens):
+    resultado, usados = [], 0
+    for pagina in paginas:
+        restantes = max_tokens - usados
+        if restantes <= 0:
+            # Se conservan las páginas vacías para no alterar la numeración.
+            resultado.append("")
+            continue
+        if corpus.estimar_tokens(pagina) > restantes:
+            pagina = pagina[:restantes * 4].rsplit(" ", 1)[0]
+        resultado.append(pagina)
+        usados += corpus.estimar_tokens(pagina)
+    return resultado
+
+
+def normalizar(biblioteca, umbral_duplicados=0.8, max_tokens_documento=None):
+    deduplicador = Deduplicador(umbral_duplicados) if umbral_duplicados else None
+    documentos, informe = [], []
+    for doc in biblioteca.documentos:
+        repetidas = lineas_repetidas(doc.paginas)
+        paginas, duplicados = [], 0
+        for pagina in doc.paginas:
+            bloques = []
+            for bloque in limpiar_pagina(pagina, repetidas):
+                if deduplicador is not None and deduplicador.es_duplicado(bloque):
+                    duplicados += 1
+                    continue
+                bloques.append(bloque)
+            paginas.append("\n".join(bloques))
+        tokens_limpios = sum(corpus.estimar_tokens(p) for p in paginas)
+        if max_tokens_documento:
+            paginas = _recortar(paginas, max_tokens_documento)
+        # El hash identifica el texto servido, no el PDF: así la huella del
+        # corpus (y con ella el índice y la caché de respuestas) cambia si
+        # cambia la normalización.
+        h = hashlib.sha256(doc.hash.encode("utf-8"))
+        for pagina in paginas:
+            h.update(b"\0" + pagina.encode("utf-8"))
+        documentos.append(corpus.Documento(doc.archivo, h.hexdigest(), paginas))
+        tokens_despues = sum(corpus.estimar_tokens(p) for p in paginas)
+        informe.append({
+            "archivo": doc.archivo,
+            "tokens_antes": sum(corpus.estimar_tokens(p) for p in doc.paginas),
+            "tokens_despues": tokens_despues,
+            "cabeceras_eliminadas": len(repetidas),
+            "bloques_duplicados": duplicados,
+            "recortado": tokens_despues < tokens_limpios,
+        })
+    log.info("Corpus normalizado: %d -> %d tokens.",
+             sum(f["tokens_antes"] for f in informe), sum(f["tokens_despues"] for f in informe))
+    return corpus.Biblioteca(documentos, list(biblioteca.fallidos)), informe
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Informe de tokens por documento antes y después de normalizar.")
+    parser.add_argument("--datos", default="datos", help="Carpeta del corpus.")
+    parser.add_argument("--umbral-duplicados", type=float, default=0.8, help="Jaccard mínima para considerar duplicado (0 = sin deduplicar).")
+    parser.add_argument("--max-tokens-documento", type=int, default=None, help="Recorta cada documento a este número de tokens.")
+    args = parser.parse_args(argv)
+
+    biblioteca = corpus.cargar_biblioteca(args.datos)
+    _, informe = normalizar(biblioteca, args.umbral_duplicados, args.max_tokens_documento)
+    print(f"{'documento':48} {'antes':>8} {'después':>8} {'ahorro':>7} {'dup':>5}")
+    for fila in informe:
+        ahorro = 1 - fila["tokens_despues"] / fila["tokens_antes"] if fila["tokens_antes"] else 0.0
+        marca = "  (recortado)" if fila["recortado"] else ""
+        print(f"{fila['archivo'][:48]:48} {fila['tokens_antes']:>8} {fila['tokens_despues']:>8} "
+              f"{ahorro:>7.1%} {fila['bloques_duplicados']:>5}{marca}")
+    antes = sum(f["tokens_antes"] for f in informe)
+    despues = sum(f["tokens_despues"] for f in informe)
+    print(f"{'TOTAL':48} {antes:>8} {despues:>8} {(1 - despues / antes) if antes else 0.0:>7.1%}")
+
+
+if __name__ == "__main__":
+    main()
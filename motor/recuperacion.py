@@ -0,0 +1,221 @@
+"""Índice de recuperación BM25 sobre el corpus, troceado por página y párrafo.
+
+En lugar de enviar la biblioteca completa en cada llamada al modelo, el índice
+selecciona los fragmentos más relevantes para el argumento del usuario dentro
+de un presupuesto de tokens. El índice se construye una sola vez por versión
+del corpus (su huella) y se guarda en `.cache/indice/`. Cuando el corpus
+cambia, sólo se trocean de nuevo los documentos añadidos o modificados.
+
+Los fragmentos no guardan texto: son (archivo, página, desde, hasta), con
+los desplazamientos en bytes dentro de la página, y el texto se lee de la
+biblioteca (del almacén mapeado, motor.almacen) sólo para los fragmentos
+seleccionados. Los términos y sus frecuencias sí viven en cada proceso.
+"""
+
+import heapq
+import math
+import os
+import re
+import unicodedata
+from collections import Counter
+
+from motor import almacen
+from motor.corpus import escribir_json_atomico, leer_json, estimar_tokens
+
+CARPETA_INDICE = os.path.join(".cache", "indice")
+VERSION_INDICE = 3
+
+# Palabras vacías en ES/EN (sin tildes, ya normalizadas por `tokenizar`).
+PALABRAS_VACIAS = frozenset("""
+    ante antes algo algun alguna algunas alguno algunos aqui asi aunque cada como con contra
+    cual cuando del desde donde durante ella ellas ello ellos entre era eran esa esas ese eso
+    esos esta estan estas este esto estos fue fueron hay hasta las les los mas mismo mucho
+    muchos muy nada para pero poco por porque que quien quienes sea segun ser sido sin sobre
+    son sus tambien tanto tiene tienen toda todas todo todos una uno unos ustedes
+    about after all also and any are because been but can could does for from had has have
+    into its just more most not only other our out over such than that the their them then
+    there these they this those through too very was were what when where which while who
+    will with would you your
+""".split())
+
+PALABRAS_FRAGMENTO = 150
+
+_RE_PALABRA = re.compile(r"\w+")
+_RE_FRASE = re.compile(r"(?<=[.!?;:])\s+|\n")
+
+
+def _sin_tildes(texto):
+    descompuesto = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in descompuesto if not unicodedata.combining(c))
+
+
+def tokenizar(texto):
+    return [
+        t for t in _RE_PALABRA.findall(_sin_tildes(texto).lower())
+        if len(t) > 2 and not t.isdigit() and t not in PALABRAS_VACIAS
+    ]
+
+
+# ==========================================
+# TROCEADO
+# ==========================================
+
+def _frases(texto):
+    # (inicio, fin) en caracteres de cada frase no vacía, sin los espacios de
+    # los extremos.
+    inicio = 0
+    for separador in [*_RE_FRASE.finditer(texto), None]:
+        fin = len(texto) if separador is None else separador.start()
+        frase = texto[inicio:fin]
+        if frase.strip():
+            yield inicio + len(frase) - len(frase.lstrip()), inicio + len(frase.rstrip())
+        if separador is not None:
+            inicio = separador.end()
+
+
+def unir_frases(texto):
+    return " ".join(frase for frase in (f.strip() for f in _RE_FRASE.split(texto)) if frase)
+
+
+def _trocear(doc, max_palabras):
+    # (fragmento, texto) de cada tramo contiguo de frases de ~max_palabras.
+    for num_pagina, texto_pagina in enumerate(doc.paginas, start=1):
+        tramos, actual, palabras = [], None, 0
+        for desde, hasta in _frases(texto_pagina):
+            actual = (desde, hasta) if actual is None else (actual[0], hasta)
+            palabras += len(texto_pagina[desde:hasta].split())
+            if palabras >= max_palabras:
+                tramos.append(actual)
+                actual, palabras = None, 0
+        if actual is not None:
+            tramos.append(actual)
+        for inicio, fin in tramos:
+            # Desplazamientos en bytes UTF-8, como los del almacén.
+            desde = len(texto_pagina[:inicio].encode("utf-8"))
+            texto = texto_pagina[inicio:fin]
+            yield (doc.archivo, num_pagina, desde, desde + len(texto.encode("utf-8"))), texto
+
+
+def fragmentar_documento(doc, max_palabras=PALABRAS_FRAGMENTO):
+    # Devuelve (archivo, página, desde, hasta) por fragmento.
+    return [fragmento for fragmento, _ in _trocear(doc, max_palabras)]
+
+
+def fragmentar(biblioteca, max_palabras=PALABRAS_FRAGMENTO):
+    return [f for doc in biblioteca.documentos for f in fragmentar_documento(doc, max_palabras)]
+
+
+# ==========================================
+# ÍNDICE BM25
+# ==========================================
+
+class IndiceBM25:
+    def __init__(self, fragmentos, frecuencias, huella="", hashes=None, k1=1.5, b=0.75, biblioteca=None):
+        self.fragmentos = fragmentos
+        self.frecuencias = frecuencias
+        self.huella = huella
+        # archivo -> hash del PDF con el que se trocearon sus fragmentos.
+        self.hashes = hashes or {}
+        self.k1 = k1
+        self.b = b
+        # archivo -> páginas de la biblioteca de la que se lee el texto.
+        self.paginas = {d.archivo: d.paginas for d in biblioteca.documentos} if biblioteca is not None else {}
+        self.longitudes = [sum(f.values()) for f in frecuencias]
+        self.longitud_media = (sum(self.longitudes) / len(self.longitudes)) if self.longitudes else 0.0
+        self.postings = {}
+        for i, frec in enumerate(frecuencias):
+            for termino, tf in frec.items():
+                self.postings.setdefault(termino, []).append((i, tf))
+        n = len(fragmentos)
+        self.idf = {
+            termino: math.log(1 + (n - len(lista) + 0.5) / (len(lista) + 0.5))
+            for termino, lista in self.postings.items()
+        }
+
+    @classmethod
+    def construir(cls, biblioteca, anterior=None, **kwargs):
+        # Con `anterior` se reutilizan los fragmentos y frecuencias de los
+        # documentos cuyo hash no ha cambiado; el resto se trocea de nuevo.
+        previos = {}
+        if anterior is not None:
+            for fragmento, frec in zip(anterior.fragmentos, anterior.frecuencias):
+                previos.setdefault(fragmento[0], []).append((fragmento, frec))
+        fragmentos, frecuencias, hashes = [], [], {}
+        for doc in biblioteca.documentos:
+            hashes[doc.archivo] = doc.hash
+            if anterior is not None and anterior.hashes.get(doc.archivo) == doc.hash:
+                pares = previos.get(doc.archivo, [])
+            else:
+                pares = [(f, dict(Counter(tokenizar(texto)))) for f, texto in _trocear(doc, PALABRAS_FRAGMENTO)]
+            for fragmento, frec in pares:
+                fragmentos.append(fragmento)
+                frecuencias.append(frec)
+        return cls(fragmentos, frecuencias, huella=biblioteca.huella, hashes=hashes, biblioteca=biblioteca, **kwargs)
+
+    def buscar(self, consulta, k=8):
+        puntuaciones = {}
+        for termino in set(tokenizar(consulta)):
+            idf = self.idf.get(termino)
+            if idf is None:
+                continue
+            for i, tf in self.postings[termino]:
+                norma = self.k1 * (1 - self.b + self.b * self.longitudes[i] / self.longitud_media)
+                puntuaciones[i] = puntuaciones.get(i, 0.0) + idf * tf * (self.k1 + 1) / (tf + norma)
+        mejores = heapq.nlargest(k, puntuaciones.items(), key=lambda par: par[1])
+        return [(self.fragmento(i), puntuacion) for i, puntuacion in mejores]
+
+    def fragmento(self, i):
+        archivo, pagina, desde, hasta = self.fragmentos[i]
+        texto = almacen.leer_tramo(self.paginas[archivo], pagina - 1, desde, hasta)
+        return {"archivo": archivo, "pagina": pagina, "texto": unir_frases(texto)}
+
+    def guardar(self, ruta):
+        escribir_json_atomico(ruta, {
+            "version": VERSION_INDICE,
+            "huella": self.huella,
+            "hashes": self.hashes,
+            "k1": self.k1,
+            "b": self.b,
+            "fragmentos": self.fragmentos,
+            "frecuencias": self.frecuencias,
+        })
+
+    @classmethod
+    def cargar(cls, ruta, biblioteca):
+        datos = leer_json(ruta)
+        if not datos or datos.get("version") != VERSION_INDICE:
+            return None
+        return cls([tuple(f) for f in datos["fragmentos"]], datos["frecuencias"], huella=datos["huella"],
+                   hashes=datos["hashes"], k1=datos["k1"], b=datos["b"], biblioteca=biblioteca)
+
+
+def cargar_o_construir(biblioteca, carpeta_indice=CARPETA_INDICE, anterior=None):
+    os.makedirs(carpeta_indice, exist_ok=True)
+    base = os.path.join(carpeta_indice, f"bm25-{biblioteca.huella[:16]}")
+    indice = IndiceBM25.cargar(f"{base}.json", biblioteca)
+    if indice is None or indice.huella != biblioteca.huella:
+        indice = IndiceBM25.construir(biblioteca, anterior=anterior)
+        indice.guardar(f"{base}.json")
+        almacen.limpiar(carpeta_indice, conservar=base, prefijo="bm25-", extensiones=(".json",))
+    return indice
+
+
+# ==========================================
+# SELECCIÓN DE CONTEXTO
+# ==========================================
+
+def seleccionar_fragmentos(indice, consulta, k=8, presupuesto_tokens=4000):
+    seleccion, usados = [], 0
+    for fragmento, _ in indice.buscar(consulta, k):
+        coste = estimar_tokens(fragmento["texto"])
+        if usados + coste > presupuesto_tokens:
+            continue
+        seleccion.append(fragmento)
+        usados += coste
+    return seleccion
+
+
+def formatear_contexto(fragmentos):
+    return "\n\n".join(
+        f"[Fuente: {f['archivo']} | Página {f['pagina']}]\n{f['texto']}" for f in fragmentos
+    )
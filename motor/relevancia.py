@@ -0,0 +1,130 @@
+"""Filtro local de relevancia: detecta argumentos claramente fuera de tema.
+
+Antes de pagar una llamada al modelo (con todo el contexto documental) sólo
+para que responda "FUERA DE TEMA", un Bayes ingenuo de dos clases decide en
+local si el texto tiene que ver con tecnología/IA. La clase "tema" se
+entrena con el corpus, los `casos_ejemplo` de ambos idiomas y una lista de
+términos y plataformas tecnológicas; la clase "fondo", con una muestra de
+texto general (`fondo_general.txt`).
+
+Los términos son prefijos de 5 letras sin tildes (unigramas y bigramas), lo
+que basta para juntar "robot/robots", "tecnología/tecnológico" o
+"algoritmo/algorithm". El suavizado es proporcional al tamaño de cada clase,
+así que una palabra desconocida para ambas es neutra: sólo se descarta lo que
+tiene evidencia positiva de estar fuera de tema. Ante la duda decide el modelo.
+
+El umbral por defecto (0.99) es el más bajo sin falsos descartes en
+`evaluacion/relevancia_ajuste.jsonl`; en `relevancia_prueba.jsonl`, que no
+se usó para ajustar, descarta el 20% de los argumentos fuera de tema sin
+descartar ninguno válido (a 0.9 ya descartaría alguno). Prima no perder
+argumentos válidos sobre ahorrar llamadas. Se desactiva con
+`umbral_fuera_de_tema=None` (UMBRAL_FUERA_DE_TEMA="off").
+"""
+
+import math
+import os
+import re
+from collections import Counter
+
+from motor.recuperacion import PALABRAS_VACIAS, _sin_tildes
+from motor.traducciones import TRADUCCIONES
+
+LONGITUD_PREFIJO = 5
+UMBRAL_POR_DEFECTO = 0.99
+# Palabras cortas que sí importan (se perderían con el mínimo de 3 letras).
+TERMINOS_CORTOS = frozenset({"ia", "ai", "ti", "it", "ml"})
+# Peso de los casos de ejemplo y las semillas frente a una palabra del corpus.
+PESO_EJEMPLOS = 20
+
+SEMILLAS_TEMA = """
+    inteligencia artificial algoritmo algoritmos robot robots automatización máquina máquinas
+    tecnología tecnológico digital internet datos privacidad vigilancia redes sociales
+    aplicaciones móvil ordenador software programa código chatbot modelo entrenamiento
+    empleo trabajo futuro ética sesgo autónomo ciberseguridad pantalla plataforma
+    artificial intelligence algorithm automation machine machines technology digital internet
+    data privacy surveillance social media apps phone computer software program code chatbot
+    model training jobs work future ethics bias autonomous cybersecurity screen platform
+    online web app apps móvil smartphone tablet pantalla wifi streaming videojuego videojuegos
+    consola influencer youtuber bulos notificaciones contraseña nube correo electrónico
+    online web app apps smartphone tablet wifi streaming videogame videogames console
+    influencer notifications password cloud email smart speaker smartwatch gadget ecommerce
+    google apple microsoft amazon meta facebook instagram tiktok youtube whatsapp twitter
+    netflix spotify uber airbnb glovo fortnite alexa siri chatgpt openai tesla
+"""
+
+# Muestra de texto general (noticias locales, salud, cocina, deporte, historia,
+# ciencia...) en ambos idiomas. No comparte origen con los archivos de
+# `evaluacion/`, que así miden casos no vistos.
+RUTA_FONDO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fondo_general.txt")
+
+_RE_PALABRA = re.compile(r"\w+")
+
+
+def terminos(texto):
+    palabras = [
+        t[:LONGITUD_PREFIJO] for t in _RE_PALABRA.findall(_sin_tildes(texto).lower())
+        if (len(t) > 2 or t in TERMINOS_CORTOS) and not t.isdigit() and t not in PALABRAS_VACIAS
+    ]
+    return palabras + [f"{a} {b}" for a, b in zip(palabras, palabras[1:])]
+
+
+def leer_umbral(valor):
+    # UMBRAL_FUERA_DE_TEMA: vacío = por defecto, "off" = filtro desactivado.
+    if valor is None or not str(valor).strip():
+        return UMBRAL_POR_DEFECTO
+    if str(valor).strip().lower() in ("off", "no", "none"):
+        return None
+    return float(valor)
+
+
+class FiltroRelevancia:
+    def __init__(self, frecuencias_tema, frecuencias_fondo, umbral=UMBRAL_POR_DEFECTO):
+        # `umbral`: confianza mínima (0-1) de estar fuera de tema para evitar
+        # la llamada al modelo. Más alto = menos falsos descartes.
+        self.umbral = umbral
+        vocabulario = len(frecuencias_tema.keys() | frecuencias_fondo.keys()) or 1
+        self._pesos = {}
+        total_tema = sum(frecuencias_tema.values()) or 1
+        total_fondo = sum(frecuencias_fondo.values()) or 1
+        # Suavizado proporcional: un término ausente en ambas clases pesa 0.
+        for termino in frecuencias_tema.keys() | frecuencias_fondo.keys():
+            p_tema = (frecuencias_tema.get(termino, 0) + total_tema / vocabulario) / (2 * total_tema)
+            p_fondo = (frecuencias_fondo.get(termino, 0) + total_fondo / vocabulario) / (2 * total_fondo)
+            self._pesos[termino] = math.log(p_fondo / p_tema)
+
+    @classmethod
+    def construir(cls, biblioteca, umbral=UMBRAL_POR_DEFECTO):
+        tema = Counter()
+        for doc in biblioteca.documentos:
+            for pagina in doc.paginas:
+                tema.update(terminos(pagina))
+        for idioma in TRADUCCIONES.values():
+            for caso in idioma["casos_ejemplo"]:
+                for termino in terminos(caso):
+                    tema[termino] += PESO_EJEMPLOS
+        for termino in terminos(SEMILLAS_TEMA):
+            tema[termino] += PESO_EJEMPLOS
+        with open(RUTA_FONDO, encoding="utf-8") as f:
+            fondo = Counter(terminos(f.read()))
+        return cls(tema, fondo, umbral=umbral)
+
+    def confianza_fuera_de_tema(self, texto):
+        log_odds = sum(self._pesos.get(t, 0.0) for t in terminos(texto))
+        log_odds = max(-30.0, min(30.0, log_odds))
+        return 1 / (1 + math.exp(-log_odds))
+
+    def es_fuera_de_tema(self, texto, umbral=None):
+        return self.confianza_fuera_de_tema(texto) >= (self.umbral if umbral is None else umbral)
+
+
+def respuesta_fuera_de_tema(idioma):
+    # Mismo esquema que devolvería el modelo para un argumento fuera de tema.
+    return {
+        "Clasificacion": "FUERA DE TEMA",
+        "Nivel_Alarmismo": 0,
+        "Punto_de_Dolor": "N/A",
+        "Riesgo_Real": "N/A",
+        "Desarticulacion": TRADUCCIONES[idioma]["fuera_tema_local"],
+        "Cita": "N/A",
+        "Autor_Cita": "N/A",
+    }
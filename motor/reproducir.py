@@ -0,0 +1,121 @@
+"""Reproducción offline de un registro de peticiones con distintas políticas de enrutado.
+
+Uso:
+    python -m motor.reproducir enrutado.jsonl --politicas fija adaptativa
+    python -m motor.reproducir argumentos.jsonl --politicas fija mi_politica.json -o informe.json
+
+La entrada es el registro que escribe el motor con `registro_enrutado` (o
+cualquier JSONL/CSV con `texto` e `idioma`, como en `motor.lote`). Cada
+petición se vuelve a analizar con cada política contra el sustituto local
+del modelo, sin red ni clave de API: así se obtienen el tamaño real del
+prompt (contexto completo o fragmentos), el nivel elegido y el tiempo local.
+La latencia y el coste de la llamada se estiman con la tabla de modelos de
+la política (`enrutado.MODELOS`) a partir de esos tokens; los tokens de
+salida son los del sustituto, recortados al tope del nivel.
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from collections import Counter
+
+from motor import analisis, corpus, enrutado, relevancia
+from motor.bench import percentil
+from motor.lote import leer_entradas
+from motor.metricas import Metricas
+
+
+def _tokens(metricas):
+    return metricas.contador("tokens", tipo="prompt"), metricas.contador("tokens", tipo="respuesta")
+
+
+def reproducir(biblioteca, entradas, nombre_politica, umbral_fuera_de_tema=relevancia.UMBRAL_POR_DEFECTO):
+    metricas = Metricas()
+    motor = analisis.MotorAnalisis(
+        biblioteca,
+        analisis.backend_falso(metricas=metricas),
+        config=analisis.ConfigAnalisis(politica_enrutado=nombre_politica, umbral_fuera_de_tema=umbral_fuera_de_tema),
+        metricas=metricas,
+    )
+    politica = motor.enrutador.politica
+    latencias, costes, entrada_total, salida_total = [], [], 0, 0
+    niveles, errores = Counter(), 0
+    for entrada in entradas:
+        decision = motor.decidir(entrada["texto"])
+        antes = _tokens(metricas)
+        inicio = time.perf_counter()
+        try:
+            motor.analizar(entrada["texto"], entrada["idioma"], usar_cache=False)
+        except Exception:
+            errores += 1
+        segundos = time.perf_counter() - inicio
+        tokens_entrada, tokens_salida = (b - a for a, b in zip(antes, _tokens(metricas)))
+        if tokens_entrada:
+            modelo = politica.modelos[decision.modelo]
+            segundos += modelo.latencia(tokens_entrada, tokens_salida)
+            costes.append(modelo.coste(tokens_entrada, tokens_salida))
+            niveles[decision.nivel] += 1
+        else:
+            # Descartada por el filtro local de relevancia: no llega al modelo.
+            costes.append(0.0)
+            niveles["filtro_local"] += 1
+        latencias.append(segundos)
+        entrada_total += tokens_entrada
+        salida_total += tokens_salida
+    n = len(entradas)
+    return {
+        "politica": politica.nombre,
+        "peticiones": n,
+        "errores": errores,
+        "niveles": dict(niveles),
+        "latencia_media_ms": round(1000 * statistics.fmean(latencias), 1) if n else 0.0,
+        "latencia_p50_ms": round(1000 * percentil(latencias, 50), 1),
+        "latencia_p95_ms": round(1000 * percentil(latencias, 95), 1),
+        "tokens_entrada_medios": round(entrada_total / n) if n else 0,
+        "tokens_salida_medios": round(salida_total / n) if n else 0,
+        "coste_usd": round(sum(costes), 6),
+        "coste_usd_por_1000": round(1000 * sum(costes) / n, 4) if n else 0.0,
+    }
+
+
+def imprimir_tabla(informes):
+    columnas = ("politica", "peticiones", "errores", "latencia_p50_ms", "latencia_p95_ms",
+                "tokens_entrada_medios", "coste_usd_por_1000")
+    anchos = [max(len(c), *(len(str(i[c])) for i in informes)) for c in columnas]
+    print("  ".join(c.ljust(a) for c, a in zip(columnas, anchos)).rstrip())
+    for informe in informes:
+        print("  ".join(str(informe[c]).ljust(a) for c, a in zip(columnas, anchos)).rstrip())
+        print(f"    niveles: {informe['niveles']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compara políticas de enrutado sobre un registro de peticiones.")
+    parser.add_argument("registro", help="JSONL de decisiones del motor (o .jsonl/.csv con `texto`).")
+    parser.add_argument("--politicas", nargs="+", default=["fija", "adaptativa"],
+                        help=f"Nombres ({', '.join(enrutado.POLITICAS)}) o rutas a JSON de política.")
+    parser.add_argument("--idioma", default="ES", help="Idioma por defecto de los registros (ES/EN).")
+    parser.add_argument("--datos", default="datos", help="Carpeta con los PDFs del corpus.")
+    parser.add_argument("--umbral-fuera-de-tema", type=relevancia.leer_umbral, default=relevancia.UMBRAL_POR_DEFECTO,
+                        help="Umbral del filtro local de relevancia (\"off\" lo desactiva).")
+    parser.add_argument("-o", "--salida", help="Guardar el informe en JSON.")
+    args = parser.parse_args(argv)
+
+    entradas = leer_entradas(args.registro, args.idioma.upper())
+    if not entradas:
+        raise SystemExit(f"{args.registro}: no hay peticiones que reproducir.")
+    biblioteca = corpus.cargar_biblioteca(args.datos)
+    informes = []
+    for politica in args.politicas:
+        print(f"Reproduciendo {len(entradas)} peticiones con la política {politica!r}...", file=sys.stderr)
+        informes.append(reproducir(biblioteca, entradas, politica, args.umbral_fuera_de_tema))
+    imprimir_tabla(informes)
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(informes, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,22 @@
+"""Lectura de secretos fuera de Streamlit (lotes, servicio, benchmarks).
+
+Se consulta primero la variable de entorno del mismo nombre y después el
+archivo `.streamlit/secrets.toml` que usa la app, para que ambos modos de
+ejecución compartan configuración.
+"""
+
+import os
+import tomllib
+
+RUTA_SECRETOS = os.path.join(".streamlit", "secrets.toml")
+
+
+def leer_secreto(nombre, defecto=None, ruta=RUTA_SECRETOS):
+    valor = os.environ.get(nombre)
+    if valor:
+        return valor
+    try:
+        with open(ruta, "rb") as f:
+            return tomllib.load(f).get(nombre, defecto)
+    except (OSError, tomllib.TOMLDecodeError):
+        return defecto
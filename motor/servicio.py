@@ -0,0 +1,301 @@
+"""Servicio HTTP/JSON de análisis, independiente de la interfaz de Streamlit.
+
+Uso:
+    python -m motor.servicio --puerto 8600 --trabajadores 8
+    python -m motor.servicio --backend falso --latencia-falsa 1.5   # pruebas de carga
+
+Rutas:
+    GET  /salud       estado del corpus (fuentes, fallidos, huella, tokens)
+    GET  /metricas    métricas en formato Prometheus (?formato=json: instantánea)
+    POST /analizar    {"texto", "idioma", "stream", "usar_cache", "solo_cache"}
+
+Todas exigen `Authorization: Bearer <token>` con uno de los `TOKENS_VALIDOS`
+de la app, salvo `/salud` sin cabecera, que sólo responde `{"estado": "ok"}`
+(para sondas de vida). Por defecto escucha sólo en 127.0.0.1. Con `"stream": true` responde NDJSON, un evento
+por línea: `cola`, `reintento`, `campo` (el pseudocampo `_reinicio` anula los
+anteriores) y, al final, `resultado` o `error`.
+Sin streaming devuelve `{"resultado": ...}`. Los análisis se ejecutan en un
+pool de hilos; el límite de la API lo sigue imponiendo el limitador
+compartido, así que el tamaño del pool sólo acota el trabajo simultáneo del
+proceso. Para escalar se arrancan más instancias: todas comparten el
+almacén del corpus en disco.
+"""
+
+import argparse
+import asyncio
+import functools
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+from motor import analisis, cache_respuestas, corpus, limitador, relevancia, vigilante
+from motor.lote import crear_backend
+from motor.secretos import leer_secreto
+from motor.traducciones import TRADUCCIONES
+
+log = logging.getLogger(__name__)
+
+TAM_MAXIMO_CUERPO = 64 * 1024
+MOTIVOS = {200: "OK", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found",
+           405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error", 502: "Bad Gateway"}
+
+
+class ErrorPeticion(Exception):
+    def __init__(self, estado, mensaje):
+        super().__init__(mensaje)
+        self.estado = estado
+
+
+def leer_tokens_validos():
+    return {t.strip() for t in (leer_secreto("TOKENS_VALIDOS") or "").split(",") if t.strip()}
+
+
+class ServicioAnalisis:
+    def __init__(self, motor, tokens_validos, trabajadores=8):
+        self.motor = motor
+        self.tokens_validos = tokens_validos
+        self.pool = ThreadPoolExecutor(max_workers=trabajadores, thread_name_prefix="analisis")
+
+    # --- HTTP MÍNIMO ---
+
+    async def atender(self, lector, escritor):
+        try:
+            metodo, ruta, cabeceras, cuerpo = await self._leer_peticion(lector)
+            await self._despachar(metodo, ruta, cabeceras, cuerpo, escritor)
+        except ErrorPeticion as e:
+            await self._responder_json(escritor, e.estado, {"error": str(e)})
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except Exception:
+            log.exception("Error atendiendo la petición")
+            await self._responder_json(escritor, 500, {"error": "Error interno"})
+        finally:
+            try:
+                escritor.close()
+                await escritor.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _leer_peticion(self, lector):
+        linea = (await lector.readline()).decode("latin-1").strip()
+        if not linea:
+            raise asyncio.IncompleteReadError(b"", None)
+        try:
+            metodo, ruta, _ = linea.split(" ", 2)
+        except ValueError:
+            raise ErrorPeticion(400, "Línea de petición inválida")
+        cabeceras = {}
+        while True:
+            linea = (await lector.readline()).decode("latin-1")
+            if linea in ("\r\n", "\n", ""):
+                break
+            nombre, _, valor = linea.partition(":")
+            cabeceras[nombre.strip().lower()] = valor.strip()
+        try:
+            longitud = int(cabeceras.get("content-length") or 0)
+        except ValueError:
+            raise ErrorPeticion(400, "Content-Length inválido")
+        if longitud < 0:
+            raise ErrorPeticion(400, "Content-Length inválido")
+        if longitud > TAM_MAXIMO_CUERPO:
+            raise ErrorPeticion(413, "Cuerpo demasiado grande")
+        cuerpo = await lector.readexactly(longitud) if longitud else b""
+        return metodo.upper(), ruta, cabeceras, cuerpo
+
+    async def _escribir_cabecera(self, escritor, estado, tipo, longitud=None):
+        lineas = [f"HTTP/1.1 {estado} {MOTIVOS.get(estado, '')}", f"Content-Type: {tipo}", "Connection: close"]
+        if longitud is not None:
+            lineas.append(f"Content-Length: {longitud}")
+        escritor.write(("\r\n".join(lineas) + "\r\n\r\n").encode("latin-1"))
+
+    async def _responder(self, escritor, estado, cuerpo, tipo):
+        await self._escribir_cabecera(escritor, estado, tipo, len(cuerpo))
+        escritor.write(cuerpo)
+        await escritor.drain()
+
+    async def _responder_json(self, escritor, estado, datos):
+        cuerpo = json.dumps(datos, ensure_ascii=False).encode("utf-8")
+        await self._responder(escritor, estado, cuerpo, "application/json; charset=utf-8")
+
+    # --- RUTAS ---
+
+    async def _despachar(self, metodo, ruta, cabeceras, cuerpo, escritor):
+        partes = urlsplit(ruta)
+        camino = partes.path.rstrip("/")
+        if camino == "/salud":
+            # Fuentes, fallidos y tokens sólo para clientes autorizados.
+            if "authorization" not in cabeceras:
+                await self._responder_json(escritor, 200, {"estado": "ok"})
+                return
+            self._autorizar(cabeceras)
+            await self._responder_json(escritor, 200, self.salud())
+        elif camino in ("/metricas", "/metrics"):
+            self._autorizar(cabeceras)
+            if parse_qs(partes.query).get("formato") == ["json"]:
+                await self._responder_json(escritor, 200, self.motor.metricas.instantanea())
+            else:
+                await self._responder(escritor, 200, self.motor.metricas.exportar_prometheus().encode("utf-8"),
+                                      "text/plain; version=0.0.4; charset=utf-8")
+        elif camino == "/analizar":
+            if metodo != "POST":
+                raise ErrorPeticion(405, "Usa POST")
+            self._autorizar(cabeceras)
+            await self._analizar(self._leer_cuerpo(cuerpo), escritor)
+        else:
+            raise ErrorPeticion(404, "Ruta desconocida")
+
+    def _autorizar(self, cabeceras):
+        esquema, _, token = cabeceras.get("authorization", "").partition(" ")
+        if esquema.lower() != "bearer" or token.strip() not in self.tokens_validos:
+            raise ErrorPeticion(401, "Token inválido")
+
+    def _leer_cuerpo(self, cuerpo):
+        try:
+            peticion = json.loads(cuerpo or b"{}")
+        except ValueError:
+            raise ErrorPeticion(400, "JSON inválido")
+        texto = str(peticion.get("texto") or "").strip()
+        idioma = str(peticion.get("idioma") or "ES").upper()
+        if not texto:
+            raise ErrorPeticion(400, "Falta `texto`")
+        if idioma not in TRADUCCIONES:
+            raise ErrorPeticion(400, f"Idioma no soportado: {idioma}")
+        peticion.update(texto=texto, idioma=idioma)
+        return peticion
+
+    def salud(self):
+        biblioteca = self.motor.biblioteca
+        return {
+            "estado": "ok",
+            "fuentes": biblioteca.archivos,
+            "fallidos": biblioteca.fallidos,
+            "huella": biblioteca.huella,
+            "informe_tokens": self.motor.informe_tokens,
+        }
+
+    async def _analizar(self, peticion, escritor):
+        texto, idioma = peticion["texto"], peticion["idioma"]
+        usar_cache = bool(peticion.get("usar_cache", True))
+        if peticion.get("solo_cache"):
+            # Fuera del pool: una consulta a la caché no debe esperar detrás de
+            # los análisis en curso.
+            data = await asyncio.get_running_loop().run_in_executor(
+                None, self.motor.consultar_cache, texto, idioma
+            )
+            await self._responder_json(escritor, 200, {"resultado": data})
+            return
+        if not peticion.get("stream"):
+            try:
+                data = await asyncio.get_running_loop().run_in_executor(
+                    self.pool, functools.partial(self.motor.analizar, texto, idioma, usar_cache=usar_cache)
+                )
+            except Exception as e:
+                await self._responder_json(escritor, 502, _error(e))
+                return
+            await self._responder_json(escritor, 200, {"resultado": data})
+            return
+
+        # Streaming: el hilo del análisis deja los eventos en una cola asyncio.
+        loop = asyncio.get_running_loop()
+        eventos = asyncio.Queue()
+
+        def emitir(evento):
+            loop.call_soon_threadsafe(eventos.put_nowait, evento)
+
+        def trabajo():
+            try:
+                data = self.motor.analizar(
+                    texto, idioma, usar_cache=usar_cache,
+                    al_recibir_campo=lambda campo, valor: emitir({"evento": "campo", "campo": campo, "valor": valor}),
+                    al_esperar=lambda posicion, segundos: emitir({"evento": "cola", "posicion": posicion, "segundos": segundos}),
+                    al_reintentar=lambda intento, segundos, error: emitir({"evento": "reintento", "intento": intento}),
+                )
+                emitir({"evento": "resultado", "resultado": data})
+            except Exception as e:
+                emitir({"evento": "error", **_error(e)})
+            finally:
+                emitir(None)
+
+        await self._escribir_cabecera(escritor, 200, "application/x-ndjson; charset=utf-8")
+        futuro = loop.run_in_executor(self.pool, trabajo)
+        try:
+            while (evento := await eventos.get()) is not None:
+                escritor.write((json.dumps(evento, ensure_ascii=False) + "\n").encode("utf-8"))
+                await escritor.drain()
+        finally:
+            # Si el cliente se desconecta, el análisis termina igualmente (y
+            # queda en la caché para el siguiente).
+            await asyncio.shield(futuro)
+
+
+def _error(e):
+    return {"error": f"{type(e).__name__}: {e}", "codigo": limitador.codigo_error(e)}
+
+
+# ==========================================
+# ARRANQUE
+# ==========================================
+
+def crear_motor(datos="datos", backend="gemini", latencia_falsa=0.0, usar_cache=True, rpm=None, tpm=None):
+    # La caché de respuestas sólo se comparte con el backend real (como en lotes).
+    usar_cache = usar_cache and backend == "gemini"
+    return analisis.MotorAnalisis(
+        corpus.cargar_biblioteca(datos),
+        crear_backend(backend, latencia_falsa),
+        # Misma configuración de enrutado que la app (motor.enrutado).
+        config=analisis.ConfigAnalisis(
+            umbral_fuera_de_tema=relevancia.leer_umbral(leer_secreto("UMBRAL_FUERA_DE_TEMA")),
+            politica_enrutado=leer_secreto("POLITICA_ENRUTADO"),
+            registro_enrutado=leer_secreto("REGISTRO_ENRUTADO"),
+        ),
+        cache=cache_respuestas.CacheRespuestas() if usar_cache else None,
+        limitador=limitador.LimitadorTasa(
+            peticiones_por_minuto=rpm or int(leer_secreto("LIMITE_PETICIONES_MINUTO", 15)),
+            tokens_por_minuto=tpm or int(leer_secreto("LIMITE_TOKENS_MINUTO", 1_000_000)),
+        ),
+    )
+
+
+async def servir(servicio, host="127.0.0.1", puerto=8600):
+    servidor = await asyncio.start_server(servicio.atender, host, puerto)
+    log.info("Servicio de análisis escuchando en %s:%d", host, puerto)
+    async with servidor:
+        await servidor.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servicio HTTP de análisis del Motor Crítico.")
+    parser.add_argument("--host", default="127.0.0.1", help="0.0.0.0 para aceptar conexiones de la red.")
+    parser.add_argument("--puerto", type=int, default=8600)
+    parser.add_argument("--trabajadores", type=int, default=8, help="Análisis simultáneos por proceso.")
+    parser.add_argument("--backend", default="gemini", help="gemini, falso o paquete.modulo:fabrica.")
+    parser.add_argument("--latencia-falsa", type=float, default=0.0, help="Segundos por llamada del backend falso.")
+    parser.add_argument("--datos", default="datos", help="Carpeta con los PDFs del corpus.")
+    parser.add_argument("--rpm", type=int, default=None, help="Límite de peticiones por minuto (por defecto, LIMITE_PETICIONES_MINUTO).")
+    parser.add_argument("--tpm", type=int, default=None, help="Límite de tokens por minuto (por defecto, LIMITE_TOKENS_MINUTO).")
+    parser.add_argument("--sin-cache", action="store_true", help="No usar la caché de respuestas.")
+    parser.add_argument("--intervalo-recarga", type=float, default=5.0, help="Segundos entre sondeos de `datos/` (0 = sin recarga).")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    tokens = leer_tokens_validos()
+    if not tokens:
+        raise SystemExit("Falta TOKENS_VALIDOS (variable de entorno o .streamlit/secrets.toml).")
+    motor = crear_motor(args.datos, args.backend, args.latencia_falsa, usar_cache=not args.sin_cache,
+                        rpm=args.rpm, tpm=args.tpm)
+    if args.intervalo_recarga > 0:
+        vigilante.VigilanteCorpus(
+            args.datos, lambda cambios: motor.recargar_desde(args.datos), intervalo=args.intervalo_recarga
+        ).iniciar()
+    if motor.cache is not None:
+        threading.Thread(target=motor.precalentar, name="precalentar-cache", daemon=True).start()
+    try:
+        asyncio.run(servir(ServicioAnalisis(motor, tokens, args.trabajadores), args.host, args.puerto))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""Textos de la interfaz (i18n) y prompts del sistema por idioma."""
+
+TRADUCCIONES = {
+    "ES": {
+        "titulo_app": "Análisis Crítico",
+        "intro": """
+        Este sistema emplea Inteligencia Artificial para examinar tus afirmaciones sobre tecnología. 
+        Procesa los argumentos para aportar contexto técnico y contrastar las ideas con una base de conocimiento especializada.
+        """,
+        "aviso_legal": "⚠️ **Aviso importante:** Esta herramienta no es un oráculo de verdad absoluta, sino un **asistente para la reflexión**.",
+        "input_label_escribir": "Introduce el argumento a analizar:",
+        "input_placeholder": "Escribe aquí el argumento...",
+        "input_label_select": "Selecciona un caso típico para analizar:",
+        "boton_ejecutar": "🚀 EJECUTAR ANÁLISIS",
+        "alerta_vacio": "⚠️ Protocolo detenido. El campo de argumento está vacío.",
+        "loading_1": "🔄 Inicializando protocolos forenses...",
+        "loading_2": "📂 Consultando documentos internos...",
+        "loading_3": "🧠 Procesando análisis semántico...",
+        "en_cola": "⏳ Alta demanda: tu análisis está en cola (posición {posicion}, ~{segundos}s).",
+        "reintentando": "🔁 Servidor ocupado. Reintentando ({intento})...",
+        "reporte_titulo": "📊 Reporte de Análisis",
+        "nivel_alarmismo": "Nivel de Alarmismo",
+        "clasificacion": "Clasificación",
+        "perfil": "Perfil",
+        "punto_dolor": "Punto de Dolor Detectado:",
+        "riesgo_real": "Riesgo Técnico Real:",
+        "desarticulacion": "Desarticulación Lógica:",
+        "evidencia_titulo": "📚 VER EVIDENCIA DOCUMENTAL Y FUENTE",
+        "cita_titulo": "Cita textual hallada:",
+        "fuente_no_disponible": "FUENTE NO DISPONIBLE",
+        "fuente_identificada": "DOCUMENTO FUENTE IDENTIFICADO",
+        "cita_verificada": "✔ CITA VERIFICADA",
+        "cita_no_verificada": "✖ CITA NO VERIFICADA",
+        "cita_traducida": "◌ CITA TRADUCIDA · NO COMPROBABLE",
+        # Las citas se devuelven en el idioma del corpus: se pueden comprobar.
+        "traduce_citas": False,
+        "pagina": "Página",
+        "fuera_tema_titulo": "🔕 TEMA NO DETECTADO",
+        "fuera_tema_desc": "El Motor Crítico ha detectado que este argumento no está relacionado con tecnología o IA.",
+        "fuera_tema_local": "Solo analizo argumentos sobre tecnología, inteligencia artificial, sociedad digital, futuro del trabajo o ética tecnológica.",
+        "recordatorio_json": "IMPORTANTE: responde únicamente con un objeto JSON completo con los campos Clasificacion, Nivel_Alarmismo (entero 0-100), Punto_de_Dolor, Riesgo_Real, Desarticulacion, Cita y Autor_Cita.",
+        "casos_ejemplo": [
+            "La IA es una caja negra que tomará decisiones de vida o muerte sin que sepamos por qué.",
+            "La IA roba el alma de los artistas al copiar sus estilos y anula la creatividad humana.",
+            "Los robots nos quitarán el trabajo y viviremos en la miseria absoluta.",
+            "Siento que las aplicaciones me escuchan y vigilan para manipular lo que compro y pienso.",
+            "Si un coche autónomo atropella a alguien por error, la culpa es del algoritmo, no de las personas."
+        ],
+        "modo_op_1": "✍️ Escribir crítica",
+        "modo_op_2": "📂 Casos Estratégicos",
+        "info_sidebar": "ℹ️ El **Nivel de Alarmismo** mide la distancia semántica entre la narrativa emocional y la realidad técnica.",
+        
+        # PROMPT EN ESPAÑOL
+        "system_prompt": """
+        Eres el "Motor de Desarticulación Lógica".
+        
+        TU PRIMERA MISIÓN ES UN FILTRO DE RELEVANCIA:
+        Analiza si el input del usuario está relacionado con tecnología, inteligencia artificial, sociedad digital, futuro del trabajo o ética tecnológica.
+        1. SI NO TIENE RELACIÓN:
+           - Debes devolver el JSON con "Clasificacion": "FUERA DE TEMA".
+           - En "Desarticulacion" explica brevemente en ESPAÑOL que solo analizas temas tecnológicos.
+           - Pon el resto de campos en "N/A" o 0.
+
+        2. SI TIENE RELACIÓN:
+           - Procede con el análisis forense estándar basándote exclusivamente en la documentación provista.
+           - RESPONDE SIEMPRE EN ESPAÑOL.
+
+        Debes responder SIEMPRE con este esquema JSON exacto (sin markdown extra):
+        {
+          "Clasificacion": "GRUPO A (Técnico) o GRUPO B (Cultural) o FUERA DE TEMA",
+          "Nivel_Alarmismo": (Número entero 0-100),
+          "Punto_de_Dolor": "Texto breve identificando la emoción subyacente...",
+          "Riesgo_Real": "Texto breve explicando el problema técnico real...",
+          "Desarticulacion": "Texto breve con el argumento lógico y filosófico...",
+          "Cita": "Cita textual breve extraída de los documentos...",
+          "Autor_Cita": "Nombre EXACTO del archivo PDF del que extrajiste la cita. Si no hay cita, pon 'N/A'."
+        }
+        """
+    },
+    "EN": {
+        "titulo_app": "Critical Analysis",
+        "intro": """
+        This system uses Artificial Intelligence to examine your claims about technology.
+        It processes arguments to provide technical context and contrast ideas against a specialized knowledge base.
+        """,
+        "aviso_legal": "⚠️ **Important Notice:** This tool is not an oracle of absolute truth, but an **assistant for reflection**.",
+        "input_label_escribir": "Enter the argument to analyze:",
+        "input_placeholder": "Type your argument here...",
+        "input_label_select": "Select a typical case to analyze:",
+        "boton_ejecutar": "🚀 RUN ANALYSIS",
+        "alerta_vacio": "⚠️ Protocol stopped. The argument field is empty.",
+        "loading_1": "🔄 Initializing forensic protocols...",
+        "loading_2": "📂 Consulting internal documents...",
+        "loading_3": "🧠 Processing semantic analysis...",
+        "en_cola": "⏳ High demand: your analysis is queued (position {posicion}, ~{segundos}s).",
+        "reintentando": "🔁 Server busy. Retrying ({intento})...",
+        "reporte_titulo": "📊 Analysis Report",
+        "nivel_alarmismo": "Alarmism Level",
+        "clasificacion": "Classification",
+        "perfil": "Profile",
+        "punto_dolor": "Detected Pain Point:",
+        "riesgo_real": "Real Technical Risk:",
+        "desarticulacion": "Logical Deconstruction:",
+        "evidencia_titulo": "📚 VIEW DOCUMENTARY EVIDENCE AND SOURCE",
+        "cita_titulo": "Textual citation found (Translated if source is non-English):",
+        "fuente_no_disponible": "SOURCE NOT AVAILABLE",
+        "fuente_identificada": "SOURCE DOCUMENT IDENTIFIED",
+        "cita_verificada": "✔ QUOTE VERIFIED",
+        "cita_no_verificada": "✖ QUOTE NOT VERIFIED",
+        "cita_traducida": "◌ TRANSLATED QUOTE · NOT CHECKABLE",
+        # El prompt pide traducir las citas del corpus en español.
+        "traduce_citas": True,
+        "pagina": "Page",
+        "fuera_tema_titulo": "🔕 TOPIC NOT DETECTED",
+        "fuera_tema_desc": "The Critical Engine has detected that this argument is unrelated to technology or AI.",
+        "fuera_tema_local": "I only analyse arguments about technology, artificial intelligence, digital society, the future of work or technology ethics.",
+        "recordatorio_json": "IMPORTANT: reply only with one complete JSON object with the fields Clasificacion, Nivel_Alarmismo (integer 0-100), Punto_de_Dolor, Riesgo_Real, Desarticulacion, Cita and Autor_Cita.",
+        "casos_ejemplo": [
+            "AI is a black box that will make life-or-death decisions without us knowing why.",
+            "AI steals the soul of artists by copying their styles and nullifies human creativity.",
+            "Robots will take our jobs and we will live in absolute poverty.",
+            "I feel like apps listen to me and watch me to manipulate what I buy and think.",
+            "If an autonomous car hits someone by mistake, the algorithm is to blame, not the people."
+        ],
+        "modo_op_1": "✍️ Write Critique",
+        "modo_op_2": "📂 Strategic Cases",
+        "info_sidebar": "ℹ️ The **Alarmism Level** measures the semantic distance between the emotional narrative and technical reality.",
+        
+        # --- PROMPT CORREGIDO PARA FORZAR TRADUCCIÓN DE CITAS ---
+        "system_prompt": """
+        You are the "Logical Deconstruction Engine".
+        
+        YOUR FIRST MISSION IS A RELEVANCE FILTER:
+        Analyze if the user input is related to technology, artificial intelligence, digital society, future of work, or tech ethics.
+        1. IF IT IS NOT RELATED:
+           - You must return the JSON with "Clasificacion": "FUERA DE TEMA".
+           - In "Desarticulacion" briefly explain in ENGLISH that you only analyze technological topics.
+           - Set other fields to "N/A" or 0.
+
+        2. IF IT IS RELATED:
+           - Proceed with the standard forensic analysis based exclusively on the provided documentation.
+           - RESPOND ALWAYS IN ENGLISH.
+
+        You must ALWAYS respond with this exact JSON schema (no extra markdown):
+        {
+          "Clasificacion": "GROUP A (Technical) or GROUP B (Cultural) or FUERA DE TEMA",
+          "Nivel_Alarmismo": (Integer 0-100),
+          "Punto_de_Dolor": "Brief text identifying the underlying emotion...",
+          "Riesgo_Real": "Brief text explaining the real technical problem...",
+          "Desarticulacion": "Brief text with the logical and philosophical argument...",
+          "Cita": "Brief textual citation extracted from the documents. IMPORTANT: IF THE ORIGINAL SOURCE DOCUMENT IS IN SPANISH, YOU MUST TRANSLATE THE QUOTE TO ENGLISH.",
+          "Autor_Cita": "EXACT Name of the PDF file from which you extracted the citation. If no citation, put 'N/A'."
+        }
+        """
+    }
+}
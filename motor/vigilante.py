@@ -0,0 +1,89 @@
+"""Vigilancia de la carpeta del corpus para recargarlo en caliente.
+
+`VigilanteCorpus` sondea la carpeta `datos/` en un hilo de fondo comparando
+(nombre, tamaño, mtime) de cada PDF. Cuando detecta altas, bajas o cambios
+espera a que la carpeta deje de moverse (una copia grande tarda varios
+sondeos) y entonces avisa con el detalle. Sin dependencias externas: un
+sondeo cada pocos segundos sobre unas decenas de archivos es despreciable.
+"""
+
+import logging
+import os
+import threading
+from dataclasses import dataclass
+
+log = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CambiosCorpus:
+    anadidos: tuple = ()
+    modificados: tuple = ()
+    eliminados: tuple = ()
+
+    def __bool__(self):
+        return bool(self.anadidos or self.modificados or self.eliminados)
+
+
+def instantanea_carpeta(carpeta):
+    try:
+        entradas = list(os.scandir(carpeta))
+    except FileNotFoundError:
+        return {}
+    return {
+        e.name: (e.stat().st_size, e.stat().st_mtime_ns)
+        for e in entradas if e.name.endswith(".pdf") and e.is_file()
+    }
+
+
+def comparar(antes, despues):
+    return CambiosCorpus(
+        anadidos=tuple(sorted(despues.keys() - antes.keys())),
+        modificados=tuple(sorted(a for a in despues.keys() & antes.keys() if despues[a] != antes[a])),
+        eliminados=tuple(sorted(antes.keys() - despues.keys())),
+    )
+
+
+class VigilanteCorpus:
+    def __init__(self, carpeta, al_cambiar, intervalo=5.0):
+        # `al_cambiar(cambios)` se llama desde el hilo del vigilante; si falla,
+        # se registra y se reintenta en el siguiente sondeo.
+        self.carpeta = carpeta
+        self.al_cambiar = al_cambiar
+        self.intervalo = intervalo
+        self._parar = threading.Event()
+        self._hilo = None
+        self._conocida = instantanea_carpeta(carpeta)
+
+    def comprobar(self):
+        # Un sondeo; devuelve los cambios si la carpeta ya está estable.
+        actual = instantanea_carpeta(self.carpeta)
+        cambios = comparar(self._conocida, actual)
+        if not cambios:
+            return None
+        # Debounce: si sigue cambiando entre dos sondeos seguidos, esperar.
+        self._parar.wait(min(self.intervalo, 1.0))
+        if instantanea_carpeta(self.carpeta) != actual:
+            return None
+        log.info("Cambios en %s: %s", self.carpeta, cambios)
+        try:
+            self.al_cambiar(cambios)
+        except Exception:
+            log.exception("Error al recargar el corpus tras %s", cambios)
+            return None
+        self._conocida = actual
+        return cambios
+
+    def _bucle(self):
+        while not self._parar.wait(self.intervalo):
+            self.comprobar()
+
+    def iniciar(self):
+        self._hilo = threading.Thread(target=self._bucle, name="vigilante-corpus", daemon=True)
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        self._parar.set()
+        if self._hilo is not None:
+            self._hilo.join()
@@ -0,0 +1,63 @@
+from motor import almacen, citas, recuperacion
+from motor.corpus import Biblioteca, Documento
+
+
+def _biblioteca(fallidos=()):
+    return Biblioteca(
+        [Documento("a.pdf", "h1", ["primera página", "segunda página"]), Documento("b.pdf", "h2", ["única"])],
+        list(fallidos),
+    )
+
+
+def test_mapear_conserva_paginas_y_texto(tmp_path):
+    biblioteca = _biblioteca()
+    mapeada = almacen.mapear(biblioteca, carpeta=str(tmp_path))
+    assert isinstance(mapeada, almacen.BibliotecaMapeada)
+    assert mapeada.huella == biblioteca.huella
+    assert [list(d.paginas) for d in mapeada.documentos] == [d.paginas for d in biblioteca.documentos]
+    assert mapeada.texto == biblioteca.texto
+
+
+def test_mapear_devuelve_los_fallidos_de_la_extraccion_actual(tmp_path):
+    almacen.mapear(_biblioteca(), carpeta=str(tmp_path))
+    fallidos = [("roto.pdf", "PdfReadError: EOF marker not found")]
+    # Mismos documentos (misma huella, se reutiliza el almacén) y un PDF roto nuevo.
+    mapeada = almacen.mapear(_biblioteca(fallidos), carpeta=str(tmp_path))
+    assert mapeada.fallidos == fallidos
+    assert almacen.mapear(_biblioteca(), carpeta=str(tmp_path)).fallidos == []
+
+
+def test_mapear_borra_las_versiones_antiguas(tmp_path):
+    for i in range(almacen.MAX_VERSIONES + 3):
+        almacen.mapear(Biblioteca([Documento("a.pdf", f"h{i}", [f"versión {i}"])]), carpeta=str(tmp_path))
+    textos = sorted(p.name for p in tmp_path.glob("corpus-*.txt"))
+    assert len(textos) == almacen.MAX_VERSIONES
+    ultima = Biblioteca([Documento("a.pdf", f"h{almacen.MAX_VERSIONES + 2}", ["x"])])
+    assert f"corpus-{ultima.huella[:16]}.txt" in textos
+
+
+def test_fragmentos_bm25_se_leen_del_almacen(tmp_path):
+    paginas = ["Primera frase con tildes: acción, pingüino.\nSegunda línea sin punto", "Otra página. Con €uros."]
+    biblioteca = Biblioteca([Documento("a.pdf", "h1", paginas)])
+    mapeada = almacen.mapear(biblioteca, carpeta=str(tmp_path / "almacen"))
+    en_memoria = recuperacion.IndiceBM25.construir(biblioteca)
+    indice = recuperacion.IndiceBM25.construir(mapeada)
+    assert indice.fragmentos == en_memoria.fragmentos
+    assert all(len(f) == 4 for f in indice.fragmentos)
+    textos = [indice.fragmento(i)["texto"] for i in range(len(indice.fragmentos))]
+    assert textos == [en_memoria.fragmento(i)["texto"] for i in range(len(en_memoria.fragmentos))]
+    assert textos == [recuperacion.unir_frases(p) for p in paginas]
+
+
+def test_trigramas_de_citas_se_mapean_desde_disco(tmp_path):
+    biblioteca = Biblioteca([
+        Documento("a.pdf", "h1", ["Portada", "La inteligencia artificial no sustituye el juicio humano."]),
+        Documento("b.pdf", "h2", ["El juicio humano sigue siendo necesario."]),
+    ])
+    carpeta = str(tmp_path / "indice")
+    citas.VerificadorCitas(biblioteca, carpeta=carpeta)
+    mapeado = citas.VerificadorCitas(biblioteca, carpeta=carpeta)
+    assert isinstance(mapeado.indice.claves, memoryview)
+    assert list(mapeado.indice.claves) == list(citas.IndiceTrigramas.construir(biblioteca).claves)
+    resultado = mapeado.verificar("no sustituye el juicio humano", "b.pdf")
+    assert (resultado.verificada, resultado.archivo, resultado.pagina) == (True, "a.pdf", 2)
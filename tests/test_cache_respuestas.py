@@ -0,0 +1,114 @@
+import pytest
+
+from motor import analisis, cache_respuestas, corpus
+from motor.cache_respuestas import CacheRespuestas, clave_respuesta
+from motor.metricas import Metricas
+
+VALIDA = ('{"Clasificacion": "GRUPO A", "Nivel_Alarmismo": 40, "Punto_de_Dolor": "p", "Riesgo_Real": "r", '
+          '"Desarticulacion": "d", "Cita": "N/A", "Autor_Cita": "N/A"}')
+TRUNCADA = '{"Clasificacion": "GRUPO A", "Nivel_Alarmismo": 40, "Desarticulacion": "la respuesta se cor'
+
+
+class Reloj:
+    def __init__(self):
+        self.ahora = 1_000_000.0
+
+    def __call__(self):
+        return self.ahora
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    reloj = Reloj()
+    monkeypatch.setattr(cache_respuestas.time, "time", reloj)
+    return reloj
+
+
+def _cache(tmp_path, **opciones):
+    return CacheRespuestas(ruta=str(tmp_path / "respuestas.sqlite"), **opciones)
+
+
+# ==========================================
+# CLAVE
+# ==========================================
+
+def test_la_clave_ignora_espacios_mayusculas_y_forma_unicode():
+    base = clave_respuesta("La IA nos quitará el trabajo", "ES", "gemini", "h1")
+    assert clave_respuesta("  la ia   NOS quitará\n el trabajo ", "ES", "gemini", "h1") == base
+    # "á" compuesta frente a "a" + tilde combinante.
+    assert clave_respuesta("La IA nos quitara\u0301 el trabajo", "ES", "gemini", "h1") == base
+
+
+@pytest.mark.parametrize("idioma, modelo, huella", [("EN", "gemini", "h1"), ("ES", "otro", "h1"), ("ES", "gemini", "h2")])
+def test_la_clave_cambia_con_idioma_modelo_y_corpus(idioma, modelo, huella):
+    base = clave_respuesta("La IA nos quitará el trabajo", "ES", "gemini", "h1")
+    assert clave_respuesta("La IA nos quitará el trabajo", idioma, modelo, huella) != base
+
+
+# ==========================================
+# EXPULSIÓN
+# ==========================================
+
+def test_las_entradas_caducan_con_el_ttl(tmp_path, reloj):
+    cache = _cache(tmp_path, ttl_segundos=60)
+    cache.guardar("a", {"valor": 1})
+    reloj.ahora += 60
+    assert cache.contiene("a")
+    assert cache.obtener("a") == {"valor": 1}
+    reloj.ahora += 1
+    assert not cache.contiene("a")
+    assert cache.obtener("a") is None
+    assert len(cache) == 0
+    assert (cache.aciertos, cache.fallos) == (1, 1)
+
+
+def test_por_defecto_caben_2000_entradas_y_sale_la_menos_usada(tmp_path, reloj):
+    cache = _cache(tmp_path)
+    assert cache.max_entradas == 2000
+    for i in range(2000):
+        reloj.ahora += 1
+        cache.guardar(f"k{i}", i)
+    # Leer la más antigua la salva: la siguiente en salir es la segunda.
+    reloj.ahora += 1
+    assert cache.obtener("k0") == 0
+    reloj.ahora += 1
+    cache.guardar("nueva", -1)
+    assert len(cache) == 2000
+    assert cache.contiene("k0") and cache.contiene("nueva")
+    assert not cache.contiene("k1")
+
+
+def test_la_cache_persiste_entre_instancias(tmp_path):
+    _cache(tmp_path).guardar("a", {"Cita": "ñ"})
+    assert _cache(tmp_path).obtener("a") == {"Cita": "ñ"}
+
+
+# ==========================================
+# MOTOR
+# ==========================================
+
+class BackendGuionizado:
+    def __init__(self, salidas):
+        self.salidas = list(salidas)
+
+    def generar(self, nombre_modelo, instruccion, contenido):
+        return self.salidas.pop(0)
+
+    def generar_stream(self, nombre_modelo, instruccion, contenido):
+        yield self.salidas.pop(0)
+
+
+def test_respuesta_reparada_no_se_guarda_en_cache(tmp_path):
+    motor = analisis.MotorAnalisis(
+        corpus.Biblioteca([], []),
+        BackendGuionizado([TRUNCADA, VALIDA]),
+        config=analisis.ConfigAnalisis(mapear_corpus=False),
+        cache=_cache(tmp_path),
+        metricas=Metricas(),
+    )
+    texto = "Los robots nos quitarán el trabajo."
+    assert motor.analizar(texto, "ES")["Desarticulacion"].endswith("…")
+    assert motor.consultar_cache(texto, "ES") is None
+    # La siguiente petición vuelve a llamar al modelo y la respuesta válida sí se guarda.
+    assert motor.analizar(texto, "ES")["Desarticulacion"] == "d"
+    assert motor.consultar_cache(" los robots NOS quitarán el trabajo. ", "ES")["Desarticulacion"] == "d"
@@ -0,0 +1,52 @@
+import json
+
+from motor import analisis, corpus
+from motor.citas import VerificadorCitas
+from motor.metricas import Metricas
+
+PAGINA = "La inteligencia artificial no sustituye el juicio humano, lo amplifica cuando se usa con criterio."
+BIBLIOTECA = corpus.Biblioteca([corpus.Documento("fuente.pdf", "h1", ["Portada", PAGINA])], [])
+
+
+class BackendCita:
+    def __init__(self, cita):
+        self.cita = cita
+
+    def generar(self, nombre_modelo, instruccion, contenido):
+        return json.dumps({
+            "Clasificacion": "GRUPO A", "Nivel_Alarmismo": 50, "Punto_de_Dolor": "p", "Riesgo_Real": "r",
+            "Desarticulacion": "d", "Cita": self.cita, "Autor_Cita": "fuente.pdf",
+        })
+
+
+def _analizar(cita, idioma):
+    metricas = Metricas()
+    motor = analisis.MotorAnalisis(
+        BIBLIOTECA, BackendCita(cita), config=analisis.ConfigAnalisis(mapear_corpus=False), metricas=metricas
+    )
+    return motor.analizar("La IA nos quitará el trabajo.", idioma, usar_cache=False), metricas
+
+
+def test_cita_literal_se_verifica_con_su_pagina():
+    resultado = VerificadorCitas(BIBLIOTECA).verificar("«no sustituye el juicio humano, lo amplifica»", "otro.pdf")
+    assert resultado.verificada and resultado.archivo == "fuente.pdf" and resultado.pagina == 2
+
+
+def test_cita_inventada_no_se_verifica():
+    data, metricas = _analizar("Las máquinas siempre toman mejores decisiones que las personas.", "ES")
+    assert data["Verificacion_Cita"]["verificada"] is False
+    assert data["Verificacion_Cita"]["comprobable"] is True
+    assert metricas.contador("citas", resultado="no_verificada") == 1
+
+
+def test_cita_traducida_queda_como_no_comprobable():
+    data, metricas = _analizar("Artificial intelligence does not replace human judgement, it amplifies it.", "EN")
+    assert data["Verificacion_Cita"]["verificada"] is False
+    assert data["Verificacion_Cita"]["comprobable"] is False
+    assert metricas.contador("citas", resultado="no_verificada") == 0
+    assert metricas.contador("citas", resultado="no_comprobable") == 1
+
+
+def test_cita_sin_traducir_en_modo_en_se_sigue_verificando():
+    data, _ = _analizar("no sustituye el juicio humano, lo amplifica", "EN")
+    assert data["Verificacion_Cita"]["verificada"] is True
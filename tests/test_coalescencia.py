@@ -0,0 +1,148 @@
+import threading
+import time
+
+import pytest
+
+from motor import analisis, cache_respuestas, corpus
+from motor.coalescencia import VueloUnico
+from motor.metricas import Metricas
+
+
+class ErrorSesion(Exception):
+    pass
+
+
+def _esperar_vuelo(vuelos):
+    while vuelos.en_curso == 0:
+        time.sleep(0.01)
+
+
+def _lanzar_lider(vuelos, clave, funcion, al_recibir_campo):
+    salida = {}
+
+    def ejecutar():
+        try:
+            salida["resultado"] = vuelos.ejecutar(clave, funcion, al_recibir_campo)
+        except BaseException as e:
+            salida["error"] = e
+
+    hilo = threading.Thread(target=ejecutar)
+    hilo.start()
+    return hilo, salida
+
+
+def test_peticiones_identicas_comparten_una_llamada():
+    vuelos = VueloUnico()
+    llamadas = []
+    barrera = threading.Barrier(8)
+    liberar = threading.Event()
+
+    def funcion(emitir):
+        llamadas.append(1)
+        liberar.wait(5)
+        return {"valor": 1}
+
+    resultados = []
+
+    def peticion():
+        barrera.wait()
+        resultados.append(vuelos.ejecutar("clave", funcion))
+
+    hilos = [threading.Thread(target=peticion) for _ in range(8)]
+    for hilo in hilos:
+        hilo.start()
+    _esperar_vuelo(vuelos)
+    # Da tiempo a que los demás se unan al vuelo antes de terminarlo.
+    time.sleep(0.2)
+    liberar.set()
+    for hilo in hilos:
+        hilo.join(5)
+    assert len(llamadas) == 1
+    assert sorted(compartido for _, compartido in resultados) == [False] + [True] * 7
+    assert all(resultado == {"valor": 1} for resultado, _ in resultados)
+
+
+def test_error_del_callback_del_lider_no_afecta_a_los_seguidores():
+    vuelos = VueloUnico()
+    seguidor_unido = threading.Event()
+    campos_seguidor = []
+
+    def funcion(emitir):
+        seguidor_unido.wait(5)
+        for i in range(5):
+            emitir(f"campo{i}", i)
+        return {"completo": True}
+
+    def callback_lider(campo, valor):
+        if campo == "campo2":
+            raise ErrorSesion("rerun de la sesión del líder")
+
+    hilo, salida = _lanzar_lider(vuelos, "clave", funcion, callback_lider)
+    _esperar_vuelo(vuelos)
+
+    def callback_seguidor(campo, valor):
+        campos_seguidor.append(campo)
+
+    resultado_seguidor = {}
+
+    def seguir():
+        resultado_seguidor["valor"] = vuelos.ejecutar("clave", funcion, callback_seguidor)
+
+    seguidor = threading.Thread(target=seguir)
+    seguidor.start()
+    time.sleep(0.1)
+    seguidor_unido.set()
+    hilo.join(5)
+    seguidor.join(5)
+
+    assert isinstance(salida.get("error"), ErrorSesion)
+    assert resultado_seguidor["valor"] == ({"completo": True}, True)
+    assert campos_seguidor == [f"campo{i}" for i in range(5)]
+
+
+def test_error_de_la_llamada_llega_a_todos():
+    vuelos = VueloUnico()
+    unido = threading.Event()
+
+    def funcion(emitir):
+        unido.wait(5)
+        raise ValueError("fallo del modelo")
+
+    hilo, salida = _lanzar_lider(vuelos, "clave", funcion, None)
+    _esperar_vuelo(vuelos)
+    errores = []
+
+    def seguir():
+        try:
+            vuelos.ejecutar("clave", funcion)
+        except ValueError as e:
+            errores.append(e)
+
+    seguidor = threading.Thread(target=seguir)
+    seguidor.start()
+    time.sleep(0.1)
+    unido.set()
+    hilo.join(5)
+    seguidor.join(5)
+    assert isinstance(salida["error"], ValueError)
+    assert len(errores) == 1
+
+
+def test_motor_guarda_en_cache_aunque_falle_el_callback_del_lider(tmp_path):
+    metricas = Metricas()
+    motor = analisis.MotorAnalisis(
+        corpus.Biblioteca([], []),
+        analisis.backend_falso(metricas=metricas),
+        config=analisis.ConfigAnalisis(mapear_corpus=False),
+        cache=cache_respuestas.CacheRespuestas(ruta=str(tmp_path / "respuestas.sqlite")),
+        metricas=metricas,
+    )
+
+    def callback(campo, valor):
+        if campo == "Nivel_Alarmismo":
+            raise ErrorSesion("rerun")
+
+    texto = "Los robots nos quitarán el trabajo."
+    with pytest.raises(ErrorSesion):
+        motor.analizar(texto, "ES", al_recibir_campo=callback, usar_cache=False)
+    assert motor.consultar_cache(texto, "ES") is not None
@@ -0,0 +1,89 @@
+import json
+
+import pytest
+
+from motor import analisis, corpus, enrutado, reproducir
+from motor.enrutado import Enrutador, POLITICAS
+from motor.lote import leer_entradas
+from motor.metricas import Metricas
+
+BREVE = "La IA es peligrosa."
+MEDIO = ("Los algoritmos deciden a quién se contrata, pero nadie revisa sus criterios. Si los datos históricos "
+         "discriminan, entonces el modelo aprende a discriminar, aunque sus autores no lo pretendan.")
+EXTENSO = " ".join([MEDIO] * 6)
+BIBLIOTECA = corpus.Biblioteca(
+    [corpus.Documento("fuente.pdf", "h1", ["Los algoritmos de contratación heredan los sesgos de los datos."])], []
+)
+
+
+def _enrutador(politica):
+    return Enrutador(POLITICAS[politica], metricas=Metricas())
+
+
+# ==========================================
+# DECISIÓN
+# ==========================================
+
+@pytest.mark.parametrize("texto", [BREVE, MEDIO, EXTENSO])
+def test_la_politica_fija_decide_siempre_lo_mismo(texto):
+    decision = _enrutador("fija").decidir(texto)
+    assert (decision.nivel, decision.modelo, decision.max_tokens_salida, decision.contexto) == \
+        ("unico", "models/gemini-2.0-flash", 8192, "completo")
+
+
+@pytest.mark.parametrize("texto, nivel, modelo, contexto", [
+    (BREVE, "breve", "models/gemini-2.0-flash-lite", "recuperacion"),
+    (MEDIO, "medio", "models/gemini-2.0-flash", "recuperacion"),
+    (EXTENSO, "extenso", "models/gemini-2.0-flash", "completo"),
+])
+def test_la_politica_adaptativa_escala_con_la_complejidad(texto, nivel, modelo, contexto):
+    decision = _enrutador("adaptativa").decidir(texto)
+    assert (decision.nivel, decision.modelo, decision.contexto) == (nivel, modelo, contexto)
+    # Sin efectos: la decisión forma parte de la clave de la caché.
+    assert _enrutador("adaptativa").decidir(texto) == decision
+
+
+def test_los_conectores_y_las_frases_suben_la_puntuacion():
+    complejidad = enrutado.estimar_complejidad("La IA decide, pero nadie revisa los criterios. Si falla, ¿quién responde?")
+    assert (complejidad.frases, complejidad.conectores) == (2, 2)
+    assert complejidad.puntuacion == complejidad.tokens + 2 * enrutado.PESO_CONECTOR + enrutado.PESO_FRASE
+
+
+def test_una_politica_en_json_valida_los_contextos(tmp_path):
+    ruta = tmp_path / "politica.json"
+    ruta.write_text(json.dumps({"nombre": "rara", "niveles": [
+        {"nombre": "todo", "hasta": None, "modelo": "models/gemini-2.0-flash", "max_tokens_salida": 512,
+         "contexto": "resumen"},
+    ]}), encoding="utf-8")
+    with pytest.raises(ValueError, match="Contexto no soportado"):
+        enrutado.cargar_politica(str(ruta))
+
+
+# ==========================================
+# REGISTRO Y REPRODUCCIÓN
+# ==========================================
+
+def test_el_registro_de_decisiones_se_reproduce_con_otra_politica(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    registro = str(tmp_path / "decisiones.jsonl")
+    motor = analisis.MotorAnalisis(
+        BIBLIOTECA,
+        analisis.backend_falso(metricas=Metricas()),
+        config=analisis.ConfigAnalisis(mapear_corpus=False, umbral_fuera_de_tema=None,
+                                       politica_enrutado="adaptativa", registro_enrutado=registro),
+        metricas=Metricas(),
+    )
+    for texto in (BREVE, MEDIO, EXTENSO):
+        motor.analizar(texto, "ES", usar_cache=False)
+
+    entradas = leer_entradas(registro, "ES")
+    assert [e["texto"] for e in entradas] == [BREVE, MEDIO, EXTENSO]
+    informes = {p: reproducir.reproducir(BIBLIOTECA, entradas, p, umbral_fuera_de_tema=None)
+                for p in ("fija", "adaptativa")}
+    assert informes["fija"]["niveles"] == {"unico": 3}
+    assert informes["adaptativa"]["niveles"] == {"breve": 1, "medio": 1, "extenso": 1}
+    for informe in informes.values():
+        assert informe["peticiones"] == 3 and informe["errores"] == 0
+        assert informe["coste_usd"] > 0
+    # Los niveles baratos usan un modelo con menor tarifa y menos salida.
+    assert informes["adaptativa"]["coste_usd"] < informes["fija"]["coste_usd"]
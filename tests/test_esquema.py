@@ -0,0 +1,128 @@
+import json
+
+import pytest
+
+from motor import analisis, cache_respuestas, corpus, esquema
+from motor.metricas import Metricas
+
+VALIDA = ('{"Clasificacion": "GRUPO A", "Nivel_Alarmismo": 40, "Punto_de_Dolor": "p", "Riesgo_Real": "r", '
+          '"Desarticulacion": "d", "Cita": "N/A", "Autor_Cita": "N/A"}')
+TRUNCADA = '{"Clasificacion": "GRUPO A", "Nivel_Alarmismo": 40, "Desarticulacion": "la respuesta se cor'
+
+
+class BackendGuionizado:
+    def __init__(self, salidas):
+        self.salidas = list(salidas)
+
+    def generar(self, nombre_modelo, instruccion, contenido):
+        return self.salidas.pop(0)
+
+    def generar_stream(self, nombre_modelo, instruccion, contenido):
+        yield self.salidas.pop(0)
+
+
+def _motor(tmp_path, salidas):
+    return analisis.MotorAnalisis(
+        corpus.Biblioteca([], []),
+        BackendGuionizado(salidas),
+        config=analisis.ConfigAnalisis(mapear_corpus=False),
+        cache=cache_respuestas.CacheRespuestas(ruta=str(tmp_path / "respuestas.sqlite")),
+        metricas=Metricas(),
+    )
+
+
+def _con(**cambios):
+    data = json.loads(VALIDA)
+    data.update(cambios)
+    return data
+
+
+def test_respuesta_valida_no_se_repara():
+    assert esquema.reparar(VALIDA) == (json.loads(VALIDA), [])
+
+
+def test_vallas_de_markdown():
+    assert esquema.reparar("```json\n" + VALIDA + "\n```") == (json.loads(VALIDA), [])
+
+
+def test_coma_sobrante_se_repara_como_json_invalido():
+    data, reparaciones = esquema.reparar(VALIDA[:-1] + ",}")
+    assert data == json.loads(VALIDA)
+    assert reparaciones == ["json_invalido"]
+
+
+def test_respuesta_cortada_conserva_los_campos_completos():
+    data, reparaciones = esquema.reparar(TRUNCADA)
+    assert data["Clasificacion"] == "GRUPO A"
+    assert data["Nivel_Alarmismo"] == 40
+    assert data["Desarticulacion"] == "la respuesta se cor…"
+    assert data["Cita"] == "N/A"
+    assert reparaciones[0] == "json_truncado"
+    assert "campo_ausente" in reparaciones
+
+
+@pytest.mark.parametrize("nivel, esperado", [
+    ("75%", 75), ("75,6 %", 76), (75.4, 75), (150, 100), (-3, 0), ("alto", 0), (True, 0), (None, 0),
+])
+def test_nivel_de_alarmismo_se_lleva_a_entero(nivel, esperado):
+    data, reparaciones = esquema.reparar(json.dumps(_con(Nivel_Alarmismo=nivel)))
+    assert data["Nivel_Alarmismo"] == esperado
+    assert reparaciones == ["tipo"]
+
+
+def test_nivel_de_alarmismo_sin_comillas():
+    data, reparaciones = esquema.reparar(VALIDA.replace('"Nivel_Alarmismo": 40', '"Nivel_Alarmismo": 75%'))
+    assert data["Nivel_Alarmismo"] == 75
+    assert reparaciones == ["json_invalido", "tipo"]
+
+
+def test_campos_no_esenciales_ausentes_o_vacios_toman_su_valor_por_defecto():
+    data = _con(Riesgo_Real="  ", Cita=["una", "lista"])
+    del data["Punto_de_Dolor"]
+    resultado, reparaciones = esquema.reparar(json.dumps(data))
+    assert resultado["Punto_de_Dolor"] == "N/A"
+    assert resultado["Riesgo_Real"] == "N/A"
+    assert resultado["Cita"] == "una lista"
+    assert sorted(reparaciones) == ["campo_ausente", "tipo", "tipo"]
+
+
+def test_claves_desconocidas_se_descartan():
+    data, reparaciones = esquema.reparar(json.dumps(_con(Extra="x")))
+    assert list(data) == list(esquema.NOMBRES_CAMPOS)
+    assert reparaciones == []
+
+
+@pytest.mark.parametrize("texto", [
+    json.dumps(_con(Clasificacion="")),
+    '{"Clasificacion": "GRUPO A", "Nivel_Alarmismo": 40}',
+    '{"Clasificacion": "GRUPO A", "Desarticulacion": "',
+    "[]",
+    "Lo siento, no puedo ayudar con eso.",
+])
+def test_sin_campos_esenciales_la_respuesta_es_invalida(texto):
+    with pytest.raises(esquema.RespuestaInvalida) as error:
+        esquema.reparar(texto)
+    assert isinstance(error.value, ValueError)
+
+
+def test_respuesta_invalida_se_repite_una_vez_con_recordatorio(tmp_path):
+    motor = _motor(tmp_path, ["no es JSON", VALIDA])
+    assert motor.analizar("Los robots nos quitarán el trabajo.", "ES", usar_cache=False)["Desarticulacion"] == "d"
+    assert motor.backend.salidas == []
+
+
+def test_la_repeticion_anula_los_campos_ya_entregados(tmp_path):
+    cortada = '{"Clasificacion": "GRUPO B", "Punto_de_Dolor": "p", "Riesgo_Real": "r"'
+    motor = _motor(tmp_path, [cortada, VALIDA])
+    campos = []
+    data = motor.analizar("Los robots nos quitarán el trabajo.", "ES", usar_cache=False,
+                          al_recibir_campo=lambda campo, valor: campos.append(campo))
+    assert campos == ["Clasificacion", "Punto_de_Dolor", "Riesgo_Real", esquema.CAMPO_REINICIO]
+    assert data["Clasificacion"] == "GRUPO A"
+
+
+def test_escape_unicode_cortado_no_se_arrastra():
+    data, reparaciones = esquema.reparar('{"Clasificacion": "A", "Desarticulacion": "abc \\u00')
+    assert data["Desarticulacion"] == "abc…"
+    assert "json_truncado" in reparaciones
+
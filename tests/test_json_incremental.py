@@ -0,0 +1,97 @@
+import json
+
+import pytest
+
+from motor.json_incremental import ParserJSONIncremental
+
+RESPUESTA = {
+    "Clasificacion": "GRUPO B (Cultural)",
+    "Nivel_Alarmismo": 75,
+    "Punto_de_Dolor": "Comillas \"dentro\", barras \\ y saltos\nde línea",
+    "Riesgo_Real": "Unicode: \u00e9 \u2014 \u00f1",
+    "Desarticulacion": "{no es un objeto} [ni una lista]",
+    "Cita": "N/A",
+    "Autor_Cita": "Evaluacion_Grok.pdf",
+}
+
+
+def _alimentar_a_trozos(texto, tam):
+    parser = ParserJSONIncremental()
+    emitidos = []
+    for i in range(0, len(texto), tam):
+        emitidos.extend(parser.alimentar(texto[i:i + tam]))
+    return parser, emitidos
+
+
+@pytest.mark.parametrize("tam", [1, 2, 3, 7, 64, 10_000])
+def test_cualquier_corte_da_el_mismo_resultado(tam):
+    # `ensure_ascii=True` mete escapes \uXXXX que quedan partidos en los cortes pequeños.
+    for ensure_ascii in (True, False):
+        texto = json.dumps(RESPUESTA, ensure_ascii=ensure_ascii)
+        parser, emitidos = _alimentar_a_trozos(texto, tam)
+        assert parser.completo
+        assert parser.resultado == RESPUESTA
+        assert [campo for campo, _ in emitidos] == list(RESPUESTA)
+
+
+def test_cada_campo_se_emite_al_completarse():
+    parser = ParserJSONIncremental()
+    assert parser.alimentar('{"Clasificacion": "GRUPO') == []
+    assert parser.alimentar(' A", "Nivel_Alarmismo": 4') == [("Clasificacion", "GRUPO A")]
+    # Un número sólo termina con la coma o la llave que lo sigue.
+    assert parser.alimentar("0") == []
+    assert parser.alimentar(', "Cita": "') == [("Nivel_Alarmismo", 40)]
+    assert parser.alimentar('x"}') == [("Cita", "x")]
+    assert parser.completo
+
+
+def test_comilla_escapada_partida_entre_trozos():
+    parser = ParserJSONIncremental()
+    assert parser.alimentar('{"Cita": "dijo \\') == []
+    assert parser.alimentar('"hola\\"') == []
+    assert parser.alimentar('"}') == [("Cita", 'dijo "hola"')]
+
+
+def test_barra_escapada_al_final_de_un_trozo_no_escapa_la_comilla():
+    parser = ParserJSONIncremental()
+    assert parser.alimentar('{"Cita": "C:\\\\') == []
+    assert parser.alimentar('"}') == [("Cita", "C:\\")]
+
+
+def test_ignora_las_vallas_de_markdown():
+    texto = "```json\n" + json.dumps(RESPUESTA) + "\n```"
+    parser, emitidos = _alimentar_a_trozos(texto, 5)
+    assert parser.resultado == RESPUESTA
+    # Lo que sigue al cierre del objeto no se procesa.
+    assert parser.alimentar('{"Cita": "otra"}') == []
+
+
+def test_valores_anidados_y_no_validos():
+    parser = ParserJSONIncremental()
+    emitidos = parser.alimentar('{"a": [1, {"b": "}"}], "Nivel_Alarmismo": 75%, "c": true}')
+    assert emitidos == [("a", [1, {"b": "}"}]), ("Nivel_Alarmismo", "75%"), ("c", True)]
+
+
+@pytest.mark.parametrize("cola, esperado", [
+    ('abc', "abc"),
+    ('abc \\', "abc "),
+    ('abc \\u', "abc "),
+    ('abc \\u00', "abc "),
+    ('abc \\u00e', "abc "),
+    ('abc \\u00e9', "abc é"),
+    ('abc \\\\', "abc \\"),
+    ('abc \\\\\\', "abc \\"),
+    ('abc \\n', "abc \n"),
+])
+def test_pendiente_descarta_escapes_a_medias(cola, esperado):
+    parser = ParserJSONIncremental()
+    parser.alimentar('{"Clasificacion": "A", "Desarticulacion": "' + cola)
+    assert parser.pendiente() == ("Desarticulacion", esperado)
+
+
+def test_sin_cadena_a_medias_no_hay_pendiente():
+    parser = ParserJSONIncremental()
+    parser.alimentar('{"Clasificacion": "A", "Nivel_Alarmismo": 4')
+    assert parser.pendiente() is None
+    parser.alimentar("0}")
+    assert parser.pendiente() is None
@@ -0,0 +1,152 @@
+import threading
+import time
+
+import pytest
+
+from motor import limitador
+from motor.limitador import LimitadorTasa
+
+
+class ErrorCuota(Exception):
+    code = 429
+
+
+class ErrorPermanente(Exception):
+    code = 400
+
+
+def _agotado(peticiones_por_minuto=600):
+    # El cubo empieza lleno (un minuto de cuota): se vacía para medir el ritmo.
+    lim = LimitadorTasa(peticiones_por_minuto=peticiones_por_minuto)
+    for _ in range(peticiones_por_minuto):
+        lim.adquirir()
+    return lim
+
+
+def test_sin_cuota_las_peticiones_salen_al_ritmo_configurado():
+    lim = _agotado(600)  # una cada 0.1 s
+    inicio = time.monotonic()
+    for _ in range(5):
+        lim.adquirir()
+    assert 0.4 <= time.monotonic() - inicio < 1.5
+
+
+def test_las_esperas_se_atienden_en_orden_de_llegada():
+    lim = _agotado(600)
+    orden = []
+    avisos = {}
+    hilos = []
+    for i in range(6):
+        def peticion(i=i):
+            lim.adquirir(al_esperar=lambda posicion, segundos: avisos.setdefault(i, posicion))
+            orden.append(i)
+
+        hilo = threading.Thread(target=peticion)
+        hilo.start()
+        hilos.append(hilo)
+        # Cada petición entra en la cola antes de lanzar la siguiente.
+        while lim.en_cola < i + 1 - len(orden):
+            time.sleep(0.001)
+    for hilo in hilos:
+        hilo.join(5)
+    assert orden == list(range(6))
+    assert avisos[0] == 1
+    assert lim.en_cola == 0
+
+
+def test_la_posicion_en_cola_se_anuncia_y_avanza():
+    lim = _agotado(600)
+    avisos = []
+    primero = threading.Thread(target=lim.adquirir)
+    primero.start()
+    while lim.en_cola < 1:
+        time.sleep(0.001)
+    lim.adquirir(al_esperar=lambda posicion, segundos: avisos.append(posicion))
+    primero.join(5)
+    assert avisos[0] == 2
+    assert avisos[-1] == 1
+
+
+def test_penalizar_bloquea_a_todos_hasta_que_pasa():
+    lim = LimitadorTasa(peticiones_por_minuto=600)
+    lim.penalizar(0.3)
+    inicio = time.monotonic()
+    lim.adquirir()
+    assert time.monotonic() - inicio >= 0.25
+
+
+def test_tokens_por_minuto_tambien_limitan():
+    lim = LimitadorTasa(peticiones_por_minuto=10_000, tokens_por_minuto=6000)  # 100 tokens/s
+    lim.adquirir(tokens=6000)
+    inicio = time.monotonic()
+    lim.adquirir(tokens=30)
+    assert 0.2 <= time.monotonic() - inicio < 1.5
+
+
+# ==========================================
+# REINTENTOS
+# ==========================================
+
+@pytest.fixture
+def esperas(monkeypatch):
+    registro = []
+    monkeypatch.setattr(limitador.time, "sleep", registro.append)
+    monkeypatch.setattr(limitador.random, "uniform", lambda a, b: b)
+    return registro
+
+
+def test_reintenta_los_errores_transitorios_con_backoff_exponencial(esperas):
+    fallos = [ErrorCuota("429"), ErrorCuota("429"), ErrorCuota("429")]
+
+    def funcion():
+        if fallos:
+            raise fallos.pop(0)
+        return "ok"
+
+    lim = LimitadorTasa()
+    intentos = []
+    resultado = limitador.reintentar(funcion, intentos=4, base=1.0, maximo=3.0, limitador=lim,
+                                     al_reintentar=lambda intento, espera, e: intentos.append(intento))
+    assert resultado == "ok"
+    assert intentos == [1, 2, 3]
+    assert esperas == [1.0, 2.0, 3.0]
+    # Un 429 agota la cuota de todo el proceso.
+    assert lim._bloqueado_hasta > time.monotonic()
+
+
+def test_no_reintenta_los_errores_permanentes(esperas):
+    llamadas = []
+
+    def funcion():
+        llamadas.append(1)
+        raise ErrorPermanente("400 Bad Request")
+
+    with pytest.raises(ErrorPermanente):
+        limitador.reintentar(funcion)
+    assert len(llamadas) == 1
+    assert esperas == []
+
+
+def test_agotados_los_intentos_se_propaga_el_error(esperas):
+    def funcion():
+        raise ErrorCuota("429")
+
+    with pytest.raises(ErrorCuota):
+        limitador.reintentar(funcion, intentos=3)
+    assert len(esperas) == 2
+
+
+def test_un_429_en_el_mensaje_tambien_penaliza_al_limitador(esperas):
+    # Sin atributo `code` (p. ej. un error envuelto por otra librería).
+    fallos = [RuntimeError("429 Resource has been exhausted (e.g. check quota).")]
+
+    def funcion():
+        if fallos:
+            raise fallos.pop(0)
+        return "ok"
+
+    lim = LimitadorTasa()
+    assert limitador.es_limite_cuota(RuntimeError("429 Too Many Requests"))
+    assert limitador.reintentar(funcion, base=0.5, limitador=lim) == "ok"
+    assert esperas == [0.5]
+    assert lim._bloqueado_hasta > time.monotonic()
@@ -0,0 +1,83 @@
+import json
+
+import pytest
+
+from motor import lote
+
+
+def _escribir(ruta, lineas):
+    ruta.write_text("".join(linea + "\n" for linea in lineas), encoding="utf-8")
+    return str(ruta)
+
+
+# ==========================================
+# ENTRADAS
+# ==========================================
+
+def test_lee_jsonl_y_csv(tmp_path):
+    jsonl = _escribir(tmp_path / "a.jsonl", [
+        '{"id": 1, "texto": " La IA es peligrosa. "}',
+        "",
+        '{"argumento": "The robots are coming.", "idioma": "en"}',
+        '{"id": "vacio", "texto": "   "}',
+    ])
+    entradas = lote.leer_entradas(jsonl, "ES")
+    assert [(e["id"], e["idioma"], e["texto"]) for e in entradas][0] == ("1", "ES", "La IA es peligrosa.")
+    assert entradas[1]["idioma"] == "EN"
+    assert len(entradas) == 2
+
+    csv = _escribir(tmp_path / "a.csv", ["id,texto", '7,"La IA, dicen, es peligrosa."'])
+    assert lote.leer_entradas(csv, "ES") == [{"id": "7", "idioma": "ES", "texto": "La IA, dicen, es peligrosa."}]
+
+
+def test_el_id_por_defecto_no_depende_del_orden(tmp_path):
+    lineas = ['{"texto": "uno"}', '{"texto": "dos"}']
+    a = lote.leer_entradas(_escribir(tmp_path / "a.jsonl", lineas), "ES")
+    b = lote.leer_entradas(_escribir(tmp_path / "b.jsonl", lineas[::-1]), "ES")
+    assert {e["texto"]: e["id"] for e in a} == {e["texto"]: e["id"] for e in b}
+
+
+@pytest.mark.parametrize("linea, mensaje", [
+    ('{"texto": "sin cerrar"', "a.jsonl:2: JSON inválido"),
+    ('["texto", "en una lista"]', "a.jsonl:2: se esperaba un objeto JSON"),
+    ('{"texto": "x", "idioma": "FR"}', "Idioma no soportado"),
+])
+def test_las_lineas_mal_formadas_indican_donde_estan(tmp_path, linea, mensaje):
+    ruta = _escribir(tmp_path / "a.jsonl", ['{"texto": "bien"}', linea])
+    with pytest.raises(ValueError, match=mensaje):
+        lote.leer_entradas(ruta, "ES")
+
+
+# ==========================================
+# REANUDACIÓN
+# ==========================================
+
+def test_ids_completados_omite_errores_y_la_ultima_linea_a_medias(tmp_path):
+    assert lote.ids_completados(str(tmp_path / "no_existe.jsonl")) == set()
+    salida = _escribir(tmp_path / "salida.jsonl", [
+        json.dumps({"id": "a", "resultado": {}, "error": None}),
+        json.dumps({"id": "b", "resultado": None, "error": "ErrorCuota: 429"}),
+        '{"id": "c", "resultado": {"Clasif',
+    ])
+    assert lote.ids_completados(salida) == {"a"}
+
+
+def test_un_lote_interrumpido_se_reanuda_donde_se_quedo(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "datos").mkdir()
+    entrada = _escribir(tmp_path / "entrada.jsonl", [
+        json.dumps({"id": i, "texto": f"Los robots nos quitarán el trabajo {i}."}) for i in ("a", "b", "c")
+    ])
+    salida = _escribir(tmp_path / "salida.jsonl", [
+        json.dumps({"id": "a", "resultado": {}, "error": None}),
+        json.dumps({"id": "b", "resultado": None, "error": "ErrorCuota: 429"}),
+    ])
+    # El proceso murió escribiendo "c": la línea quedó sin terminar.
+    with open(salida, "a", encoding="utf-8") as f:
+        f.write('{"id": "c", "resul')
+    assert lote.main([entrada, "-o", salida, "--backend", "falso", "--rpm", "1000"]) == 0
+    assert lote.ids_completados(salida) == {"a", "b", "c"}
+    # Completado el lote, otra ejecución no hace nada.
+    tamano = (tmp_path / "salida.jsonl").stat().st_size
+    assert lote.main([entrada, "-o", salida, "--backend", "falso"]) == 0
+    assert (tmp_path / "salida.jsonl").stat().st_size == tamano
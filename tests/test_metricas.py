@@ -0,0 +1,30 @@
+import time
+
+from motor import analisis, corpus
+from motor.metricas import Metricas
+
+BIBLIOTECA = corpus.Biblioteca(
+    [corpus.Documento("fuente.pdf", "h1", ["La inteligencia artificial no sustituye el juicio humano."])], []
+)
+
+
+def test_la_llamada_al_modelo_no_incluye_el_pintado(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    metricas = Metricas()
+    motor = analisis.MotorAnalisis(
+        BIBLIOTECA,
+        analisis.backend_falso(metricas=metricas),
+        config=analisis.ConfigAnalisis(mapear_corpus=False),
+        metricas=metricas,
+    )
+    campos = []
+
+    def pintar(campo, valor):
+        campos.append(campo)
+        time.sleep(0.1)
+
+    motor.analizar("Los robots nos quitarán el trabajo.", "ES", usar_cache=False, al_recibir_campo=pintar)
+    etapas = metricas.instantanea()["etapas"]
+    assert len(campos) >= 5
+    assert etapas["llamada_modelo"]["n"] == 1
+    assert etapas["llamada_modelo"]["total_s"] < 0.1
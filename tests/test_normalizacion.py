@@ -0,0 +1,32 @@
+from motor import corpus, normalizacion
+
+
+def _pagina(numero, cuerpo):
+    return f"Informe anual\n{cuerpo}\n{numero}"
+
+
+def test_pie_con_numero_de_pagina_no_borra_numeros_del_cuerpo():
+    paginas = [_pagina(n, f"Texto de la página {n}.") for n in range(1, 5)]
+    paginas[2] = _pagina(3, "Las ventas crecieron en\n2019\ncon\n42\nclientes nuevos y\n7\nsedes.")
+    repetidas = normalizacion.lineas_repetidas(paginas)
+    assert "#" in repetidas
+    texto = "\n".join(normalizacion.limpiar_pagina(paginas[2], repetidas))
+    assert all(numero in texto for numero in ("2019", "42", "7"))
+    assert "Informe anual" not in texto
+    assert not texto.rstrip().endswith("3")
+
+
+def test_cabecera_repetida_solo_se_quita_en_los_extremos():
+    paginas = [f"Capítulo uno\nCuerpo {n}.\nCapítulo uno\nMás cuerpo.\n{n}" for n in range(1, 5)]
+    repetidas = normalizacion.lineas_repetidas(paginas)
+    bloques = normalizacion.limpiar_pagina(paginas[0], repetidas)
+    assert bloques == ["Cuerpo 1.", "Capítulo uno", "Más cuerpo."]
+
+
+def test_normalizar_conserva_los_numeros_del_cuerpo():
+    documento = corpus.Documento("a.pdf", "h", [_pagina(n, f"En {1990 + n} se publicaron\n{n * 7}\nartículos.")
+                                               for n in range(1, 6)])
+    normalizada, informe = normalizacion.normalizar(corpus.Biblioteca([documento]))
+    for n, pagina in enumerate(normalizada.documentos[0].paginas, start=1):
+        assert str(1990 + n) in pagina and str(n * 7) in pagina
+        assert "Informe anual" not in pagina
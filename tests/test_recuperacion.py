@@ -0,0 +1,87 @@
+import pytest
+
+from motor import analisis, corpus, recuperacion
+from motor.corpus import Biblioteca, Documento
+
+ROBOTS = Documento("robots.pdf", "h1", ["Los robots industriales sustituyen tareas repetitivas en las fábricas."])
+SESGOS = Documento("sesgos.pdf", "h2", ["Los algoritmos heredan los sesgos de los datos con los que se entrenan."])
+
+
+@pytest.fixture(autouse=True)
+def en_carpeta_temporal(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+
+def _estado(biblioteca, **config):
+    config = analisis.ConfigAnalisis(mapear_corpus=False, umbral_fuera_de_tema=None, **config)
+    return analisis.EstadoCorpus(biblioteca, config)
+
+
+# ==========================================
+# MODO DE CONTEXTO
+# ==========================================
+
+def test_auto_usa_el_contexto_completo_si_el_corpus_cabe():
+    estado = _estado(Biblioteca([ROBOTS, SESGOS], []), umbral_tokens_contexto_completo=1000)
+    assert estado.usar_contexto_completo
+    assert estado.indice is None
+    texto = "¿Nos quitarán el trabajo los robots?"
+    assert estado.contenido(texto, analisis.ConfigAnalisis()) == texto
+
+
+def test_auto_recupera_fragmentos_si_el_corpus_no_cabe():
+    estado = _estado(Biblioteca([ROBOTS, SESGOS], []), umbral_tokens_contexto_completo=10)
+    assert not estado.usar_contexto_completo
+    contenido = estado.contenido("¿Nos quitarán el trabajo los robots?", analisis.ConfigAnalisis(top_k_fragmentos=1))
+    assert "[Fuente: robots.pdf | Página 1]" in contenido
+    assert "sesgos.pdf" not in contenido
+
+
+@pytest.mark.parametrize("modo, completo", [("completo", True), ("recuperacion", False)])
+def test_el_modo_explicito_no_depende_del_tamano(modo, completo):
+    estado = _estado(Biblioteca([ROBOTS], []), modo_contexto=modo, umbral_tokens_contexto_completo=10)
+    assert estado.usar_contexto_completo is completo
+
+
+# ==========================================
+# RECONSTRUCCIÓN INCREMENTAL
+# ==========================================
+
+def test_solo_se_trocean_de_nuevo_los_documentos_cambiados():
+    anterior = recuperacion.IndiceBM25.construir(Biblioteca([ROBOTS, SESGOS], []))
+    cambiado = Documento("sesgos.pdf", "h3", ["Los sistemas automáticos discriminan sin que nadie lo note."])
+    nuevo_doc = Documento("empleo.pdf", "h4", ["El empleo se transforma más de lo que desaparece."])
+    indice = recuperacion.IndiceBM25.construir(Biblioteca([ROBOTS, cambiado, nuevo_doc], []), anterior=anterior)
+
+    assert indice.hashes == {"robots.pdf": "h1", "sesgos.pdf": "h3", "empleo.pdf": "h4"}
+    # Los fragmentos del documento sin cambios se reutilizan tal cual.
+    assert indice.fragmentos[0] is anterior.fragmentos[0]
+    assert indice.frecuencias[0] is anterior.frecuencias[0]
+    assert indice.frecuencias[1] is not anterior.frecuencias[1]
+    assert indice.buscar("discriminan", k=1)[0][0]["archivo"] == "sesgos.pdf"
+    assert indice.buscar("sesgos heredan", k=1) == []
+
+
+def test_el_indice_en_disco_se_reconstruye_al_cambiar_el_corpus():
+    biblioteca = Biblioteca([ROBOTS], [])
+    indice = recuperacion.cargar_o_construir(biblioteca)
+    assert recuperacion.cargar_o_construir(biblioteca).fragmentos == indice.fragmentos
+    otra = Biblioteca([ROBOTS, SESGOS], [])
+    assert len(recuperacion.cargar_o_construir(otra, anterior=indice).fragmentos) == 2
+
+
+# ==========================================
+# PRESUPUESTO DE TOKENS
+# ==========================================
+
+def test_la_seleccion_respeta_el_presupuesto_de_tokens():
+    largo = Documento("largo.pdf", "h5", [" ".join(["robots trabajo"] * 60)])
+    indice = recuperacion.IndiceBM25.construir(Biblioteca([largo, ROBOTS, SESGOS], []))
+    consulta = "robots trabajo"
+    assert [f["archivo"] for f, _ in indice.buscar(consulta)][:2] == ["largo.pdf", "robots.pdf"]
+
+    coste_corto = corpus.estimar_tokens(indice.buscar(consulta)[1][0]["texto"])
+    seleccion = recuperacion.seleccionar_fragmentos(indice, consulta, presupuesto_tokens=coste_corto)
+    # El fragmento largo no cabe, pero no impide que entre el siguiente.
+    assert [f["archivo"] for f in seleccion] == ["robots.pdf"]
+    assert recuperacion.seleccionar_fragmentos(indice, consulta, presupuesto_tokens=coste_corto - 1) == []
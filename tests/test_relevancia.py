@@ -0,0 +1,52 @@
+import os
+
+import pytest
+
+from motor import analisis, corpus, relevancia
+from motor.evaluar_relevancia import elegir_umbral, evaluar, leer_etiquetados
+from motor.traducciones import TRADUCCIONES
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="module")
+def filtro(tmp_path_factory):
+    # Mismo camino que en producción: corpus normalizado y mapeado.
+    datos = os.path.join(RAIZ, "datos")
+    anterior = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("cache"))
+    try:
+        return analisis.EstadoCorpus(corpus.cargar_biblioteca(datos), analisis.ConfigAnalisis()).filtro
+    finally:
+        os.chdir(anterior)
+
+
+def _casos(nombre):
+    return leer_etiquetados(os.path.join(RAIZ, "evaluacion", nombre))
+
+
+def test_activo_por_defecto(filtro):
+    assert filtro is not None
+    assert filtro.umbral == relevancia.UMBRAL_POR_DEFECTO
+
+
+def test_el_umbral_por_defecto_es_el_elegido_en_ajuste(filtro):
+    assert elegir_umbral(filtro, _casos("relevancia_ajuste.jsonl")) == relevancia.UMBRAL_POR_DEFECTO
+
+
+def test_sin_falsos_descartes_en_prueba(filtro):
+    resultado = evaluar(filtro, _casos("relevancia_prueba.jsonl"), relevancia.UMBRAL_POR_DEFECTO)
+    assert resultado["fp"] == 0
+    assert resultado["vp"] > 0
+
+
+def test_los_casos_de_ejemplo_nunca_se_descartan(filtro):
+    for idioma in TRADUCCIONES.values():
+        assert not any(filtro.es_fuera_de_tema(caso) for caso in idioma["casos_ejemplo"])
+
+
+@pytest.mark.parametrize("valor, esperado", [
+    (None, relevancia.UMBRAL_POR_DEFECTO), ("", relevancia.UMBRAL_POR_DEFECTO), ("off", None), ("0.95", 0.95),
+])
+def test_leer_umbral(valor, esperado):
+    assert relevancia.leer_umbral(valor) == esperado
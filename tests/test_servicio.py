@@ -0,0 +1,190 @@
+import asyncio
+import http.client
+import json
+import threading
+import time
+
+import pytest
+
+from motor import analisis, cache_respuestas, corpus
+from motor.cliente import ClienteServicio, ErrorServicio
+from motor.metricas import Metricas
+from motor.servicio import ServicioAnalisis
+
+TOKEN = "abc"
+BIBLIOTECA = corpus.Biblioteca(
+    [corpus.Documento("fuente.pdf", "h1", ["La inteligencia artificial no sustituye el juicio humano."])],
+    [("roto.pdf", "PdfReadError: EOF marker not found")],
+)
+
+
+async def _esperar_tareas():
+    await asyncio.gather(*(asyncio.all_tasks() - {asyncio.current_task()}))
+
+
+@pytest.fixture
+def servicio(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    metricas = Metricas()
+    motor = analisis.MotorAnalisis(
+        BIBLIOTECA,
+        analisis.backend_falso(latencia=0.3, metricas=metricas),
+        config=analisis.ConfigAnalisis(mapear_corpus=False),
+        cache=cache_respuestas.CacheRespuestas(ruta=str(tmp_path / "respuestas.sqlite")),
+        metricas=metricas,
+    )
+    servicio = ServicioAnalisis(motor, {TOKEN}, trabajadores=2)
+    loop = asyncio.new_event_loop()
+    servidor = loop.run_until_complete(asyncio.start_server(servicio.atender, "127.0.0.1", 0))
+    hilo = threading.Thread(target=loop.run_forever, daemon=True)
+    hilo.start()
+    servicio.puerto = servidor.sockets[0].getsockname()[1]
+    yield servicio
+    loop.call_soon_threadsafe(servidor.close)
+    loop.call_soon_threadsafe(loop.stop)
+    hilo.join(5)
+    # Las conexiones que aún se estén cerrando terminan antes de cerrar el bucle.
+    loop.run_until_complete(_esperar_tareas())
+    loop.close()
+    servicio.pool.shutdown(wait=True)
+
+
+def _peticion(servicio, metodo, ruta, cuerpo=None, token=TOKEN, cabeceras=None):
+    conexion = http.client.HTTPConnection("127.0.0.1", servicio.puerto, timeout=10)
+    cabeceras = dict(cabeceras or {})
+    if token is not None:
+        cabeceras["Authorization"] = f"Bearer {token}"
+    if isinstance(cuerpo, dict):
+        cuerpo = json.dumps(cuerpo)
+    conexion.request(metodo, ruta, body=cuerpo, headers=cabeceras)
+    respuesta = conexion.getresponse()
+    datos = respuesta.read()
+    conexion.close()
+    return respuesta.status, datos
+
+
+def _cliente(servicio, token=TOKEN):
+    return ClienteServicio(f"http://127.0.0.1:{servicio.puerto}", token)
+
+
+# ==========================================
+# AUTORIZACIÓN
+# ==========================================
+
+def test_salud_sin_token_solo_confirma_que_esta_vivo(servicio):
+    estado, datos = _peticion(servicio, "GET", "/salud", token=None)
+    assert estado == 200
+    assert json.loads(datos) == {"estado": "ok"}
+
+
+def test_salud_con_token_detalla_el_corpus(servicio):
+    biblioteca = _cliente(servicio).biblioteca
+    assert biblioteca.archivos == ["fuente.pdf"]
+    assert biblioteca.fallidos == [("roto.pdf", "PdfReadError: EOF marker not found")]
+    assert biblioteca.huella == servicio.motor.biblioteca.huella
+
+
+@pytest.mark.parametrize("metodo, ruta", [
+    ("GET", "/salud"), ("GET", "/metricas"), ("GET", "/metricas?formato=json"), ("POST", "/analizar"),
+])
+def test_token_invalido_se_rechaza(servicio, metodo, ruta):
+    estado, _ = _peticion(servicio, metodo, ruta, {"texto": "x"}, token="otro")
+    assert estado == 401
+
+
+@pytest.mark.parametrize("ruta", ["/metricas", "/metrics", "/metricas?formato=json"])
+def test_metricas_exigen_token(servicio, ruta):
+    assert _peticion(servicio, "GET", ruta, token=None)[0] == 401
+    assert _peticion(servicio, "GET", ruta)[0] == 200
+
+
+def test_metricas_del_servicio(servicio):
+    cliente = _cliente(servicio)
+    cliente.analizar("Los robots nos quitarán el trabajo.", "ES", usar_cache=False)
+    assert "contadores" in cliente.metricas()
+    estado, datos = _peticion(servicio, "GET", "/metricas")
+    assert estado == 200 and b"# TYPE" in datos
+
+
+# ==========================================
+# ERRORES DE PETICIÓN
+# ==========================================
+
+@pytest.mark.parametrize("metodo, ruta, cuerpo, cabeceras, esperado", [
+    ("GET", "/analizar", None, None, 405),
+    ("GET", "/desconocida", None, None, 404),
+    ("POST", "/analizar", "{no es json", None, 400),
+    ("POST", "/analizar", {"texto": "  "}, None, 400),
+    ("POST", "/analizar", {"texto": "x", "idioma": "FR"}, None, 400),
+    ("POST", "/analizar", "x" * (64 * 1024 + 1), None, 413),
+])
+def test_peticiones_invalidas(servicio, metodo, ruta, cuerpo, cabeceras, esperado):
+    assert _peticion(servicio, metodo, ruta, cuerpo, cabeceras=cabeceras)[0] == esperado
+
+
+@pytest.mark.parametrize("longitud", ["abc", "-5"])
+def test_content_length_invalido_es_un_400(servicio, longitud, caplog):
+    conexion = http.client.HTTPConnection("127.0.0.1", servicio.puerto, timeout=10)
+    conexion.putrequest("POST", "/analizar")
+    conexion.putheader("Authorization", f"Bearer {TOKEN}")
+    conexion.putheader("Content-Length", longitud)
+    conexion.endheaders()
+    respuesta = conexion.getresponse()
+    assert respuesta.status == 400
+    assert "Content-Length" in json.loads(respuesta.read())["error"]
+    conexion.close()
+    assert "Error atendiendo la petición" not in caplog.text
+
+
+# ==========================================
+# ANÁLISIS
+# ==========================================
+
+def test_analisis_sin_streaming(servicio):
+    estado, datos = _peticion(servicio, "POST", "/analizar", {"texto": "Los robots nos quitarán el trabajo."})
+    assert estado == 200
+    assert json.loads(datos)["resultado"]["Clasificacion"].startswith("GRUPO")
+
+
+def test_streaming_ndjson_emite_campos_y_resultado(servicio):
+    estado, datos = _peticion(servicio, "POST", "/analizar",
+                              {"texto": "Los robots nos quitarán el trabajo.", "stream": True, "usar_cache": False})
+    assert estado == 200
+    eventos = [json.loads(linea) for linea in datos.decode("utf-8").splitlines()]
+    tipos = [e["evento"] for e in eventos]
+    assert tipos[-1] == "resultado"
+    assert "campo" in tipos
+    campos = {e["campo"]: e["valor"] for e in eventos if e["evento"] == "campo"}
+    assert campos["Clasificacion"] == eventos[-1]["resultado"]["Clasificacion"]
+
+
+def test_cliente_recibe_los_campos_en_streaming(servicio):
+    campos = []
+    data = _cliente(servicio).analizar("La IA es peligrosa.", "ES", al_recibir_campo=lambda c, v: campos.append(c))
+    assert "Clasificacion" in campos
+    assert set(campos) <= set(data)
+    assert _cliente(servicio).consultar_cache("La IA es peligrosa.", "ES") == data
+
+
+def test_cliente_con_token_invalido(servicio):
+    with pytest.raises(ErrorServicio) as error:
+        _cliente(servicio, token="otro").analizar("La IA es peligrosa.", "ES")
+    assert error.value.code == 401
+
+
+def test_desconexion_a_mitad_del_stream_no_cancela_el_analisis(servicio):
+    texto = "Los algoritmos deciden por nosotros."
+    conexion = http.client.HTTPConnection("127.0.0.1", servicio.puerto, timeout=10)
+    conexion.request("POST", "/analizar", body=json.dumps({"texto": texto, "stream": True}),
+                     headers={"Authorization": f"Bearer {TOKEN}"})
+    respuesta = conexion.getresponse()
+    assert json.loads(respuesta.readline())["evento"] == "campo"
+    conexion.close()
+    # El análisis termina igualmente y queda en la caché para el siguiente.
+    cliente = _cliente(servicio)
+    limite = time.monotonic() + 10
+    while (data := cliente.consultar_cache(texto, "ES")) is None and time.monotonic() < limite:
+        time.sleep(0.05)
+    assert data is not None
+    # Y el servicio sigue atendiendo.
+    assert _peticion(servicio, "GET", "/salud", token=None)[0] == 200